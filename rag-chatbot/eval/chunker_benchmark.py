@@ -0,0 +1,114 @@
+"""
+Micro-benchmark pentru segmentarea corpusului: load_and_chunk_data_legacy (mai
+multe treceri, tot textul în memorie) față de iter_chunks (o singură trecere peste
+fișierul mapat). Verifică întâi că ambele produc exact aceleași segmente, apoi
+măsoară durata, debitul (MB/s) și memoria maximă alocată (tracemalloc).
+
+    python -m eval.chunker_benchmark
+    python -m eval.chunker_benchmark --scale 20 --repeat 3    # corpus multiplicat de 20 ori
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.data_processor import CORPUS_FILE, load_and_chunk_data, load_and_chunk_data_legacy
+
+# Configuratii
+REPEAT = 5
+
+
+def measure(chunk_fn, corpus_file: str, repeat: int) -> dict:
+    """Cea mai bună durată din `repeat` rulări și memoria maximă dintr-o rulare separată."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            chunk_fn(corpus_file)
+        durations.append(time.perf_counter() - start)
+
+    # tracemalloc incetineste executia, deci memoria se masoara separat de timp
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunk_fn(corpus_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size_mb = os.path.getsize(corpus_file) / (1024 * 1024)
+    best = min(durations)
+    return {
+        "best_seconds": best,
+        "mean_seconds": sum(durations) / len(durations),
+        "throughput_mb_s": size_mb / best if best > 0 else float("inf"),
+        "peak_memory_mb": peak / (1024 * 1024),
+    }
+
+
+def scaled_corpus(corpus_file: str, scale: int) -> str:
+    """Un fișier temporar cu corpusul repetat de `scale` ori (pentru a vedea cum crește costul)."""
+    with open(corpus_file, "rb") as f:
+        data = f.read()
+    handle, path = tempfile.mkstemp(suffix=".txt", prefix="corpus_x{}_".format(scale))
+    with os.fdopen(handle, "wb") as f:
+        for _ in range(scale):
+            f.write(data)
+            f.write(b"\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pentru segmentarea corpusului.")
+    parser.add_argument("--corpus", default=os.path.join(ROOT_DIR, CORPUS_FILE))
+    parser.add_argument("--scale", type=int, default=1, help="De câte ori este multiplicat corpusul.")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    args = parser.parse_args()
+
+    corpus_file = scaled_corpus(args.corpus, args.scale) if args.scale > 1 else args.corpus
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy_output = load_and_chunk_data_legacy(corpus_file)
+            streaming_output = load_and_chunk_data(corpus_file)
+        identical = legacy_output == streaming_output
+        if not identical:
+            print("[EROARE] Segmentarea diferă între cele două variante!")
+
+        results = {
+            "legacy": measure(load_and_chunk_data_legacy, corpus_file, args.repeat),
+            "streaming": measure(load_and_chunk_data, corpus_file, args.repeat),
+        }
+        size_mb = os.path.getsize(corpus_file) / (1024 * 1024)
+    finally:
+        if corpus_file != args.corpus:
+            os.remove(corpus_file)
+
+    print("\n" + "=" * 60)
+    print(f" BENCHMARK SEGMENTARE - {size_mb:.2f} MB, {len(streaming_output[0])} segmente")
+    print("=" * 60)
+    print(f"Segmentare identică: {'da' if identical else 'NU'}")
+    print(f"{'varianta':<12} {'durată (ms)':>12} {'MB/s':>10} {'memorie max (MB)':>18}")
+    for name, stats in results.items():
+        print(f"{name:<12} {stats['best_seconds'] * 1000:12.1f} {stats['throughput_mb_s']:10.1f} "
+              f"{stats['peak_memory_mb']:18.2f}")
+    speedup = results["legacy"]["best_seconds"] / results["streaming"]["best_seconds"]
+    memory_ratio = results["legacy"]["peak_memory_mb"] / max(results["streaming"]["peak_memory_mb"], 1e-9)
+    print(f"\nAccelerare: {speedup:.2f}x | memorie maximă de {memory_ratio:.1f}x mai mică")
+
+    if args.output:
+        report = {"corpus_mb": size_mb, "chunks": len(streaming_output[0]), "identical": identical, **results}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
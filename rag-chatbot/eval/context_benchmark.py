@@ -0,0 +1,142 @@
+"""
+Efectul asamblării compacte a contextului (src.context_builder) asupra promptului.
+
+Pentru fiecare întrebare din benchmark_data.json sunt regăsite k segmente, apoi
+contextul este construit în două feluri - integral (toate segmentele, unul după
+altul) și compact (puncte comasate, duplicate eliminate, buget de tokeni, k
+adaptiv). Se raportează:
+
+  - tokenii estimați ai contextului și economia față de varianta integrală;
+  - câte segmente rămân în context și cât de des rămâne articolul așteptat;
+  - cu --generate: timpul până la primul token și durata generării, pentru
+    ambele variante (LLM-ul real sau cel simulat, cu --fake-backends).
+
+    python -m eval.context_benchmark
+    python -m eval.context_benchmark --generate --fake-backends --prompt-rate 400
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from eval.retrieval_benchmark import BENCHMARK_FILE, is_relevant, percentile
+from src import context_builder, rag_service
+from src.vector_db_manager import retrieve_chunks
+
+# Configuratii
+TOP_K = 10
+# Viteza de procesare a promptului pentru LLM-ul simulat (tokeni/s)
+FAKE_PROMPT_RATE = 400.0
+
+
+def pack_case(collection, case: dict, k: int) -> dict:
+    chunks = retrieve_chunks(collection, case["question"], k=k)
+    _, used_chunks, stats = context_builder.build_context(chunks)
+    return {
+        "id": case["id"],
+        "chunks": chunks,
+        "naive_hit": any(is_relevant(chunk, case) for chunk in chunks),
+        "packed_hit": any(is_relevant(chunk, case) for chunk in used_chunks),
+        **stats,
+    }
+
+
+def generate(results: list[dict], cases: list[dict], packing: bool) -> dict:
+    rag_service.CONTEXT_PACKING = packing
+    ttft, duration, prompt_tokens = [], [], []
+    for result, case in zip(results, cases):
+        stats = {}
+        rag_service.generate_response_with_llm(result["chunks"], case["question"], stats)
+        if "ttft" not in stats:
+            continue
+        ttft.append(stats["ttft"])
+        duration.append(stats["durata"])
+        prompt_tokens.append(stats.get("prompt_tokens") or 0)
+    return {
+        "answers": len(ttft),
+        "ttft_p50": percentile(ttft, 50), "ttft_p95": percentile(ttft, 95),
+        "durata_p50": percentile(duration, 50), "durata_p95": percentile(duration, 95),
+        "prompt_tokens_mean": sum(prompt_tokens) / len(prompt_tokens) if prompt_tokens else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Context integral vs. context compact (tokeni și latență).")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--budget", type=int, default=context_builder.CONTEXT_TOKEN_BUDGET,
+                        help="Bugetul de tokeni al contextului compact.")
+    parser.add_argument("--falloff", type=float, default=context_builder.SCORE_FALLOFF,
+                        help="Pragul k-ului adaptiv (0 = dezactivat).")
+    parser.add_argument("--generate", action="store_true", help="Măsoară și generarea (ttft, durată).")
+    parser.add_argument("--limit", type=int, default=None, help="Doar primele N întrebări.")
+    parser.add_argument("--fake-backends", action="store_true",
+                        help="Embedding-uri și LLM simulate (verifică doar infrastructura, nu calitatea).")
+    parser.add_argument("--prompt-rate", type=float, default=FAKE_PROMPT_RATE,
+                        help="Tokeni de prompt procesați pe secundă de LLM-ul simulat.")
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    args = parser.parse_args()
+
+    with open(BENCHMARK_FILE, "r", encoding="utf-8") as f:
+        cases = json.load(f)[:args.limit]
+
+    os.chdir(ROOT_DIR)
+    if args.fake_backends:
+        from src.server import use_fake_backends
+        use_fake_backends(embedding_latency=0.0, prompt_tokens_per_second=args.prompt_rate)
+    context_builder.CONTEXT_TOKEN_BUDGET = args.budget
+    context_builder.SCORE_FALLOFF = args.falloff
+    # Fara --generate nu este apelat LLM-ul, deci nici preincarcat
+    collection = rag_service.initialize_rag_system(reindex=False, prewarm=args.generate)
+
+    results = [pack_case(collection, case, args.k) for case in cases]
+    n = len(results)
+    naive_tokens = sum(r["tokeni_initial"] for r in results) / n
+    packed_tokens = sum(r["tokeni_context"] for r in results) / n
+    summary = {
+        "tokeni_initial_mediu": naive_tokens,
+        "tokeni_compact_mediu": packed_tokens,
+        "economie": 1 - packed_tokens / naive_tokens if naive_tokens else 0.0,
+        "segmente_folosite_medii": sum(r["segmente_folosite"] for r in results) / n,
+        "articole_comasate": sum(r["articole_comasate"] for r in results),
+        "duplicate": sum(r["duplicate"] for r in results),
+        "omise_scor": sum(r["scor_mic"] for r in results),
+        "omise_buget": sum(r["peste_buget"] for r in results),
+        "articol_regasit_integral": sum(r["naive_hit"] for r in results) / n,
+        "articol_regasit_compact": sum(r["packed_hit"] for r in results) / n,
+    }
+
+    print("\n" + "=" * 64)
+    print(f" CONTEXT - {n} întrebări, k={args.k}, buget {args.budget} tokeni, prag scor {args.falloff}")
+    print("=" * 64)
+    print(f"Tokeni context (medie): {naive_tokens:.0f} integral -> {packed_tokens:.0f} compact "
+          f"({summary['economie'] * 100:.1f}% mai puțin)")
+    print(f"Segmente folosite (medie): {summary['segmente_folosite_medii']:.1f} din {args.k}")
+    print(f"Articole comasate: {summary['articole_comasate']}, duplicate eliminate: {summary['duplicate']}, "
+          f"omise (scor / buget): {summary['omise_scor']} / {summary['omise_buget']}")
+    print(f"Articolul așteptat în context: {summary['articol_regasit_integral'] * 100:.1f}% integral, "
+          f"{summary['articol_regasit_compact'] * 100:.1f}% compact")
+
+    generation = {}
+    if args.generate:
+        for label, packing in (("integral", False), ("compact", True)):
+            generation[label] = generate(results, cases, packing)
+        print("\nGenerare (s):     ttft p50  ttft p95  durată p50  durată p95  tokeni prompt")
+        for label, stats in generation.items():
+            print(f"  {label:<14} {stats['ttft_p50']:9.3f} {stats['ttft_p95']:9.3f} {stats['durata_p50']:11.3f} "
+                  f"{stats['durata_p95']:11.3f} {stats['prompt_tokens_mean']:14.0f}")
+
+    if args.output:
+        for result in results:
+            result.pop("chunks")
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "budget": args.budget, "falloff": args.falloff, "summary": summary,
+                       "generation": generation, "cases": results}, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
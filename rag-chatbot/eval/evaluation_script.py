@@ -107,7 +107,8 @@ def run_evaluation():
         print(f"Testare ID {case['id']}: {case['question']}...")
         
         # Rulam RAG-ul
-        rag_output = process_query(collection, case['question'], k_results=10)
+        # Fara cache de raspunsuri: evaluam pipeline-ul, nu raspunsuri salvate anterior
+        rag_output = process_query(collection, case['question'], k_results=10, use_cache=False)
         
         # 1. Evaluare Retrieval
         retrieval_score = evaluate_retrieval(rag_output, case['expected_article_id'], case['expected_source'])
@@ -0,0 +1,300 @@
+"""
+Test de încărcare pentru pipeline-ul complet (rag_service.process_query), fără
+Gemini și fără Ollama: LLM-ul și latența serviciului de embedding sunt simulate
+(src.fakes), cu latență, viteză de generare și erori reglabile, iar indexul
+este construit local (furnizorul `hashing`, backend NumPy implicit), într-un
+director temporar.
+
+Două moduri, fiecare pe mai multe niveluri de încărcare:
+  - closed: N clienți, fiecare trimite următoarea întrebare imediat după
+    răspuns (--concurrency 1,2,4,8,16);
+  - open:   sosiri Poisson cu rata dată (--rate, cereri/s), servite de un pool
+    de --workers thread-uri (ca serverul); latența include așteptarea la coadă,
+    măsurată de la momentul programat al sosirii.
+Pentru fiecare nivel: debitul (cereri/s), p50/p95/p99 ale latenței, erorile,
+așteptarea medie la coadă (pentru un thread din pool, respectiv pentru un loc
+la LLM - limita --llm-concurrency) și mediile etapelor; la final, punctul de saturație (numărul de clienți peste care
+debitul nu mai crește, respectiv rata de sosire de la care cererile încep să
+aștepte la coadă).
+
+    python -m eval.load_benchmark
+    python -m eval.load_benchmark --mode open --rate 2,4,8,16 --llm-latency 0.5 --tokens-per-second 20
+    python -m eval.load_benchmark --llm-error-rate 0.05 --embedding-error-rate 0.02 --output incarcare.json
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from eval.retrieval_benchmark import BENCHMARK_FILE, percentile
+from src import rag_service, server, vector_db_manager
+from src.data_processor import load_and_chunk_data
+from src.embedding_providers import HashingEmbeddingProvider, set_embedding_provider
+from src.fakes import FakeChatBackend, FakeEmbeddingProvider
+
+# Configuratii
+TOP_K = 10
+DURATION_SECONDS = 10.0
+CONCURRENCY_LEVELS = "1,2,4,8,16"
+ARRIVAL_RATES = "1,2,4,8"
+# Mod closed: saturat cand debitul creste cu mai putin de atat fata de nivelul anterior
+SATURATION_MIN_GAIN = 0.10
+# Mod open: saturat cand latenta mediana depaseste de atatea ori mediana celei mai mici rate
+# (cererile incep sa astepte la coada); debitul masurat include golirea cozii la final,
+# deci pe durate scurte subestimeaza rata sustinuta si nu e un criteriu sigur
+SATURATION_LATENCY_FACTOR = 2.0
+STAGES = ["rescriere", "cautare_bruta", "cautare_rescrisa", "asteptare_llm", "primul_token", "generare"]
+
+
+def build_index(directory: str, backend: str):
+    """Indexul corpusului, construit cu `hashing` în `directory`; returnează (colecția, furnizorul)."""
+    vector_db_manager.VECTOR_BACKEND = backend
+    vector_db_manager.CHROMA_PATH = os.path.join(directory, "chroma")
+    vector_db_manager.NUMPY_DB_PATH = os.path.join(directory, "numpy")
+    provider = HashingEmbeddingProvider(model=f"incarcare-{uuid.uuid4().hex[:8]}")
+    set_embedding_provider(provider)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        chunks, metas, ids = load_and_chunk_data()
+        collection = vector_db_manager.create_or_update_db(chunks, metas, ids)
+    return collection, provider
+
+
+def _one_request(collection, question: str, k: int, arrived: float) -> dict:
+    started = time.perf_counter()
+    timings = {}
+    error = None
+    try:
+        answer = rag_service.process_query(collection, question, k, use_cache=False, timings=timings)
+        if timings.get("eroare_generare"):
+            error = "generare"
+    except Exception as e:
+        error = type(e).__name__
+    finished = time.perf_counter()
+    return {"latency": finished - arrived, "wait": started - arrived, "finished": finished,
+            "error": error, "timings": timings}
+
+
+def run_closed_loop(collection, questions: list[str], concurrency: int, duration: float, k: int):
+    """`concurrency` clienți care trimit cereri una după alta timp de `duration` secunde."""
+    records = []
+    order = itertools.count()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            question = questions[next(order) % len(questions)]
+            records.append(_one_request(collection, question, k, time.perf_counter()))
+
+    threads = [threading.Thread(target=client, name=f"client-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start
+
+
+def run_open_loop(collection, questions: list[str], rate: float, duration: float, k: int, workers: int,
+                  seed: int = 0):
+    """Sosiri Poisson cu rata `rate` (cereri/s) timp de `duration` secunde, servite de `workers` thread-uri."""
+    rng = random.Random(seed)
+    arrivals = []
+    moment = rng.expovariate(rate)
+    while moment < duration:
+        arrivals.append(moment)
+        moment += rng.expovariate(rate)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="incarcare")
+    start = time.perf_counter()
+    futures = []
+    try:
+        for position, offset in enumerate(arrivals):
+            arrived = start + offset
+            delay = arrived - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            question = questions[position % len(questions)]
+            futures.append(pool.submit(_one_request, collection, question, k, arrived))
+        records = [future.result() for future in futures]
+    finally:
+        pool.shutdown(wait=True)
+    return records, time.perf_counter() - start
+
+
+def summarize(records: list[dict], elapsed: float) -> dict:
+    ok = [record for record in records if record["error"] is None]
+    latencies = [record["latency"] for record in ok]
+    errors = {}
+    for record in records:
+        if record["error"] is not None:
+            errors[record["error"]] = errors.get(record["error"], 0) + 1
+    stages = {}
+    for stage in STAGES:
+        values = [record["timings"][stage] for record in ok if isinstance(record["timings"].get(stage), float)]
+        if values:
+            stages[stage] = sum(values) / len(values)
+    return {
+        "cereri": len(records),
+        "reusite": len(ok),
+        "erori": errors,
+        "debit": len(ok) / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        # Coada la pool (un thread liber) si, dupa ea, coada la LLM (un loc din limita rag_service)
+        "asteptare_medie": sum(record["wait"] for record in records) / len(records) if records else 0.0,
+        "asteptare_llm_medie": stages.get("asteptare_llm", 0.0),
+        "etape": stages,
+    }
+
+
+def closed_loop_saturation(levels: list[dict]) -> dict | None:
+    """Primul nivel de concurență după care debitul crește cu mai puțin de SATURATION_MIN_GAIN."""
+    for previous, level in zip(levels, levels[1:]):
+        if level["debit"] < previous["debit"] * (1 + SATURATION_MIN_GAIN):
+            return {"concurenta": previous["nivel"], "debit": previous["debit"], "p95": previous["p95"]}
+    return None
+
+
+def open_loop_saturation(levels: list[dict]) -> dict | None:
+    """Prima rată de sosire la care mediana latenței crește peste SATURATION_LATENCY_FACTOR x cea de bază."""
+    if not levels:
+        return None
+    baseline = levels[0]["p50"]
+    for level in levels[1:]:
+        if level["p50"] > baseline * SATURATION_LATENCY_FACTOR:
+            return {"rata": level["nivel"], "debit": level["debit"], "p50": level["p50"], "p95": level["p95"]}
+    return None
+
+
+def print_levels(title: str, unit: str, levels: list[dict]):
+    print(f"\n{title}")
+    print(f"  {unit:>8} {'cereri':>7} {'erori':>6} {'debit/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} "
+          f"{'p99 (s)':>8} {'coadă pool':>10} {'coadă LLM':>10}")
+    for level in levels:
+        errors = sum(level["erori"].values())
+        print(f"  {level['nivel']:>8g} {level['cereri']:>7} {errors:>6} {level['debit']:8.2f} {level['p50']:8.2f} "
+              f"{level['p95']:8.2f} {level['p99']:8.2f} {level['asteptare_medie']:10.2f} "
+              f"{level['asteptare_llm_medie']:10.2f}")
+
+
+def _levels(text: str) -> list[float]:
+    return [float(value) for value in text.split(",") if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de încărcare pentru process_query, cu backend-uri simulate.")
+    parser.add_argument("--mode", choices=["closed", "open", "both"], default="both")
+    parser.add_argument("--concurrency", default=CONCURRENCY_LEVELS, help="Clienți simultani (mod closed), ex: 1,2,4.")
+    parser.add_argument("--rate", default=ARRIVAL_RATES, help="Cereri pe secundă (mod open), ex: 1,2,4.")
+    parser.add_argument("--duration", type=float, default=DURATION_SECONDS, help="Secunde pe nivel.")
+    parser.add_argument("--workers", type=int, default=server.MAX_WORKERS, help="Thread-uri (mod open).")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--llm-concurrency", type=int, default=server.MAX_CONCURRENT_LLM_CALLS,
+                        help="Limita de apeluri simultane către LLM din rag_service (0 = nelimitat).")
+    parser.add_argument("--llm-parallel", type=int, default=0,
+                        help="Cereri procesate simultan de LLM-ul simulat (0 = nelimitat).")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Secunde până la primul token.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prompt-rate", type=float, default=0.0,
+                        help="Tokeni de prompt procesați pe secundă (0 = instantaneu).")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--embedding-latency", type=float, default=0.05,
+                        help="Latența simulată a serviciului de embedding (secunde per apel).")
+    parser.add_argument("--embedding-error-rate", type=float, default=0.0)
+    parser.add_argument("--query-batching", action="store_true", help="Micro-batching pentru vectorizare (ca serverul).")
+    parser.add_argument("--query-cache", action="store_true",
+                        help="Păstrează cache-ul LRU al vectorilor de întrebare (implicit dezactivat).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    args = parser.parse_args()
+
+    with open(BENCHMARK_FILE, "r", encoding="utf-8") as f:
+        questions = [case["question"] for case in json.load(f)]
+
+    os.chdir(ROOT_DIR)
+    directory = tempfile.mkdtemp(prefix="rag_incarcare_")
+    provider = None
+    try:
+        collection, provider = build_index(directory, args.backend)
+        set_embedding_provider(FakeEmbeddingProvider(provider, latency=args.embedding_latency,
+                                                     error_probability=args.embedding_error_rate, seed=args.seed))
+        rag_service.set_chat_backend(FakeChatBackend(
+            latency=args.llm_latency, tokens_per_second=args.tokens_per_second, answer_tokens=args.answer_tokens,
+            error_probability=args.llm_error_rate, seed=args.seed, prompt_tokens_per_second=args.prompt_rate,
+            parallel=args.llm_parallel))
+        rag_service.set_llm_concurrency(args.llm_concurrency or None)
+        if args.query_batching:
+            vector_db_manager.enable_query_batching()
+        if not args.query_cache:
+            # Fiecare cerere plateste vectorizarea, ca la intrebari mereu noi
+            vector_db_manager.set_query_cache_size(0)
+
+        results = {}
+        # Mesajele pipeline-ului (din toate thread-urile) ar acoperi raportul
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if args.mode in ("closed", "both"):
+                results["closed"] = []
+                for concurrency in _levels(args.concurrency):
+                    records, elapsed = run_closed_loop(collection, questions, int(concurrency), args.duration, args.k)
+                    results["closed"].append({"nivel": int(concurrency), **summarize(records, elapsed)})
+            if args.mode in ("open", "both"):
+                results["open"] = []
+                for rate in _levels(args.rate):
+                    records, elapsed = run_open_loop(collection, questions, rate, args.duration, args.k,
+                                                     args.workers, args.seed)
+                    results["open"].append({"nivel": rate, **summarize(records, elapsed)})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        if provider is not None:
+            shutil.rmtree(provider.cache_dir, ignore_errors=True)
+
+    print("\n" + "=" * 72)
+    print(f" TEST DE ÎNCĂRCARE - backend {args.backend}, k={args.k}, {args.duration:g}s pe nivel")
+    print(f" LLM simulat: {args.llm_latency:g}s până la primul token, {args.tokens_per_second:g} tok/s, "
+          f"{args.answer_tokens} tokeni, erori {args.llm_error_rate:.0%}, limită {args.llm_concurrency or '-'}")
+    print(f" Embedding simulat: {args.embedding_latency:g}s per apel, erori {args.embedding_error_rate:.0%}")
+    print("=" * 72)
+    saturation = {}
+    if "closed" in results:
+        print_levels("Buclă închisă (clienți simultani)", "clienți", results["closed"])
+        saturation["closed"] = closed_loop_saturation(results["closed"])
+        knee = saturation["closed"]
+        print("  Saturație: " + (f"debitul nu mai crește peste {knee['concurenta']} clienți "
+                                 f"({knee['debit']:.2f} cereri/s, p95 {knee['p95']:.2f}s)" if knee
+                                 else "neatinsă la nivelurile testate"))
+    if "open" in results:
+        print_levels("Buclă deschisă (sosiri Poisson)", "cereri/s", results["open"])
+        saturation["open"] = open_loop_saturation(results["open"])
+        knee = saturation["open"]
+        print("  Saturație: " + (f"de la {knee['rata']:g} cereri/s cererile așteaptă la coadă (p50 {knee['p50']:.2f}s, "
+                                 f"debit {knee['debit']:.2f} cereri/s)" if knee else "neatinsă la nivelurile testate"))
+    for mode, levels in results.items():
+        last = levels[-1]
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in last["etape"].items())
+        print(f"\nEtape (medii, {mode}, nivelul {last['nivel']:g}): {stages or '-'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"configuratie": vars(args), "rezultate": results, "saturatie": saturation},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Compromisul recall / memorie / latență al vectorilor cuantizați (src.quantization)
+pe întrebările din benchmark_data.json.
+
+Aceiași vectori (cei produși de generate_embeddings pentru corpus) sunt încărcați
+într-o colecție NumPy pentru fiecare mod - float32 exact, int8 și binar - iar
+modurile cuantizate sunt rulate cu mai mulți factori de re-scorare (factorul 1 =
+doar candidații aproximativi, fără candidați în plus pentru re-scorare). Se raportează:
+
+  - recall@k pe articolul așteptat (doar căutare vectorială, fără BM25);
+  - suprapunerea cu top-k-ul exact;
+  - latența p50/p95 a unei interogări;
+  - memoria ținută pentru căutare (vectorii compleți rămân pe disc, memory-mapped).
+
+    python -m eval.quantization_benchmark
+    python -m eval.quantization_benchmark --fake-backends --distractors 20000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from eval.retrieval_benchmark import BENCHMARK_FILE, is_relevant, percentile
+from src import vector_db_manager
+from src.data_processor import load_and_chunk_data
+from src.numpy_store import NumpyCollection
+
+# Configuratii
+TOP_K = 10
+RESCORE_FACTORS = [1, 2, 4, 8]
+REPEAT = 20
+
+
+def build_collection(directory: str, quantization: str, chunks, metas, ids, vectors) -> NumpyCollection:
+    collection = NumpyCollection(f"quant_{quantization}", path=directory, quantization=quantization)
+    collection.upsert(ids=ids, embeddings=vectors, documents=chunks, metadatas=metas)
+    # Codurile cuantizate sunt calculate la persistare
+    collection.flush()
+    return collection
+
+
+def evaluate(collection: NumpyCollection, cases: list[dict], query_vectors: np.ndarray,
+             exact_ids: list[list[str]] | None, k: int, repeat: int) -> dict:
+    latencies, hits, overlap, results = [], 0, 0, []
+    for case, query in zip(cases, query_vectors):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = collection.query(query_embeddings=[query], n_results=k)
+            latencies.append(time.perf_counter() - start)
+        retrieved = [{"id": doc_id, "metadata": meta}
+                     for doc_id, meta in zip(response["ids"][0], response["metadatas"][0])]
+        hits += any(is_relevant(chunk, case) for chunk in retrieved)
+        results.append(response["ids"][0])
+    if exact_ids is not None:
+        overlap = sum(len(set(a) & set(e)) for a, e in zip(results, exact_ids)) / (k * len(cases))
+    memory = collection.memory_stats()
+    return {
+        f"recall@{k}": hits / len(cases),
+        "overlap_exact": overlap if exact_ids is not None else 1.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "search_mb": memory["search_bytes"] / (1024 * 1024),
+        "bytes_per_vector": memory["search_bytes"] / max(collection.count(), 1),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs. memorie/latență pentru vectorii cuantizați.")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--factors", type=int, nargs="+", default=RESCORE_FACTORS)
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Repetări per întrebare (pentru latență).")
+    parser.add_argument("--distractors", type=int, default=0,
+                        help="Vectori aleatori adăugați în colecție (simulează mai multe coduri legislative).")
+    parser.add_argument("--fake-backends", action="store_true",
+                        help="Embedding-uri simulate (verifică doar infrastructura, nu calitatea).")
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    args = parser.parse_args()
+
+    os.chdir(ROOT_DIR)
+    if args.fake_backends:
+        from src.server import use_fake_backends
+        use_fake_backends(embedding_latency=0.0)
+
+    with open(BENCHMARK_FILE, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks, metas, ids = load_and_chunk_data()
+    vectors = np.asarray(vector_db_manager.generate_embeddings(chunks), dtype=np.float32)
+    if len(vectors) != len(chunks):
+        print("[EROARE] Nu s-au putut genera vectorii corpusului.")
+        return
+    query_vectors = np.asarray([vector_db_manager.embed_query(case["question"]) for case in cases], dtype=np.float32)
+
+    if args.distractors:
+        rng = np.random.default_rng(0)
+        noise = rng.standard_normal((args.distractors, vectors.shape[1])).astype(np.float32)
+        vectors = np.vstack([vectors, noise])
+        chunks = chunks + [""] * args.distractors
+        metas = metas + [{"sursa": "zgomot", "articol": "N/A"}] * args.distractors
+        ids = ids + [f"zgomot/{i}" for i in range(args.distractors)]
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="quant_bench_") as directory:
+        exact = build_collection(directory, "none", chunks, metas, ids, vectors)
+        baseline = evaluate(exact, cases, query_vectors, None, args.k, args.repeat)
+        exact_ids = baseline.pop("results")
+        rows.append({"mode": "float32", "factor": "-", **baseline})
+
+        for quantization in ("int8", "binary"):
+            collection = build_collection(directory, quantization, chunks, metas, ids, vectors)
+            for factor in args.factors:
+                collection.rescore_factor = factor
+                stats = evaluate(collection, cases, query_vectors, exact_ids, args.k, args.repeat)
+                stats.pop("results")
+                rows.append({"mode": quantization, "factor": factor, **stats})
+
+    print("\n" + "=" * 78)
+    print(f" CUANTIZARE - {len(ids)} vectori (dim {vectors.shape[1]}), {len(cases)} întrebări, k={args.k}")
+    print("=" * 78)
+    print(f"{'mod':<8} {'factor':>6} {f'recall@{args.k}':>10} {'vs exact':>9} {'p50 (ms)':>9} "
+          f"{'p95 (ms)':>9} {'memorie (MB)':>13} {'octeți/vector':>14}")
+    for row in rows:
+        print(f"{row['mode']:<8} {row['factor']:>6} {row[f'recall@{args.k}']:10.3f} {row['overlap_exact']:9.3f} "
+              f"{row['p50_ms']:9.3f} {row['p95_ms']:9.3f} {row['search_mb']:13.2f} {row['bytes_per_vector']:14.0f}")
+    print("\nMemoria = ce stă în RAM pentru căutare; vectorii float32 rămân pe disc pentru re-scorare.")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(ids), "k": args.k, "rows": rows}, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark doar pentru regăsire (fără generare și fără judecător LLM).
+
+Rulează cazurile din benchmark_data.json direct prin retrieve_chunks, în paralel,
+și raportează recall@k, MRR, rata de regăsire pe sursă și percentilele p50/p95/p99
+ale latenței pe etape. Rezultatele sunt scrise în JSON, ca două configurații de
+index să poată fi comparate fără Ollama:
+
+    python -m eval.retrieval_benchmark --output rezultate_hibrid.json
+    python -m eval.retrieval_benchmark --no-hybrid --output rezultate_dens.json --baseline rezultate_hibrid.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src import rag_service
+from src.lexical_index import base_article, unregister_index
+from src.vector_db_manager import retrieve_chunks
+
+# Configuratii
+BENCHMARK_FILE = os.path.join(ROOT_DIR, "eval", "benchmark_data.json")
+K_VALUES = [1, 3, 5, 10]
+MAX_WORKERS = 8
+STAGES = ["rescriere", "embedding", "cautare_vectoriala", "cautare_lexicala", "cautare_articol", "total"]
+
+
+def is_relevant(chunk: dict, case: dict) -> bool:
+    """Un segment este relevant dacă are sursa și numărul de articol așteptate."""
+    meta = chunk["metadata"]
+    return (meta["sursa"].lower() == case["expected_source"].lower()
+            and base_article(meta["articol"]) == case["expected_article_id"])
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentila cu interpolare liniară (ca numpy.percentile implicit)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_case(collection, case: dict, k: int, rewrite: bool) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    query = case["question"]
+    if rewrite:
+        rewrite_start = time.perf_counter()
+        query = rag_service.optimize_query_with_llm(query)
+        timings["rescriere"] = time.perf_counter() - rewrite_start
+    chunks = retrieve_chunks(collection, query, k=k, timings=timings)
+    timings["total"] = time.perf_counter() - start
+
+    rank = next((i for i, chunk in enumerate(chunks, start=1) if is_relevant(chunk, case)), None)
+    return {
+        "id": case["id"],
+        "question": case["question"],
+        "query": query,
+        "expected": f"{case['expected_source']} Art. {case['expected_article_id']}",
+        "expected_source": case["expected_source"],
+        "rank": rank,
+        "retrieved": [chunk["articol"] for chunk in chunks],
+        "timings": timings,
+    }
+
+
+def summarize(cases: list[dict], k_values: list[int]) -> dict:
+    n = len(cases)
+    metrics = {
+        f"recall@{k}": sum(1 for c in cases if c["rank"] is not None and c["rank"] <= k) / n
+        for k in k_values
+    }
+    max_k = max(k_values)
+    metrics[f"mrr@{max_k}"] = sum(1.0 / c["rank"] for c in cases if c["rank"] is not None and c["rank"] <= max_k) / n
+
+    by_source = {}
+    for case in cases:
+        stats = by_source.setdefault(case["expected_source"], {"cases": 0, "hits": 0})
+        stats["cases"] += 1
+        stats["hits"] += 1 if case["rank"] is not None else 0
+    for stats in by_source.values():
+        stats["hit_rate"] = stats["hits"] / stats["cases"]
+    metrics["hit_rate_by_source"] = by_source
+
+    latency = {}
+    for stage in STAGES:
+        values = [c["timings"][stage] for c in cases if stage in c["timings"]]
+        if values:
+            latency[stage] = {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "mean": sum(values) / len(values),
+            }
+    return {"metrics": metrics, "latency": latency}
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    print("\n" + "=" * 60)
+    print(f" BENCHMARK REGĂSIRE - {report['config']['label']}")
+    print("=" * 60)
+    for name, value in report["metrics"].items():
+        if name == "hit_rate_by_source":
+            continue
+        line = f"{name:<12} {value:.3f}"
+        if baseline and name in baseline["metrics"]:
+            line += f"   (Δ {value - baseline['metrics'][name]:+.3f} față de {baseline['config']['label']})"
+        print(line)
+    print("\nRata de regăsire pe sursă:")
+    for source, stats in report["metrics"]["hit_rate_by_source"].items():
+        print(f"  {source:<15} {stats['hits']}/{stats['cases']} ({stats['hit_rate'] * 100:.1f}%)")
+    print("\nLatență pe etape (ms):        p50      p95      p99")
+    for stage, stats in report["latency"].items():
+        print(f"  {stage:<22} {stats['p50'] * 1000:8.1f} {stats['p95'] * 1000:8.1f} {stats['p99'] * 1000:8.1f}")
+    print(f"\nDurată totală: {report['wall_time']:.2f}s pentru {report['config']['cases']} interogări "
+          f"({report['config']['workers']} în paralel)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de regăsire (fără LLM).")
+    parser.add_argument("--k", type=int, nargs="+", default=K_VALUES, help="Valorile k pentru recall@k.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--repeat", type=int, default=1, help="De câte ori se rulează fiecare caz (pentru latență).")
+    parser.add_argument("--rewrite", action="store_true", help="Reformulează întrebările cu Ollama înainte de căutare.")
+    parser.add_argument("--no-hybrid", action="store_true", help="Doar căutare vectorială (fără BM25 / articole).")
+    parser.add_argument("--fake-backends", action="store_true",
+                        help="Embedding-uri simulate (verifică doar infrastructura, nu calitatea).")
+    parser.add_argument("--label", default=None, help="Numele configurației din raport.")
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    parser.add_argument("--baseline", default=None, help="Rezultate JSON anterioare, pentru comparație.")
+    args = parser.parse_args()
+
+    with open(BENCHMARK_FILE, "r", encoding="utf-8") as f:
+        test_cases = json.load(f)
+
+    os.chdir(ROOT_DIR)
+    if args.fake_backends:
+        from src.server import use_fake_backends
+        use_fake_backends()
+    # Doar cautare: fara preincarcarea modelului Ollama (nu este folosit, iar firul ei ar concura cu masuratorile)
+    collection = rag_service.initialize_rag_system(reindex=False, prewarm=False)
+    if args.no_hybrid:
+        unregister_index(collection.name)
+
+    label = args.label or ("dens" if args.no_hybrid else "hibrid")
+    max_k = max(args.k)
+    cases = test_cases * args.repeat
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda case: run_case(collection, case, max_k, args.rewrite), cases))
+    wall_time = time.perf_counter() - start
+
+    report = {
+        "config": {
+            "label": label,
+            "hybrid": not args.no_hybrid,
+            "rewrite": args.rewrite,
+            "k": args.k,
+            "workers": args.workers,
+            "cases": len(cases),
+            "documents": collection.count(),
+        },
+        "wall_time": wall_time,
+        **summarize(results, args.k),
+        "cases": results[:len(test_cases)],
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Colecție unică față de colecția segmentată pe surse (src.sharding), cu și fără
+rutarea întrebărilor (src.query_router):
+
+  - ingestia: timpul de construire al indexului, o colecție unică într-un
+    singur proces față de shard-uri cu vectorizarea în --processes procese;
+  - căutarea: latența retrieve_chunks (p50/p95) pentru colecția unică, pentru
+    shard-uri interogate toate și pentru shard-uri cu rutare - și pe întrebările
+    care numesc sursa ("... conform OUG 195/2002"), pe care ruterul le trimite
+    mereu într-un singur shard;
+  - rutarea: cât de des este sigur ruterul și cât de des alege sursa așteptată;
+  - recall@k pentru fiecare variantă (articolul așteptat printre rezultate).
+
+Vectorii sunt calculați cu furnizorul `hashing` (fără rețea), în directoare
+temporare; --scale N multiplică segmentele (copii ale corpusului, în aceleași
+surse), ca să se vadă cum cresc costurile odată cu corpusul.
+
+    python -m eval.sharding_benchmark
+    RAG_VECTOR_BACKEND=numpy python -m eval.sharding_benchmark --scale 10 --processes 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from eval.retrieval_benchmark import BENCHMARK_FILE, is_relevant, percentile
+from src import vector_db_manager
+from src.data_processor import load_and_chunk_data
+from src.embedding_providers import HashingEmbeddingProvider, set_embedding_provider
+from src.query_router import route_query
+
+# Configuratii
+TOP_K = 10
+REPEAT = 5
+
+
+def scaled_corpus(scale: int):
+    """Segmentele corpusului; cu `scale` > 1, copii marcate (texte și ID-uri distincte, aceleași surse)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks, metas, ids = load_and_chunk_data()
+    if scale > 1:
+        chunks = [text if copy == 0 else f"{text} [copia {copy}]" for copy in range(scale) for text in chunks]
+        metas = metas * scale
+        ids = [doc_id if copy == 0 else f"{doc_id}@{copy}" for copy in range(scale) for doc_id in ids]
+    return chunks, metas, ids
+
+
+def build(chunks, metas, ids, sharding: bool, processes: int) -> tuple:
+    """Construiește indexul cu un furnizor proaspăt (fără cache); returnează (colecția, durata)."""
+    set_embedding_provider(HashingEmbeddingProvider(model=f"benchmark-{uuid.uuid4().hex[:8]}"))
+    vector_db_manager.SHARDING = sharding
+    vector_db_manager.INGEST_PROCESSES = processes
+    if processes > 1:
+        vector_db_manager.PROCESS_POOL_MIN_TEXTS = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        collection = vector_db_manager.create_or_update_db(chunks, metas, ids)
+    return collection, time.perf_counter() - start
+
+
+def measure_queries(collection, cases: list[dict], k: int, routing: bool, repeat: int) -> dict:
+    vector_db_manager.QUERY_ROUTING = routing
+    latencies, hits = [], 0
+    for attempt in range(repeat):
+        for case in cases:
+            start = time.perf_counter()
+            chunks = vector_db_manager.retrieve_chunks(collection, case["question"], k=k)
+            latencies.append(time.perf_counter() - start)
+            if attempt == 0:
+                hits += any(is_relevant(chunk, case) for chunk in chunks)
+    return {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95), f"recall@{k}": hits / len(cases)}
+
+
+def with_named_source(cases: list[dict]) -> list[dict]:
+    """Aceleași întrebări, cu sursa așteptată numită explicit."""
+    return [{**case, "question": f"{case['question']} (conform {case['expected_source']})"} for case in cases]
+
+
+def routing_stats(cases: list[dict]) -> dict:
+    lexical_index = vector_db_manager.get_lexical_index(vector_db_manager.COLLECTION_NAME)
+    routed, correct = 0, 0
+    for case in cases:
+        sources, _ = route_query(case["question"], lexical_index)
+        if sources:
+            routed += 1
+            correct += case["expected_source"] in sources
+    return {"rutate": routed, "corecte": correct, "intrebari": len(cases)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Colecție unică vs. shard-uri pe surse (ingestie, latență, rutare).")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--scale", type=int, default=1, help="Multiplică segmentele corpusului.")
+    parser.add_argument("--processes", type=int, default=vector_db_manager.INGEST_PROCESSES,
+                        help="Procese de vectorizare pentru varianta cu shard-uri.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Repetări ale întrebărilor (latență).")
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    args = parser.parse_args()
+
+    with open(BENCHMARK_FILE, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    os.chdir(ROOT_DIR)
+    chunks, metas, ids = scaled_corpus(args.scale)
+    directory = tempfile.mkdtemp(prefix="rag_shards_")
+    vector_db_manager.CHROMA_PATH = os.path.join(directory, "chroma")
+    vector_db_manager.NUMPY_DB_PATH = os.path.join(directory, "numpy")
+    cache_dirs = []
+    try:
+        single, single_build = build(chunks, metas, ids, sharding=False, processes=1)
+        cache_dirs.append(vector_db_manager.get_embedding_provider().cache_dir)
+        queries = {"unica": measure_queries(single, cases, args.k, routing=False, repeat=args.repeat)}
+
+        sharded, sharded_build = build(chunks, metas, ids, sharding=True, processes=args.processes)
+        cache_dirs.append(vector_db_manager.get_embedding_provider().cache_dir)
+        queries["shard-uri, toate"] = measure_queries(sharded, cases, args.k, routing=False, repeat=args.repeat)
+        queries["shard-uri, rutare"] = measure_queries(sharded, cases, args.k, routing=True, repeat=args.repeat)
+
+        named = with_named_source(cases)
+        queries["unica, sursa numită"] = measure_queries(single, named, args.k, routing=False, repeat=args.repeat)
+        queries["shard-uri, sursa numită"] = measure_queries(sharded, named, args.k, routing=True,
+                                                             repeat=args.repeat)
+        routing = routing_stats(cases)
+        shard_counts = sharded.counts()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        for cache_dir in cache_dirs:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    backend = vector_db_manager.VECTOR_BACKEND
+    print("\n" + "=" * 68)
+    print(f" SHARD-URI PE SURSE - backend {backend}, {len(ids)} segmente (scale {args.scale}), k={args.k}")
+    print("=" * 68)
+    print("Shard-uri: " + ", ".join(f"{source} ({count})" for source, count in shard_counts.items()))
+    print(f"Ingestie: colecție unică {single_build:.2f}s (1 proces), "
+          f"shard-uri {sharded_build:.2f}s ({args.processes} procese)")
+    print(f"Rutare: {routing['rutate']}/{routing['intrebari']} întrebări rutate, "
+          f"{routing['corecte']} către sursa așteptată")
+    print(f"\n{'Căutare':<26} {'p50 (ms)':>9} {'p95 (ms)':>9} {f'recall@{args.k}':>10}")
+    for label, stats in queries.items():
+        print(f"  {label:<24} {stats['p50'] * 1000:9.2f} {stats['p95'] * 1000:9.2f} {stats[f'recall@{args.k}']:10.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"backend": backend, "segmente": len(ids), "scale": args.scale, "k": args.k,
+                       "shard_uri": shard_counts, "ingestie": {"unica": single_build, "shard_uri": sharded_build,
+                                                               "procese": args.processes},
+                       "rutare": routing, "cautare": queries}, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
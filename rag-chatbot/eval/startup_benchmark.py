@@ -0,0 +1,123 @@
+"""
+Timpul de pornire al agentului, măsurat în procese noi (pornire la rece):
+
+  - importul lui src.rag_service și ce backend-uri grele încarcă
+    (google.genai, chromadb, ollama);
+  - timpul până la "gata": import + initialize_rag_system(reindex=False)
+    cu indexul deja construit;
+  - același timp când manifestul indexului lipsește și corpusul trebuie
+    re-segmentat și comparat cu colecția (--no-manifest).
+
+Embedding-urile sunt simulate (src.fakes), ca măsurătoarea să nu depindă de rețea.
+
+    python -m eval.startup_benchmark
+    RAG_VECTOR_BACKEND=numpy python -m eval.startup_benchmark --repeat 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# Configuratii
+REPEAT = 5
+HEAVY_MODULES = ["google.genai", "chromadb", "ollama"]
+
+
+def run_child(mode: str):
+    """Rulează în procesul copil și scrie măsurătorile (JSON) la stdout."""
+    start = time.perf_counter()
+    from src import rag_service
+    import_time = time.perf_counter() - start
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    report = {"import": import_time, "modules_after_import": loaded}
+    if mode == "ready":
+        # Backend-uri simulate, cu index si cache-uri separate: un index lipsa nu este
+        # construit cu vectori falsi peste cel real
+        from src.server import use_fake_backends
+        use_fake_backends(embedding_latency=0.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            collection = rag_service.initialize_rag_system(reindex=False)
+        report["ready"] = time.perf_counter() - start
+        report["documents"] = collection.count()
+        report["modules_after_ready"] = [name for name in HEAVY_MODULES if name in sys.modules]
+    json.dump(report, sys.stdout)
+
+
+def measure(mode: str, repeat: int, env: dict) -> list[dict]:
+    reports = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-m", "eval.startup_benchmark", "--child", mode],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    return reports
+
+
+def median(reports: list[dict], key: str) -> float:
+    return statistics.median(report[key] for report in reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timpul de import și de pornire al agentului.")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Măsoară și pornirea fără manifestul indexului (segmentare + comparație).")
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    parser.add_argument("--child", choices=["import", "ready"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    os.chdir(ROOT_DIR)
+    env = dict(os.environ, RAG_REINDEX="nu", RAG_PREWARM="0", PYTHONDONTWRITEBYTECODE="1")
+    # Prima pornire construieste (sau sincronizeaza) indexul si manifestul
+    measure("ready", 1, env)
+
+    results = {
+        "import": measure("import", args.repeat, env),
+        "ready": measure("ready", args.repeat, env),
+    }
+    if args.no_manifest:
+        # Manifestul indexului construit de copii (directoarele backend-urilor simulate)
+        from src.server import use_fake_backends
+        from src.vector_db_manager import manifest_path
+        use_fake_backends(embedding_latency=0.0)
+        reports = []
+        for _ in range(args.repeat):
+            if os.path.exists(manifest_path()):
+                os.remove(manifest_path())
+            reports.extend(measure("ready", 1, env))
+        results["ready_no_manifest"] = reports
+
+    print("\n" + "=" * 60)
+    print(f" PORNIRE LA RECE - backend {os.getenv('RAG_VECTOR_BACKEND', 'chroma')}, {args.repeat} repetări (mediana)")
+    print("=" * 60)
+    print(f"Import src.rag_service: {median(results['import'], 'import') * 1000:8.1f} ms "
+          f"(încărcate: {', '.join(results['import'][0]['modules_after_import']) or 'niciunul'})")
+    print(f"Gata (index la zi):     {median(results['ready'], 'ready') * 1000:8.1f} ms "
+          f"({results['ready'][0]['documents']} segmente; încărcate: "
+          f"{', '.join(results['ready'][0]['modules_after_ready']) or 'niciunul'})")
+    if "ready_no_manifest" in results:
+        print(f"Gata (fără manifest):   {median(results['ready_no_manifest'], 'ready') * 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Benchmark pentru backend-ul vectorial: ChromaDB (HNSW, persistent) față de
+src.numpy_store (căutare exactă, vectori memory-mapped).
+
+Ambele colecții sunt construite cu aceiași vectori într-un director temporar;
+fiecare backend este apoi măsurat într-un proces nou, ca pornirea la rece să
+includă importurile și încărcarea de pe disc:
+
+  - pornire la rece: import + deschiderea colecției + prima interogare;
+  - latența interogărilor (p50/p95), una câte una și în loturi;
+  - memoria maximă a procesului (RSS);
+  - cât din top-k-ul exact regăsește ChromaDB (recall@k).
+
+    python -m eval.vector_store_benchmark
+    python -m eval.vector_store_benchmark --scale 10 --queries 500
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# Configuratii
+QUERIES = 200
+TOP_K = 10
+QUERY_BATCH = 32
+COLLECTION = "benchmark"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100.0)))] if ordered else 0.0
+
+
+def peak_rss_mb() -> float:
+    """Memoria maximă a procesului curent (VmHWM; ru_maxrss ar moșteni valoarea părintelui după exec)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss este in KB pe Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def corpus_vectors(scale: int, seed: int = 0):
+    """Segmentele corpusului și vectorii lor (din cache-ul de embedding-uri sau simulați)."""
+    from src.data_processor import load_and_chunk_data
+    from src.embedding_cache import get_embedding_cache, make_cache_key
+    from src.embedding_providers import get_embedding_provider
+    from src.fakes import fake_embedding
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks, metas, ids = load_and_chunk_data()
+    provider = get_embedding_provider()
+    keys = [make_cache_key(provider.identity, "RETRIEVAL_DOCUMENT", text) for text in chunks]
+    cached = get_embedding_cache(provider.cache_dir).get_many(keys)
+    if len(cached) == len(set(keys)):
+        vectors, origin = np.asarray([cached[key] for key in keys], dtype=np.float32), "din cache"
+    else:
+        vectors, origin = np.asarray([fake_embedding(text) for text in chunks], dtype=np.float32), "simulați"
+
+    if scale > 1:
+        # Copii perturbate ale corpusului, pentru a vedea cum cresc costurile
+        rng = np.random.default_rng(seed)
+        copies = [vectors] + [vectors + rng.normal(0, 0.02, vectors.shape).astype(np.float32) for _ in range(scale - 1)]
+        vectors = np.vstack(copies)
+        chunks = chunks * scale
+        metas = metas * scale
+        ids = [f"{doc_id}@{copy}" for copy in range(scale) for doc_id in ids]
+    return chunks, metas, ids, vectors, origin
+
+
+def build_stores(directory: str, chunks, metas, ids, vectors):
+    import chromadb
+    from src.numpy_store import NumpyClient, flush_collection
+
+    clients = {
+        "chroma": chromadb.PersistentClient(path=os.path.join(directory, "chroma")),
+        "numpy": NumpyClient(path=os.path.join(directory, "numpy")),
+    }
+    for name, client in clients.items():
+        start = time.perf_counter()
+        collection = client.get_or_create_collection(name=COLLECTION)
+        for i in range(0, len(ids), 1000):
+            collection.upsert(ids=ids[i:i + 1000], embeddings=vectors[i:i + 1000].tolist(),
+                              documents=chunks[i:i + 1000], metadatas=metas[i:i + 1000])
+        flush_collection(collection)
+        print(f"  > {name}: {collection.count()} vectori indexați în {time.perf_counter() - start:.2f}s")
+
+
+def run_child(backend: str, directory: str, queries_path: str, k: int, batch: int):
+    """Rulează în procesul copil: măsoară un singur backend și scrie JSON la stdout."""
+    start = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=os.path.join(directory, "chroma"))
+    else:
+        from src.numpy_store import NumpyClient
+        client = NumpyClient(path=os.path.join(directory, "numpy"))
+    collection = client.get_or_create_collection(name=COLLECTION)
+    queries = np.load(queries_path)
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+    cold_start = time.perf_counter() - start
+
+    single, results = [], []
+    for query in queries:
+        query_start = time.perf_counter()
+        response = collection.query(query_embeddings=[query.tolist()], n_results=k)
+        single.append(time.perf_counter() - query_start)
+        results.append(response["ids"][0])
+
+    batched = []
+    for i in range(0, len(queries), batch):
+        query_start = time.perf_counter()
+        collection.query(query_embeddings=queries[i:i + batch].tolist(), n_results=k)
+        batched.append((time.perf_counter() - query_start) / len(queries[i:i + batch]))
+
+    filtered = []
+    for query in queries[:50]:
+        query_start = time.perf_counter()
+        collection.query(query_embeddings=[query.tolist()], n_results=k, where={"sursa": "HG 1391/2006"})
+        filtered.append(time.perf_counter() - query_start)
+
+    json.dump({
+        "cold_start": cold_start,
+        "single_p50": percentile(single, 50), "single_p95": percentile(single, 95),
+        "batched_per_query": sum(batched) / len(batched),
+        "filtered_p50": percentile(filtered, 50),
+        "max_rss_mb": peak_rss_mb(),
+        "results": results,
+    }, sys.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChromaDB vs. stocarea NumPy (căutare exactă).")
+    parser.add_argument("--scale", type=int, default=1, help="De câte ori este multiplicat corpusul.")
+    parser.add_argument("--queries", type=int, default=QUERIES)
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--batch", type=int, default=QUERY_BATCH)
+    parser.add_argument("--output", default=None, help="Fișierul JSON cu rezultatele.")
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "DIR", "QUERIES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, k=args.k, batch=args.batch)
+        return
+
+    os.chdir(ROOT_DIR)
+    chunks, metas, ids, vectors, origin = corpus_vectors(args.scale)
+    print(f"[Benchmark] {len(ids)} segmente, vectori {origin} (dim {vectors.shape[1]})")
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = vectors[picks] + rng.normal(0, 0.05, (args.queries, vectors.shape[1])).astype(np.float32)
+
+    with tempfile.TemporaryDirectory(prefix="vector_bench_") as directory:
+        build_stores(directory, chunks, metas, ids, vectors)
+        queries_path = os.path.join(directory, "queries.npy")
+        np.save(queries_path, queries)
+
+        reports = {}
+        for backend in ("chroma", "numpy"):
+            output = subprocess.run(
+                [sys.executable, "-m", "eval.vector_store_benchmark", "--k", str(args.k), "--batch", str(args.batch),
+                 "--child", backend, directory, queries_path],
+                cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+            ).stdout
+            reports[backend] = json.loads(output.strip().splitlines()[-1])
+
+    exact = reports["numpy"].pop("results")
+    approximate = reports["chroma"].pop("results")
+    recall = sum(len(set(a) & set(e)) for a, e in zip(approximate, exact)) / (args.k * len(exact))
+
+    print("\n" + "=" * 72)
+    print(f" BACKEND VECTORIAL - {len(ids)} segmente, {args.queries} interogări, k={args.k}")
+    print("=" * 72)
+    print(f"{'backend':<8} {'pornire (ms)':>13} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+          f"{'lot/întreb. (ms)':>17} {'filtru p50':>11} {'RSS max (MB)':>13}")
+    for backend, stats in reports.items():
+        print(f"{backend:<8} {stats['cold_start'] * 1000:13.1f} {stats['single_p50'] * 1000:9.3f} "
+              f"{stats['single_p95'] * 1000:9.3f} {stats['batched_per_query'] * 1000:17.3f} "
+              f"{stats['filtered_p50'] * 1000:11.3f} {stats['max_rss_mb']:13.1f}")
+    print(f"\nRecall@{args.k} ChromaDB (HNSW) față de căutarea exactă: {recall:.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"documents": len(ids), "queries": args.queries, "k": args.k,
+                       "chroma_recall": recall, **reports}, f, ensure_ascii=False, indent=2)
+        print(f"\nRezultate salvate în '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.embedding_cache import normalize_query
+
+# --- Configuratii Cache Raspunsuri ---
+ANSWER_CACHE_DIR = "answer_cache"
+ENTRIES_FILE = "entries.json"
+VECTORS_FILE = "vectors.npy"
+ANSWER_CACHE_MAX_ENTRIES = 500
+# Similaritatea cosinus minima pentru a refolosi raspunsul unei intrebari "vecine"
+SEMANTIC_SIMILARITY_THRESHOLD = 0.95
+# Raspunsurile noi sunt scrise pe disc impreuna, la cel mult o rescriere pe interval
+# (si la iesirea din proces), nu cate o rescriere completa per raspuns
+SAVE_DELAY_SECONDS = 5.0
+
+
+class AnswerCache:
+    """
+    Cache pe două niveluri în fața lui process_query:
+      1. exact    - pe textul normalizat al întrebării;
+      2. semantic - refolosește răspunsul unei întrebări al cărei vector are
+                    similaritatea cosinus >= prag față de întrebarea nouă.
+
+    Intrările sunt evacuate LRU, persistate pe disc (amânat, cu `save_delay`;
+    flush() scrie imediat) și invalidate automat când amprenta indexului
+    (ID-urile segmentelor) se schimbă.
+    """
+
+    def __init__(self, cache_dir: str = ANSWER_CACHE_DIR, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 threshold: float = SEMANTIC_SIMILARITY_THRESHOLD, save_delay: float = SAVE_DELAY_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.save_delay = save_delay
+        self.index_fingerprint = None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.lookups = 0
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer = None
+        self._load()
+        atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- Persistenta ---
+
+    def _load(self):
+        entries_path = os.path.join(self.cache_dir, ENTRIES_FILE)
+        vectors_path = os.path.join(self.cache_dir, VECTORS_FILE)
+        if not os.path.exists(entries_path):
+            return
+        try:
+            with open(entries_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            vectors = np.load(vectors_path) if os.path.exists(vectors_path) else None
+        except (OSError, ValueError) as e:
+            print(f"[Cache Răspunsuri] Nu am putut încărca cache-ul, pornesc gol: {e}")
+            return
+
+        self.index_fingerprint = data.get("index_fingerprint")
+        dropped = 0
+        for entry in data.get("entries", []):
+            row = entry.pop("row", None)
+            entry["embedding"] = None
+            if row is not None:
+                # Un fisier de vectori trunchiat: intrarea ramane doar pentru cautarea exacta
+                if vectors is not None and vectors.ndim == 2 and 0 <= row < len(vectors):
+                    entry["embedding"] = vectors[row]
+                else:
+                    dropped += 1
+            self._entries[normalize_query(entry["question"])] = entry
+        if dropped:
+            print(f"[Cache Răspunsuri] {dropped} intrări fără vector valid pe disc (doar cache exact).")
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def flush(self):
+        """Scrie pe disc răspunsurile încă nesalvate (dacă există)."""
+        if self._dirty:
+            self.save()
+
+    def _schedule_save(self):
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                return
+            if self.save_delay <= 0:
+                timer = None
+            else:
+                timer = self._save_timer = threading.Timer(self.save_delay, self._save_later)
+                timer.daemon = True
+        if timer is None:
+            self.save()
+        else:
+            timer.start()
+
+    def _save_later(self):
+        with self._lock:
+            self._save_timer = None
+        self.flush()
+
+    def save(self):
+        with self._lock:
+            self._dirty = False
+            entries, rows = [], []
+            for entry in self._entries.values():
+                record = {k: v for k, v in entry.items() if k != "embedding"}
+                if entry.get("embedding") is not None:
+                    record["row"] = len(rows)
+                    rows.append(entry["embedding"])
+                entries.append(record)
+            payload = {"index_fingerprint": self.index_fingerprint, "entries": entries}
+
+        entries_path = os.path.join(self.cache_dir, ENTRIES_FILE)
+        vectors_path = os.path.join(self.cache_dir, VECTORS_FILE)
+        matrix = np.asarray(rows, dtype=np.float32) if rows else np.zeros((0, 0), dtype=np.float32)
+        with self._save_lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Scriere atomica: vectorii intai, apoi indexul care ii refera
+            with open(vectors_path + ".tmp", "wb") as f:
+                np.save(f, matrix)
+            os.replace(vectors_path + ".tmp", vectors_path)
+            with open(entries_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(entries_path + ".tmp", entries_path)
+
+    # --- Invalidare ---
+
+    def ensure_fingerprint(self, fingerprint: str):
+        """Golește cache-ul dacă indexul a fost reconstruit cu alt conținut."""
+        with self._lock:
+            if self.index_fingerprint == fingerprint:
+                return
+            if self._entries:
+                print("[Cache Răspunsuri] Indexul s-a schimbat - invalidez răspunsurile salvate.")
+            self._entries.clear()
+            self._matrix = None
+            self.index_fingerprint = fingerprint
+        self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    # --- Cautare ---
+
+    def lookup_exact(self, question: str) -> str | None:
+        """Prima etapă a oricărei căutări: fiecare apel este numărat ca o întrebare."""
+        with self._lock:
+            self.lookups += 1
+            entry = self._entries.get(normalize_query(question))
+            if entry is None:
+                return None
+            self._entries.move_to_end(normalize_query(question))
+            entry["last_used"] = time.time()
+            self.exact_hits += 1
+            return entry["answer"]
+
+    def lookup_semantic(self, embedding) -> tuple[str, float] | None:
+        """
+        Cel mai apropiat răspuns salvat, dacă similaritatea depășește pragul
+        (a doua etapă, după un lookup_exact fără rezultat).
+        """
+        with self._lock:
+            if self._matrix is None:
+                self._rebuild_matrix()
+            if not self._matrix_keys:
+                return None
+            query = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return None
+            similarities = self._matrix @ (query / norm)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+            key = self._matrix_keys[best]
+            self._entries.move_to_end(key)
+            self._entries[key]["last_used"] = time.time()
+            self.semantic_hits += 1
+            return self._entries[key]["answer"], similarity
+
+    def _rebuild_matrix(self):
+        keys, rows = [], []
+        for key, entry in self._entries.items():
+            if entry.get("embedding") is not None:
+                keys.append(key)
+                rows.append(entry["embedding"])
+        if rows:
+            matrix = np.asarray(rows, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix = matrix / norms
+        else:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._matrix_keys = keys
+
+    def put(self, question: str, answer: str, embedding=None):
+        key = normalize_query(question)
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                "question": question,
+                "answer": answer,
+                "embedding": np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+                "created": now,
+                "last_used": now,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+        self._schedule_save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            # Ratarile sunt intrebarile fara raspuns din niciuna dintre etape (inclusiv cele
+            # pentru care etapa semantica nu a rulat: referinte la articole, embedding esuat)
+            hits = self.exact_hits + self.semantic_hits
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "lookups": self.lookups,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.lookups - hits,
+                "hit_rate": hits / self.lookups if self.lookups else 0.0,
+            }
+
+
+_cache = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Instanța de cache partajată de proces."""
+    global _cache
+    if _cache is None:
+        _cache = AnswerCache()
+    return _cache
+
+
+def set_answer_cache(cache: AnswerCache | None):
+    """Înlocuiește instanța partajată (ex: un cache în alt director); None revine la cea implicită."""
+    global _cache
+    _cache = cache
+
+
+def clear_answer_cache():
+    """Șterge răspunsurile salvate (apelată la re-indexarea completă)."""
+    global _cache
+    cache_dir = ANSWER_CACHE_DIR
+    if _cache is not None:
+        _cache.clear()
+        cache_dir = _cache.cache_dir
+    for name in (ENTRIES_FILE, VECTORS_FILE):
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
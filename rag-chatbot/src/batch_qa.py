@@ -0,0 +1,256 @@
+"""
+Răspunsuri în bloc pentru un fișier de întrebări (reîmprospătarea FAQ-ului,
+rulări de regresie):
+
+    python -m src.batch_qa intrebari.jsonl --output raspunsuri.jsonl
+    python -m src.batch_qa eval/benchmark_data.json --output raspunsuri.jsonl --workers 8
+
+Intrarea: JSONL (un obiect {"id", "question"} sau un șir pe linie) ori un JSON
+cu o listă de astfel de elemente. Întrebările sunt luate în loturi: vectorii lor
+sunt calculați în bloc, colecția este interogată cu mai mulți vectori per apel,
+iar generarea rulează într-un pool limitat de fire. Fiecare răspuns este scris
+în JSONL imediat ce este gata (cu duratele etapelor); la relansare, fișierul de
+ieșire păstrează doar răspunsurile reușite, iar întrebările lor sunt sărite.
+
+Spre deosebire de process_query, întrebările nu sunt reformulate cu LLM-ul
+(căutarea folosește întrebarea brută) și cache-ul de răspunsuri nu este folosit.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src import rag_service, telemetry
+from src.vector_db_manager import retrieve_chunks_batch
+
+# --- Configuratii Mod Bulk ---
+# Cate intrebari sunt cautate impreuna (un lot de embedding-uri si de interogari)
+RETRIEVAL_BATCH = 64
+# Fire de generare simultane (limitate si de rag_service.set_llm_concurrency)
+GENERATION_WORKERS = 4
+TOP_K = 10
+
+
+def load_questions(path: str) -> list[dict]:
+    """
+    Întrebările din JSON/JSONL, ca {"id", "question"}; ID-ul lipsă devine numărul de ordine.
+    Formatul se deduce din conținut, nu din extensie: o listă JSON începe cu "[".
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        items = json.loads(text)
+    else:
+        items = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path}, linia {number}: nu este JSON valid ({e}).") from None
+
+    questions = []
+    for position, item in enumerate(items, start=1):
+        if isinstance(item, str):
+            item = {"question": item}
+        question = (item.get("question") or "").strip()
+        if not question:
+            print(f"[WARN] Elementul {position} nu are întrebare - sărit.")
+            continue
+        questions.append({**item, "id": str(item.get("id", position)), "question": question})
+    return questions
+
+
+def compact_results(output_path: str) -> set[str]:
+    """
+    Păstrează în fișierul de ieșire doar răspunsurile reușite dintr-o rulare anterioară
+    (câte unul per ID; erorile și liniile incomplete sunt eliminate, ca la relansare
+    un ID să nu apară și cu eroare, și cu răspuns) și returnează ID-urile lor.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    kept = {}
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("status") == "ok":
+                kept[str(record.get("id"))] = line.rstrip("\n")
+    # Scriere atomica: o intrerupere nu pierde raspunsurile deja obtinute
+    with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+        for line in kept.values():
+            f.write(line + "\n")
+    os.replace(output_path + ".tmp", output_path)
+    return set(kept)
+
+
+class JsonlWriter:
+    """Scrie câte o linie per rezultat, din mai multe fire, cu flush după fiecare."""
+
+    def __init__(self, path: str, append: bool):
+        # O linie neterminata (rulare intrerupta) ar lipi urmatorul rezultat de ea
+        if append and os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+            if needs_newline:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def answer_item(item: dict, chunks: list[dict], batch_timings: dict, retrieved_at: float) -> dict:
+    """Generează răspunsul unei întrebări deja căutate; erorile devin status "eroare"."""
+    started = time.perf_counter()
+    # Etapele lotului sunt comune tuturor intrebarilor din el (durate pentru tot lotul)
+    timings = {f"lot_{stage}": batch_timings[stage]
+               for stage in ("embedding", "cautare_vectoriala", "cautare_lexicala") if stage in batch_timings}
+    timings.update({"lot_cautare": batch_timings["total"], "lot_intrebari": batch_timings["intrebari"],
+                    "asteptare": started - retrieved_at})
+    record = {"id": item["id"], "question": item["question"]}
+    stats = {}
+    try:
+        if chunks:
+            with telemetry.trace("batch_qa", id=item["id"]):
+                answer = rag_service.generate_response_with_llm(chunks, item["question"], stats)
+        else:
+            answer = "Nu am găsit articole relevante."
+        if "eroare" in stats:
+            raise RuntimeError(answer)
+        record.update({"status": "ok", "answer": answer})
+    except Exception as e:
+        record.update({"status": "eroare", "eroare": str(e)})
+
+    if "durata" in stats:
+        timings.update({"generare": stats["durata"], "primul_token": stats["ttft"],
+                        "tokeni_pe_secunda": stats["tokens_per_second"]})
+    timings["total"] = time.perf_counter() - batch_timings["start"]
+    record["surse"] = [chunk["articol"] for chunk in chunks]
+    record["timings"] = timings
+    return record
+
+
+def run_batch(collection, questions: list[dict], output_path: str, k: int = TOP_K,
+              retrieval_batch: int = RETRIEVAL_BATCH, workers: int = GENERATION_WORKERS,
+              resume: bool = True) -> dict:
+    """
+    Răspunde la toate întrebările și scrie rezultatele în `output_path` (JSONL).
+    Căutarea lotului următor se suprapune cu generarea celui curent; numărul
+    de răspunsuri în așteptare este limitat, ca memoria să nu crească nelimitat.
+    """
+    done = compact_results(output_path) if resume else set()
+    pending = [item for item in questions if item["id"] not in done]
+    print(f"[Bulk] {len(questions)} întrebări, {len(questions) - len(pending)} deja rezolvate, {len(pending)} de rezolvat.")
+
+    writer = JsonlWriter(output_path, append=resume)
+    counts = {"ok": 0, "eroare": 0}
+    totals = []
+    counts_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max(1, workers) * 2)
+    futures = []
+    start = time.perf_counter()
+
+    def finish(item, chunks, batch_timings, retrieved_at):
+        try:
+            record = answer_item(item, chunks, batch_timings, retrieved_at)
+            writer.write(record)
+            with counts_lock:
+                counts[record["status"]] += 1
+                totals.append(record["timings"]["total"])
+        finally:
+            in_flight.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-gen") as pool:
+            for offset in range(0, len(pending), retrieval_batch):
+                batch = pending[offset:offset + retrieval_batch]
+                batch_timings = {"start": time.perf_counter(), "intrebari": len(batch)}
+                try:
+                    with telemetry.span("lot_cautare", intrebari=len(batch)):
+                        retrieved = retrieve_chunks_batch(collection, [item["question"] for item in batch], k=k,
+                                                          timings=batch_timings)
+                except Exception as e:
+                    # Lotul ramane nerezolvat (status "eroare") si va fi reluat la urmatoarea rulare
+                    print(f"[WARN] Căutarea lotului {offset // retrieval_batch + 1} a eșuat: {e}")
+                    for item in batch:
+                        writer.write({"id": item["id"], "question": item["question"], "status": "eroare",
+                                      "eroare": f"Căutare eșuată: {e}"})
+                    with counts_lock:
+                        counts["eroare"] += len(batch)
+                    continue
+                retrieved_at = time.perf_counter()
+                batch_timings["total"] = retrieved_at - batch_timings["start"]
+                print(f"[Bulk] Lot {offset // retrieval_batch + 1}: {len(batch)} întrebări căutate în "
+                      f"{batch_timings['total']:.2f}s")
+                for item, chunks in zip(batch, retrieved):
+                    in_flight.acquire()
+                    futures.append(pool.submit(finish, item, chunks, batch_timings, retrieved_at))
+    finally:
+        writer.close()
+
+    # answer_item prinde erorile generarii; aici raman doar cele de scriere (ex: disc plin)
+    for future in futures:
+        error = future.exception()
+        if error is not None:
+            print(f"[WARN] Rezultatul nu a putut fi scris: {error}")
+            counts["eroare"] += 1
+
+    wall_time = time.perf_counter() - start
+    ordered = sorted(totals)
+    summary = {
+        "intrebari": len(pending),
+        "ok": counts["ok"],
+        "erori": counts["eroare"],
+        "durata": wall_time,
+        "intrebari_pe_secunda": len(pending) / wall_time if wall_time > 0 else 0.0,
+        "p50_total": ordered[len(ordered) // 2] if ordered else 0.0,
+        "p95_total": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Răspunsuri în bloc pentru un fișier de întrebări (JSON/JSONL).")
+    parser.add_argument("input", help="Fișierul cu întrebări (.jsonl sau .json).")
+    parser.add_argument("--output", required=True, help="Fișierul JSONL cu răspunsurile.")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--batch", type=int, default=RETRIEVAL_BATCH, help="Întrebări căutate împreună.")
+    parser.add_argument("--workers", type=int, default=GENERATION_WORKERS, help="Generări simultane.")
+    parser.add_argument("--limit", type=int, default=None, help="Doar primele N întrebări.")
+    parser.add_argument("--no-resume", action="store_true", help="Rescrie fișierul de ieșire de la zero.")
+    parser.add_argument("--fake-backends", action="store_true",
+                        help="Folosește backend-uri simulate în locul Gemini/Ollama.")
+    args = parser.parse_args()
+
+    questions = load_questions(args.input)[:args.limit]
+    if args.fake_backends:
+        from src.server import use_fake_backends
+        use_fake_backends()
+    rag_service.set_llm_concurrency(args.workers)
+
+    # Backend-urile simulate nu au model de preincarcat
+    collection = rag_service.initialize_rag_system(reindex=False, prewarm=not args.fake_backends)
+    summary = run_batch(collection, questions, args.output, k=args.k, retrieval_batch=args.batch,
+                        workers=args.workers, resume=not args.no_resume)
+    print(f"\n[Bulk] {summary['ok']} răspunsuri, {summary['erori']} erori în {summary['durata']:.1f}s "
+          f"({summary['intrebari_pe_secunda']:.2f} întrebări/s; total per întrebare p50 "
+          f"{summary['p50_total']:.2f}s, p95 {summary['p95_total']:.2f}s) -> '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
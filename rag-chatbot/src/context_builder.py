@@ -0,0 +1,158 @@
+"""
+Asamblarea contextului pentru LLM din segmentele regăsite.
+
+Segmentele de tip punct ("Art. 102 (pct 3.)") repetă fiecare primele 150 de
+caractere ale articolului; aici punctele aceluiași articol sunt grupate sub un
+singur antet. Segmentele aproape identice sunt eliminate, iar adăugarea se oprește
+când se atinge bugetul de tokeni. Segmentele al căror scor vectorial scade brusc
+față de cel mai bun rezultat sunt lăsate pe dinafară (k adaptiv).
+"""
+import math
+
+from src.lexical_index import base_article, tokenize
+
+# --- Configuratii Context ---
+# Bugetul (estimat) de tokeni pentru textul legislativ din prompt
+CONTEXT_TOKEN_BUDGET = 1500
+# Estimare grosiera pentru tokenizer-ele LLM pe text romanesc
+CHARS_PER_TOKEN = 4.0
+# Similaritatea Jaccard (pe cuvinte) peste care doua segmente sunt considerate duplicate
+NEAR_DUPLICATE_THRESHOLD = 0.85
+# k adaptiv: segmentele cu scorul sub (cel mai bun scor - SCORE_FALLOFF) sunt omise (0 = dezactivat)
+SCORE_FALLOFF = 0.10
+# ... dar pastram mereu cel putin atatea segmente (daca incap in buget)
+MIN_CONTEXT_CHUNKS = 2
+
+_POINT_SEPARATOR = "... : "
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def naive_context(retrieved_chunks: list[dict]) -> str:
+    """Contextul inițial: toate segmentele, integral, unul după altul."""
+    return "\n".join([f"[{chunk['articol']}]: {chunk['text']}" for chunk in retrieved_chunks])
+
+
+def _split_point(chunk: dict) -> tuple[str, str, str] | None:
+    """
+    Descompune un segment de tip punct în (punct, antet, conținut), după formatul
+    din data_processor: "{sursa} - Art. {nr} ({punct}) {antet[:150]}... : {conținut}".
+    """
+    meta = chunk["metadata"]
+    article = meta["articol"]
+    if " (pct " not in article:
+        return None
+    point = article.split(" (pct ", 1)[1].rstrip(")")
+    prefix = f"{meta['sursa']} - Art. {base_article(article)} ({point}) "
+    text = chunk["text"]
+    if not text.startswith(prefix):
+        return None
+    header, separator, content = text[len(prefix):].partition(_POINT_SEPARATOR)
+    if not separator:
+        return None
+    return point, header, content
+
+
+def _point_sort_key(point: str):
+    number = point.rstrip(".")
+    return (0, int(number)) if number.isdigit() else (1, number)
+
+
+def _is_near_duplicate(tokens: set, seen: list[set], threshold: float) -> bool:
+    for other in seen:
+        union = len(tokens | other)
+        if union and len(tokens & other) / union >= threshold:
+            return True
+    return False
+
+
+def build_context(retrieved_chunks: list[dict], token_budget: int | None = None,
+                  score_falloff: float | None = None,
+                  duplicate_threshold: float | None = None) -> tuple[str, list[dict], dict]:
+    """
+    Construiește contextul compact. Returnează (text, segmente_folosite, statistici);
+    statisticile compară tokenii estimați cu cei ai concatenării integrale.
+    Parametrii nespecificați iau valorile din configurația modulului.
+    """
+    token_budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    score_falloff = SCORE_FALLOFF if score_falloff is None else score_falloff
+    duplicate_threshold = NEAR_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold
+    stats = {
+        "segmente": len(retrieved_chunks),
+        "duplicate": 0,
+        "scor_mic": 0,
+        "peste_buget": 0,
+        "tokeni_initial": estimate_tokens(naive_context(retrieved_chunks)),
+    }
+
+    # 1. k adaptiv: scorurile vectoriale mult sub cel mai bun rezultat nu mai aduc informatie
+    scores = [chunk["score"] for chunk in retrieved_chunks if chunk.get("score") is not None]
+    min_score = max(scores) - score_falloff if scores and score_falloff > 0 else None
+
+    # 2. Selectie in ordinea relevantei, cu deduplicare si buget
+    groups = {}
+    order = []
+    seen_tokens = []
+    used_chunks = []
+    used_tokens = 0
+    for chunk in retrieved_chunks:
+        score = chunk.get("score")
+        if min_score is not None and score is not None and score < min_score and len(used_chunks) >= MIN_CONTEXT_CHUNKS:
+            stats["scor_mic"] += 1
+            continue
+
+        point = _split_point(chunk)
+        # Fara antetul repetat; numarul punctului ramane, ca "2. abrogat" si "3. abrogat" sa nu fie duplicate
+        body = f"{point[0]} {point[2]}" if point else chunk["text"]
+        tokens = set(tokenize(body))
+        if tokens and _is_near_duplicate(tokens, seen_tokens, duplicate_threshold):
+            stats["duplicate"] += 1
+            continue
+
+        meta = chunk["metadata"]
+        if point:
+            key = (meta["sursa"], base_article(meta["articol"]), point[1])
+            # Antetul articolului se plateste o singura data pentru toate punctele lui
+            cost = estimate_tokens(f"{point[0]} {point[2]}\n")
+            if key not in groups:
+                cost += estimate_tokens(f"[{meta['sursa']} - Articolul {key[1]}]: {point[1]}...\n")
+        else:
+            key = ("segment", chunk["id"])
+            cost = estimate_tokens(f"[{chunk['articol']}]: {chunk['text']}\n")
+
+        if used_tokens + cost > token_budget and used_chunks:
+            stats["peste_buget"] += 1
+            continue
+
+        used_tokens += cost
+        seen_tokens.append(tokens)
+        used_chunks.append(chunk)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append((point, chunk))
+
+    # 3. Redare: grupurile in ordinea primului lor segment, punctele in ordine numerica
+    blocks = []
+    for key in order:
+        members = groups[key]
+        if key[0] == "segment":
+            chunk = members[0][1]
+            blocks.append(f"[{chunk['articol']}]: {chunk['text']}")
+            continue
+        source, article, header = key
+        lines = [f"[{source} - Articolul {article}]: {header}..."]
+        for point, _ in sorted(members, key=lambda member: _point_sort_key(member[0][0])):
+            lines.append(f"{point[0]} {point[2]}")
+        blocks.append("\n".join(lines))
+
+    context_text = "\n".join(blocks)
+    stats.update({
+        "segmente_folosite": len(used_chunks),
+        "articole_comasate": sum(1 for key in order if key[0] != "segment" and len(groups[key]) > 1),
+        "tokeni_context": estimate_tokens(context_text),
+    })
+    stats["tokeni_economisiti"] = stats["tokeni_initial"] - stats["tokeni_context"]
+    return context_text, used_chunks, stats
@@ -0,0 +1,273 @@
+"""
+Memoria conversațiilor: întrebările de continuare ("și dacă e a doua oară?")
+sunt înțelese în contextul întrebărilor anterioare, fără a trimite LLM-ului
+tot istoricul.
+
+Fiecare sesiune păstrează:
+  - ultimele MAX_RECENT_TURNS schimburi, cu răspunsurile scurtate;
+  - un rezumat cumulativ al schimburilor mai vechi (întrebarea, articolele
+    citate și prima frază a răspunsului - extras local, fără apel la LLM);
+  - segmentele regăsite la ultima întrebare, refolosite când continuarea
+    privește aceleași articole (fără embedding și căutare).
+Istoricul din prompt nu depășește HISTORY_TOKEN_BUDGET tokeni (estimați), deci
+latența generării nu crește odată cu lungimea conversației. Sesiunile sunt
+evacuate LRU și după SESSION_TTL_SECONDS de inactivitate (SessionStore).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.context_builder import CHARS_PER_TOKEN, estimate_tokens
+from src.lexical_index import LexicalIndex, base_article, normalize_text, parse_article_reference, tokenize
+
+# --- Configuratii Conversatie ---
+# Bugetul (estimat) de tokeni pentru istoric in prompt: rezumat + schimburile recente
+HISTORY_TOKEN_BUDGET = 600
+# Din care, cel mult atatia pentru rezumatul schimburilor vechi
+SUMMARY_TOKEN_BUDGET = 200
+# Schimburi pastrate integral (cu raspunsul scurtat); cele mai vechi intra in rezumat
+MAX_RECENT_TURNS = 3
+# Lungimea maxima (tokeni estimati) a unui raspuns anterior in prompt
+ANSWER_EXCERPT_TOKENS = 150
+# Intrebarile cu cel mult atatia termeni (fara cuvinte de legatura) sunt continuari daca au
+# un termen comun cu intrebarea anterioara ("ITP expirat" singur este o intrebare noua)
+FOLLOW_UP_MAX_TERMS = 2
+# Continuarea refoloseste segmentele anterioare daca cel mai bun scor BM25 din articolele
+# deja regasite este cel putin aceasta fractiune din cel mai bun scor din tot corpusul
+FOLLOW_UP_REUSE_RATIO = 0.8
+FOLLOW_UP_CANDIDATES = 20
+
+# --- Configuratii Sesiuni ---
+MAX_SESSIONS = 1000
+SESSION_TTL_SECONDS = 30 * 60
+
+# Inceputuri si trimiteri tipice pentru o intrebare de continuare (text normalizat, fara diacritice);
+# "daca" si "ce se intampla" lipsesc intentionat: incep si multe intrebari de sine statatoare
+_FOLLOW_UP_START_RE = re.compile(r"^(?:si|dar|iar|deci|atunci|sau|in (?:acest|acel) caz)\b")
+_FOLLOW_UP_REFERENCE_RE = re.compile(
+    r"\b(?:asta|aceasta|acesta|aceea|acela|acestea|respectiv\w*|mentionat\w*|de mai sus|la fel)\b")
+_SOURCES_FOOTER_RE = re.compile(r"\s*\(Surse: [^)]*\)\s*$")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def is_follow_up(question: str, previous_question: str | None = None) -> bool:
+    """
+    Întrebarea pare o continuare: începe cu "și", "dar", "iar"..., trimite la
+    "asta" / "respectiv" sau e foarte scurtă și reia un termen din `previous_question`.
+    """
+    normalized = normalize_text(question).strip()
+    if _FOLLOW_UP_START_RE.search(normalized) or _FOLLOW_UP_REFERENCE_RE.search(normalized):
+        return True
+    terms = set(tokenize(question))
+    if len(terms) > FOLLOW_UP_MAX_TERMS or previous_question is None:
+        return False
+    return bool(terms & set(tokenize(previous_question)))
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:int(max_tokens * CHARS_PER_TOKEN)].rsplit(" ", 1)[0]
+    return cut + " [...]"
+
+
+def _article_key(chunk: dict) -> tuple:
+    meta = chunk["metadata"]
+    return meta.get("sursa"), base_article(meta.get("articol", ""))
+
+
+class ConversationSession:
+    """Starea unei conversații: schimburile recente, rezumatul celor vechi și ultimele segmente regăsite."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns = deque()
+        self.summary_lines = deque()
+        self.last_chunks = []
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.turns) + len(self.summary_lines)
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def reset(self):
+        with self.lock:
+            self.turns.clear()
+            self.summary_lines.clear()
+            self.last_chunks = []
+
+    # --- Planificarea cautarii ---
+
+    def plan(self, question: str, lexical_index: LexicalIndex | None) -> dict:
+        """
+        Cum se caută răspunsul la `question` în contextul conversației:
+          - {"chunks": [...]}: segmentele ultimei întrebări, refolosite (aceleași articole);
+          - altfel {"query": ...}: textul de căutat - pentru o continuare, întrebarea
+            anterioară urmată de cea nouă.
+        "follow_up" arată dacă întrebarea depinde de conversație (răspunsul ei nu
+        poate fi pus sau luat din cache-ul de răspunsuri).
+        """
+        with self.lock:
+            previous = self.turns[-1] if self.turns else None
+            last_chunks = list(self.last_chunks)
+        plan = {"follow_up": False, "chunks": None, "query": question}
+        if previous is None:
+            return plan
+
+        reference = parse_article_reference(question)
+        if reference:
+            # Referinta explicita: refolosim doar daca articolul a fost deja regasit
+            article, source, _ = reference
+            same_article = [chunk for chunk in last_chunks if _article_key(chunk)[1] == article
+                            and (source is None or _article_key(chunk)[0] == source)]
+            if same_article:
+                plan.update(follow_up=True, chunks=same_article)
+            return plan
+
+        if not is_follow_up(question, previous["question"]):
+            return plan
+        plan["follow_up"] = True
+        if last_chunks and self._about_same_articles(question, last_chunks, lexical_index):
+            plan["chunks"] = last_chunks
+        else:
+            plan["query"] = f"{previous['question']} {question}"
+        return plan
+
+    @staticmethod
+    def _about_same_articles(question: str, chunks: list[dict], lexical_index: LexicalIndex | None) -> bool:
+        """Continuarea nu aduce termeni care se potrivesc mult mai bine cu alte articole."""
+        if lexical_index is None:
+            return True
+        hits = lexical_index.search(question, k=FOLLOW_UP_CANDIDATES)
+        if not hits:
+            return True
+        known = {_article_key(chunk) for chunk in chunks}
+        best_known = max((score for doc_id, score in hits
+                          if _article_key(lexical_index.get_chunk(doc_id)) in known), default=0.0)
+        return best_known >= FOLLOW_UP_REUSE_RATIO * hits[0][1]
+
+    # --- Istoricul ---
+
+    def add_turn(self, question: str, answer: str, chunks: list[dict] | None):
+        """Înregistrează schimbul; cele mai vechi schimburi trec în rezumat."""
+        answer = _SOURCES_FOOTER_RE.sub("", answer).strip()
+        articles = list(dict.fromkeys(chunk["articol"] for chunk in chunks or []))
+        with self.lock:
+            self.turns.append({"question": question, "answer": answer, "articles": articles})
+            while len(self.turns) > MAX_RECENT_TURNS:
+                self._summarize(self.turns.popleft())
+            self.last_chunks = list(chunks or [])
+        self.touch()
+
+    def _summarize(self, turn: dict):
+        first_sentence = _SENTENCE_END_RE.split(turn["answer"], 1)[0]
+        articles = f" [{', '.join(turn['articles'][:3])}]" if turn["articles"] else ""
+        self.summary_lines.append(_truncate_tokens(f"- {turn['question']}{articles}: {first_sentence}",
+                                                   SUMMARY_TOKEN_BUDGET // 2))
+        # Rezumatul este cumulativ, dar marginit: cele mai vechi randuri ies primele
+        while sum(estimate_tokens(line) for line in self.summary_lines) > SUMMARY_TOKEN_BUDGET:
+            self.summary_lines.popleft()
+
+    def history_messages(self, token_budget: int | None = None) -> list[dict]:
+        """
+        Mesajele de istoric pentru LLM (rezumat, apoi schimburile recente ca perechi
+        user/assistant), în limita `token_budget` (implicit HISTORY_TOKEN_BUDGET);
+        schimburile recente care nu mai încap sunt omise, cele mai vechi primele.
+        """
+        token_budget = HISTORY_TOKEN_BUDGET if token_budget is None else token_budget
+        with self.lock:
+            summary = "\n".join(self.summary_lines)
+            turns = list(self.turns)
+
+        messages = []
+        used = 0
+        if summary:
+            summary_message = {"role": "user", "content": _truncate_tokens(
+                f"REZUMATUL CONVERSAȚIEI ANTERIOARE:\n{summary}", min(SUMMARY_TOKEN_BUDGET, token_budget))}
+            used += estimate_tokens(summary_message["content"])
+            messages.append(summary_message)
+
+        recent = []
+        for turn in reversed(turns):
+            pair = [{"role": "user", "content": turn["question"]},
+                    {"role": "assistant", "content": _truncate_tokens(turn["answer"], ANSWER_EXCERPT_TOKENS)}]
+            tokens = sum(estimate_tokens(message["content"]) for message in pair)
+            if used + tokens > token_budget:
+                break
+            used += tokens
+            recent[:0] = pair
+        return messages + recent
+
+
+class SessionStore:
+    """Sesiunile active, cu evacuare LRU (peste `max_sessions`) și după `ttl` secunde de inactivitate."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> ConversationSession:
+        """Sesiunea cu ID-ul dat (creată dacă lipsește sau a expirat)."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ConversationSession(session_id)
+                self._sessions[session_id] = session
+                self.created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.touch()
+            return session
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _purge_expired(self, now: float):
+        # Ordinea LRU: sesiunile cele mai vechi sunt la inceput
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.ttl:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return {
+                "size": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "created": self.created,
+                "evicted": self.evicted,
+                "expired": self.expired,
+            }
+
+
+_store = None
+
+
+def get_session_store() -> SessionStore:
+    """Depozitul de sesiuni partajat de proces."""
+    global _store
+    if _store is None:
+        _store = SessionStore()
+    return _store
@@ -1,21 +1,242 @@
-import uuid
+import hashlib
+import heapq
+import mmap
 import re
 import os
 
 # Numele fisierului incarcat de tine
 CORPUS_FILE = "data/codul_rutier.txt"
+# Se incrementeaza la orice schimbare a regulilor de segmentare (invalideaza manifestul indexului)
+CHUNKER_VERSION = 1
 
-def load_and_chunk_data():
+def source_slug(source: str) -> str:
+    """'OUG 195/2002' -> 'OUG_195_2002' (prefixul ID-urilor și numele shard-ului sursei)."""
+    return re.sub(r'[^0-9A-Za-z]+', '_', source).strip('_')
+
+def make_chunk_id(source: str, article: str, point: str, text: str) -> str:
+    """
+    ID determinist pentru un segment: (sursă, articol, punct, hash conținut).
+    Același text produce mereu același ID, deci re-indexarea poate compara
+    corpusul nou cu ce există deja în ChromaDB.
+    """
+    content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    point_part = f"/pct-{point.rstrip('.')}" if point else ""
+    article_slug = article.replace("/", "")
+    return f"{source_slug(source)}/art-{article_slug}{point_part}/{content_hash}"
+
+# --- Segmentare într-o singură trecere ---
+# Aceleași tipare ca în load_and_chunk_data_legacy, precompilate și aplicate pe
+# octeți, direct peste fișierul mapat în memorie: titlurile de eliminat, schimbările
+# de sursă și începuturile de articol. Fiecare regex rămâne simplu (un regex comun
+# cu alternative ar pierde optimizările de căutare ale motorului și ar fi mai lent).
+_HEADING_PATTERN = re.compile(rb'^#+.*$|^\s*CAPITOLUL\s*[^A-Z]*[^\n]*|^SECTIUNEA\s*[^A-Z]*[^\n]*', flags=re.MULTILINE)
+_SOURCE_PATTERN = re.compile(rb'----- START (?:OUG 195/2002|HG 1391/2006|CODUL PENAL)')
+_ARTICLE_PATTERN = re.compile(rb'(?:Articolul|Art\.)\s*\d+', flags=re.IGNORECASE)
+_SOURCE_MARKERS = {
+    b'----- START OUG 195/2002': "OUG 195/2002",
+    b'----- START HG 1391/2006': "HG 1391/2006",
+    b'----- START CODUL PENAL': "Codul Penal",
+}
+# Ordinea in care varianta initiala verifica marcajele de sursa dintr-un segment
+_SOURCE_PRECEDENCE = ["HG 1391/2006", "OUG 195/2002", "Codul Penal"]
+_SOURCE_TOKENS = {"OUG 195/2002": "|--SOURCE_OUG--|", "HG 1391/2006": "|--SOURCE_HG--|",
+                  "Codul Penal": "|--SOURCE_PENAL--|"}
+_ARTICLE_NUMBER = re.compile(r'(?:Art\.|Articolul)\s*(\d+(?:\.\d+)?)', flags=re.IGNORECASE)
+_LIST_POINT = re.compile(r'(\n\s*\d+\.)')
+
+def _scan_events(data):
+    """
+    Evenimentele din corpus (start, end, tip), în ordinea poziției: "heading",
+    "source" sau "article". Ca în varianta inițială, unde titlurile erau șterse
+    înainte de căutarea articolelor, nimic din interiorul unui titlu nu contează.
+    """
+    events = heapq.merge(
+        ((m.start(), m.end(), "heading") for m in _HEADING_PATTERN.finditer(data)),
+        ((m.start(), m.end(), "source") for m in _SOURCE_PATTERN.finditer(data)),
+        ((m.start(), m.end(), "article") for m in _ARTICLE_PATTERN.finditer(data)),
+    )
+    heading_end = 0
+    for start, end, kind in events:
+        if start < heading_end:
+            continue
+        if kind == "heading":
+            heading_end = end
+        yield start, end, kind
+
+def _utf8_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+def _file_offset(pieces: list[tuple], byte_index: int) -> int:
+    """Poziția în fișier a octetului `byte_index` din textul (UTF-8) al unui segment."""
+    for file_start, file_end, text in pieces:
+        # Marcajele de sursa ramase in text nu ocupa loc in fisier
+        length = file_end - file_start if file_end > file_start else _utf8_len(text)
+        if byte_index <= length:
+            return file_start + byte_index if file_end > file_start else file_start
+        byte_index -= length
+    return pieces[-1][1] if pieces else 0
+
+def _segment_chunks(pieces: list[tuple], current_source: str):
+    """
+    Transformă un segment brut (bucăți de text cu pozițiile lor în fișier) în
+    segmente finale, exact ca bucla din load_and_chunk_data_legacy.
+    Returnează (sursa_curenta, [segmente]).
+    """
+    sources = [text for start, end, text in pieces if start == end]
+    chosen = next((source for source in _SOURCE_PRECEDENCE if source in sources), None)
+    if chosen is not None:
+        current_source = chosen
+    # Marcajul de sursa ales este eliminat; eventualele alte marcaje din acelasi
+    # segment raman in text, ca in varianta initiala
+    pieces = [(start, end, _SOURCE_TOKENS[text] if start == end else text)
+              for start, end, text in pieces if not (start == end and text == chosen)]
+
+    text = "".join(piece[2] for piece in pieces)
+    chunk = text.strip()
+    # Pozitiile sunt calculate in octeti, incremental (fara re-codarea prefixelor)
+    lead = _utf8_len(text[:len(text) - len(text.lstrip())])
+    chunk_bytes = _utf8_len(chunk)
+
+    art_match = _ARTICLE_NUMBER.search(chunk)
+    art_num = art_match.group(1) if art_match else "N/A"
+
+    results = []
+    if len(chunk) > 600 and _LIST_POINT.search(chunk):
+        header_match = _LIST_POINT.split(chunk, maxsplit=1)
+        if len(header_match) >= 3:
+            header_text = header_match[0]
+            body_text = header_match[1] + header_match[2]
+            sub_points = _LIST_POINT.split(body_text)
+
+            # Pozitia (octeti, in segment) a bucatii curente din lista
+            position = lead + _utf8_len(header_text)
+            for i in range(1, len(sub_points), 2):
+                if i+1 < len(sub_points):
+                    point_marker = sub_points[i].strip()
+                    point_content = sub_points[i+1].strip()
+                    marker_bytes = _utf8_len(sub_points[i])
+                    content_bytes = _utf8_len(sub_points[i+1])
+                    point_start = position + marker_bytes - _utf8_len(sub_points[i].lstrip())
+                    content_end = position + marker_bytes + _utf8_len(sub_points[i+1].rstrip())
+                    position += marker_bytes + content_bytes
+                    full_sub_chunk = f"{current_source} - Art. {art_num} ({point_marker}) {header_text[:150]}... : {point_content}"
+                    results.append({
+                        "text": full_sub_chunk,
+                        "sursa": current_source,
+                        "articol": art_num,
+                        "punct": point_marker,
+                        "start": _file_offset(pieces, point_start),
+                        "end": _file_offset(pieces, content_end),
+                    })
+            return current_source, results
+
+    results.append({"text": chunk, "sursa": current_source, "articol": art_num, "punct": "",
+                    "start": _file_offset(pieces, lead), "end": _file_offset(pieces, lead + chunk_bytes)})
+    return current_source, results
+
+def iter_chunks(corpus_file: str = CORPUS_FILE):
+    """
+    Segmentează corpusul într-o singură trecere, fără să-l încarce în memorie:
+    fișierul este mapat (mmap) și parcurs o dată cu un regex precompilat, iar
+    segmentele sunt produse pe măsură ce sunt găsite.
+
+    Fiecare segment este un dict cu "id", "text", "sursa", "articol", "punct"
+    ("" pentru articolele nesegmentate) și "start"/"end" - pozițiile (octeți) în
+    fișierul original. Segmentarea este identică cu load_and_chunk_data_legacy.
+    """
+    with open(corpus_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            current_source = "OUG 195/2002"
+            seen = {}
+            # Bucati de text (start, end, text) din segmentul curent; marcajele de
+            # sursa sunt bucati de lungime zero in fisier, cu numele sursei ca text
+            pieces = []
+            cursor = 0
+
+            def flush(pieces):
+                nonlocal current_source
+                # Segmentele goale sunt ignorate (dar nu si cele care contin doar un marcaj de sursa)
+                if not any(start == end or text.strip() for start, end, text in pieces):
+                    return []
+                current_source, chunks = _segment_chunks(pieces, current_source)
+                for chunk in chunks:
+                    doc_id = make_chunk_id(chunk["sursa"], chunk["articol"], chunk["punct"], chunk["text"])
+                    seen[doc_id] = seen.get(doc_id, 0) + 1
+                    chunk["id"] = doc_id if seen[doc_id] == 1 else f"{doc_id}#{seen[doc_id]}"
+                return chunks
+
+            for start, end, kind in _scan_events(data):
+                if start > cursor:
+                    pieces.append((cursor, start, data[cursor:start].decode('utf-8')))
+                if kind == "heading":
+                    cursor = end
+                elif kind == "source":
+                    pieces.append((start, start, _SOURCE_MARKERS[data[start:end]]))
+                    cursor = end
+                else:
+                    yield from flush(pieces)
+                    pieces = []
+                    cursor = start
+
+            if cursor < len(data):
+                pieces.append((cursor, len(data), data[cursor:].decode('utf-8')))
+            yield from flush(pieces)
+
+def corpus_fingerprint(corpus_file: str = CORPUS_FILE) -> str | None:
+    """
+    Hash-ul corpusului și al versiunii segmentării: dacă nu s-a schimbat, segmentele
+    (și ID-urile lor) sunt aceleași ca la ultima indexare. None dacă fișierul lipsește.
+    """
+    digest = hashlib.sha256(f"segmentare-v{CHUNKER_VERSION}".encode("utf-8"))
+    try:
+        with open(corpus_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def load_and_chunk_data(corpus_file: str = CORPUS_FILE):
+    """
+    Încarcă textul legal, îl segmentează pe Articole, iar Articolele lungi (liste)
+    le sub-segmentează pentru a crește precizia RAG. Returnează (texte, metadate, ID-uri).
+    """
+    if not os.path.exists(corpus_file):
+        print(f"Eroare: Fișierul corpus '{corpus_file}' nu a fost găsit.")
+        return [], [], []
+
+    final_chunks = []
+    metadata_list = []
+    document_ids = []
+    try:
+        for chunk in iter_chunks(corpus_file):
+            final_chunks.append(chunk["text"])
+            article = f"{chunk['articol']} (pct {chunk['punct']})" if chunk["punct"] else chunk["articol"]
+            metadata_list.append({"sursa": chunk["sursa"], "articol": article})
+            document_ids.append(chunk["id"])
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Eroare la citirea fișierului: {e}")
+        return [], [], []
+
+    print(f"[PAS 1] Segmentare finalizată. Total segmente: {len(final_chunks)}")
+    return final_chunks, metadata_list, document_ids
+
+def load_and_chunk_data_legacy(corpus_file: str = CORPUS_FILE):
     """
     Încarcă textul legal, îl segmentează pe Articole, iar Articolele lungi (liste)
     le sub-segmentează pentru a crește precizia RAG.
+
+    Varianta inițială (mai multe treceri peste tot textul, în memorie); păstrată ca
+    referință pentru iter_chunks și pentru eval/chunker_benchmark.py.
     """
     try:
-        if not os.path.exists(CORPUS_FILE):
-             print(f"Eroare: Fișierul corpus '{CORPUS_FILE}' nu a fost găsit.")
+        if not os.path.exists(corpus_file):
+             print(f"Eroare: Fișierul corpus '{corpus_file}' nu a fost găsit.")
              return [], [], []
 
-        with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        with open(corpus_file, 'r', encoding='utf-8') as f:
             full_text = f.read()
     except Exception as e:
         print(f"Eroare la citirea fișierului: {e}")
@@ -84,16 +305,24 @@ def load_and_chunk_data():
                         
                         final_chunks.append(full_sub_chunk)
                         metadata_list.append({"sursa": current_source, "articol": f"{art_num} (pct {point_marker})"})
-                        document_ids.append(str(uuid.uuid4()))
+                        document_ids.append(make_chunk_id(current_source, art_num, point_marker, full_sub_chunk))
             else:
                 final_chunks.append(chunk)
                 metadata_list.append({"sursa": current_source, "articol": art_num})
-                document_ids.append(str(uuid.uuid4()))
+                document_ids.append(make_chunk_id(current_source, art_num, "", chunk))
         else:
             final_chunks.append(chunk)
             metadata_list.append({"sursa": current_source, "articol": art_num})
-            document_ids.append(str(uuid.uuid4()))
+            document_ids.append(make_chunk_id(current_source, art_num, "", chunk))
         
+    # Segmentele identice (aceeași sursă, articol și text) ar primi același ID;
+    # le diferențiem prin numărul apariției, tot determinist.
+    seen = {}
+    for idx, doc_id in enumerate(document_ids):
+        seen[doc_id] = seen.get(doc_id, 0) + 1
+        if seen[doc_id] > 1:
+            document_ids[idx] = f"{doc_id}#{seen[doc_id]}"
+
     print(f"[PAS 1] Segmentare finalizată. Total segmente: {len(final_chunks)}")
     return final_chunks, metadata_list, document_ids
 
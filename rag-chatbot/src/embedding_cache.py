@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Configuratii Cache Embedding-uri ---
+# Directorul in care pastram vectorii deja calculati (independent de ChromaDB,
+# ca sa supravietuiasca unui clear_db())
+CACHE_DIR = "embedding_cache"
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.json"
+# Jurnalul cheilor adaugate dupa ultimul index complet (o cheie pe linie, in ordinea randurilor)
+INDEX_LOG_FILE = "index.log"
+
+# Cache-ul in memorie pentru vectorii intrebarilor (LRU marginit ca dimensiune si TTL)
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL_SECONDS = 3600
+
+
+def make_cache_key(model: str, task_type: str, text: str) -> str:
+    """Cheia de cache: (model, task_type, hash-ul textului segmentului)."""
+    digest = hashlib.sha256()
+    digest.update(f"{model}\x1f{task_type}\x1f".encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def normalize_query(text: str) -> str:
+    """Forma canonică a întrebării: litere mici, spații comprimate."""
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+class QueryEmbeddingLRU:
+    """
+    Cache LRU thread-safe pentru vectorii întrebărilor, mărginit ca număr de
+    intrări și ca vechime (TTL). Contorizează hit/miss pentru dimensionare.
+    """
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, vector = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class EmbeddingCache:
+    """
+    Cache persistent, adresat după conținut, pentru vectorii de embedding.
+
+    Vectorii sunt scriși append-only într-un fișier binar float32 (citit prin
+    memory-map), iar un index JSON mapează cheia -> rândul din fișier. Cheile
+    fiecărui lot sunt adăugate la un jurnal (index.log), deci o rulare întreruptă
+    se reia de la ultimul lot finalizat; flush() rescrie indexul complet o singură
+    dată (la finalul ingestiei) și golește jurnalul.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.vectors_path = os.path.join(cache_dir, VECTORS_FILE)
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.log_path = os.path.join(cache_dir, INDEX_LOG_FILE)
+        self._rows: dict[str, int] = {}
+        self._dim = None
+        self._vectors = None
+        self._load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            # Vectori scriși fără index (crash la primul lot) - nu îi putem adresa
+            self._remove_files(self.vectors_path, self.log_path)
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._dim = data.get("dim")
+            self._rows = data.get("rows", {})
+            self._replay_log()
+        except (OSError, ValueError) as e:
+            print(f"[Cache] Index corupt, îl ignor: {e}")
+            self._dim, self._rows = None, {}
+            self._remove_files(self.vectors_path, self.log_path)
+            return
+        self._truncate_orphan_rows()
+        self._open_memmap()
+
+    def _replay_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                # O linie fara "\n" a fost scrisa partial (crash): lotul ei nu este complet
+                if not line.endswith("\n"):
+                    break
+                key = line[:-1]
+                if key and key not in self._rows:
+                    self._rows[key] = len(self._rows)
+
+    @staticmethod
+    def _remove_files(*paths):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _truncate_orphan_rows(self):
+        # Dacă procesul a murit între scrierea vectorilor și a indexului,
+        # fișierul are rânduri în plus pe care indexul nu le cunoaște.
+        if self._dim is None or not os.path.exists(self.vectors_path):
+            self._rows = {}
+            self._remove_files(self.vectors_path, self.log_path)
+            return
+        expected = len(self._rows) * self._dim * 4
+        actual = os.path.getsize(self.vectors_path)
+        if actual > expected:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(expected)
+        elif actual < expected:
+            print("[Cache] Fișierul de vectori este incomplet, golesc cache-ul.")
+            self._rows = {}
+            self._remove_files(self.vectors_path, self.log_path)
+
+    def _open_memmap(self):
+        if not self._rows or self._dim is None:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                  shape=(len(self._rows), self._dim))
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Returnează vectorii existenți în cache pentru cheile date."""
+        found = {}
+        if self._vectors is None:
+            return found
+        for key in keys:
+            row = self._rows.get(key)
+            if row is not None:
+                found[key] = self._vectors[row].tolist()
+        return found
+
+    def put_many(self, keys: list[str], vectors: list[list[float]]):
+        """Adaugă un lot de vectori și cheile lui în jurnal (punct de reluare)."""
+        pending = {}
+        for key, vector in zip(keys, vectors):
+            if key not in self._rows and key not in pending:
+                pending[key] = vector
+        new_items = list(pending.items())
+        if not new_items:
+            return
+
+        matrix = np.asarray([v for _, v in new_items], dtype=np.float32)
+        if self._dim is None:
+            self._dim = matrix.shape[1]
+        elif matrix.shape[1] != self._dim:
+            raise ValueError(f"Dimensiune vector {matrix.shape[1]} diferită de cea din cache ({self._dim}).")
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Eliberăm memory-map-ul înainte de a extinde fișierul
+        self._vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.write(matrix.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        start = len(self._rows)
+        for offset, (key, _) in enumerate(new_items):
+            self._rows[key] = start + offset
+        if os.path.exists(self.index_path):
+            # Doar cheile noi: rescrierea indexului complet la fiecare lot ar fi patratica
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("".join(key + "\n" for key, _ in new_items))
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            # Primul lot: indexul fixeaza si dimensiunea vectorilor
+            self._write_index()
+        self._open_memmap()
+
+    def flush(self):
+        """Rescrie indexul complet și golește jurnalul (apelată la finalul ingestiei)."""
+        if os.path.exists(self.log_path):
+            self._write_index()
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self._dim, "rows": self._rows}, f)
+        os.replace(tmp_path, self.index_path)
+        # Indexul complet contine deja cheile din jurnal
+        self._remove_files(self.log_path)
+
+
+# O instanta per director (un director per furnizor de embedding-uri / dimensiune)
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(cache_dir: str = CACHE_DIR) -> EmbeddingCache:
+    """Instanța de cache partajată de proces pentru directorul dat."""
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = _caches[cache_dir] = EmbeddingCache(cache_dir)
+        return cache
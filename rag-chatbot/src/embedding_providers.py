@@ -0,0 +1,277 @@
+"""
+Furnizorii de embedding-uri, aleși prin configurație (RAG_EMBEDDING_PROVIDER):
+
+  - gemini  - API-ul Gemini (text-embedding-004), implicit;
+  - ollama  - model local servit de Ollama (implicit nomic-embed-text), în loturi;
+  - hashing - vectori determiniști din cuvintele textului (feature hashing), fără
+              rețea și fără model: pentru teste și rulări offline.
+
+Fiecare furnizor primește tipul de task (RETRIEVAL_DOCUMENT / RETRIEVAL_QUERY) și
+are o identitate (furnizor, model, dimensiune) de care sunt legate cache-ul de
+vectori, colecția și manifestul indexului: vectori produși de furnizori diferiți
+nu sunt niciodată amestecați.
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from src.embedding_cache import CACHE_DIR
+from src.ingestion import RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND, TokenBucket
+from src.lexical_index import tokenize
+
+# --- Configuratii Embedding ---
+# Furnizorul: "gemini" (implicit), "ollama" sau "hashing"
+EMBEDDING_PROVIDER = os.getenv("RAG_EMBEDDING_PROVIDER", "gemini").lower()
+# Nesetate = valorile implicite ale furnizorului
+EMBEDDING_MODEL_OVERRIDE = os.getenv("RAG_EMBEDDING_MODEL") or None
+EMBEDDING_DIM = int(os.getenv("RAG_EMBEDDING_DIM", "0")) or None
+EMBEDDING_BATCH_SIZE = int(os.getenv("RAG_EMBEDDING_BATCH", "0")) or None
+
+GEMINI_EMBEDDING_MODEL = 'text-embedding-004'
+OLLAMA_EMBEDDING_MODEL = "nomic-embed-text"
+OLLAMA_KEEP_ALIVE = os.getenv("RAG_OLLAMA_KEEP_ALIVE", "30m")
+HASHING_DIM = 768
+
+# Modelele nomic cer un prefix care spune daca textul este document sau intrebare
+_OLLAMA_TASK_PREFIXES = {
+    "nomic-embed-text": {"RETRIEVAL_DOCUMENT": "search_document: ", "RETRIEVAL_QUERY": "search_query: "},
+}
+
+
+def _truncate(vectors, dimension: int | None) -> list[list[float]]:
+    """Primele `dimension` componente, renormalizate (modele de tip Matryoshka)."""
+    if not dimension:
+        return [list(vector) for vector in vectors]
+    matrix = np.asarray(vectors, dtype=np.float32)[:, :dimension]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).tolist()
+
+
+class EmbeddingProvider:
+    """
+    Interfața comună: `embed(texte, task_type) -> vectori`, plus cum se
+    trimit loturile la ingestie (mărime, concurență, limită de rată).
+    """
+
+    name = "abstract"
+    default_model = ""
+    default_batch_size = 100
+    # Cate loturi sunt trimise simultan la ingestie
+    max_workers = 4
+    # Vectorii sunt calculati in acest proces, pe CPU: la ingestie loturile merg
+    # intr-un pool de procese (src.ingestion.ProcessPoolEmbedder), nu pe thread-uri
+    cpu_bound = False
+
+    def __init__(self, model: str | None = None, dimension: int | None = None, batch_size: int | None = None):
+        self.model = model or self.default_model
+        self.dimension = dimension
+        self.batch_size = batch_size or self.default_batch_size
+
+    @property
+    def identity(self) -> str:
+        """Identifică spațiul vectorial: furnizor, model și dimensiune."""
+        identity = f"{self.name}/{self.model}"
+        return f"{identity}@{self.dimension}" if self.dimension else identity
+
+    @property
+    def cache_dir(self) -> str:
+        """Directorul cache-ului de vectori (cache-ul are o singură dimensiune)."""
+        return os.path.join(CACHE_DIR, re.sub(r'[^0-9A-Za-z.@-]+', '_', self.identity))
+
+    def rate_limiter(self) -> TokenBucket:
+        """Fără limită de rată (furnizorii locali)."""
+        return TokenBucket(0)
+
+    def embed(self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+        raise NotImplementedError
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """API-ul Gemini; clientul este cel din get_gemini_client (înlocuibil cu set_gemini_client)."""
+
+    name = "gemini"
+    default_model = GEMINI_EMBEDDING_MODEL
+    # Limita maxima de articole pe lot (impusa de API)
+    default_batch_size = 100
+
+    @property
+    def identity(self) -> str:
+        # Fara prefix pentru modelul implicit: cheile din cache-ul existent raman valide
+        if self.model == GEMINI_EMBEDDING_MODEL and not self.dimension:
+            return self.model
+        return super().identity
+
+    @property
+    def cache_dir(self) -> str:
+        return CACHE_DIR if self.identity == GEMINI_EMBEDDING_MODEL else super().cache_dir
+
+    def rate_limiter(self) -> TokenBucket:
+        return TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+    def embed(self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+        config = {'task_type': task_type}
+        if self.dimension:
+            config['output_dimensionality'] = self.dimension
+        response = get_gemini_client().models.embed_content(model=self.model, contents=texts, config=config)
+        # Accesarea vectorului se face cu .embeddings[i].values
+        return [embedding_obj.values for embedding_obj in response.embeddings]
+
+
+class OllamaEmbeddingProvider(EmbeddingProvider):
+    """
+    Model de embedding local servit de Ollama (`ollama.embed`, mai multe texte
+    per cerere). Cu `dimension`, vectorii sunt trunchiați și renormalizați.
+    """
+
+    name = "ollama"
+    default_model = OLLAMA_EMBEDDING_MODEL
+    default_batch_size = 32
+    # Ollama proceseaza cererile pe rand; loturile mari conteaza mai mult decat concurenta
+    max_workers = 1
+
+    def __init__(self, model: str | None = None, dimension: int | None = None, batch_size: int | None = None,
+                 client=None, keep_alive: str = OLLAMA_KEEP_ALIVE):
+        super().__init__(model, dimension, batch_size)
+        self._client = client
+        self.keep_alive = keep_alive
+        self._prefixes = _OLLAMA_TASK_PREFIXES.get(self.model.split(":", 1)[0], {})
+
+    def embed(self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+        client = self._client
+        if client is None:
+            import ollama
+            client = ollama
+        prefix = self._prefixes.get(task_type, "")
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [prefix + text for text in texts[start:start + self.batch_size]]
+            response = client.embed(model=self.model, input=batch, keep_alive=self.keep_alive)
+            vectors.extend(response["embeddings"])
+        return _truncate(vectors, self.dimension)
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Vectori determiniști, fără rețea: cuvintele textului (aceeași tokenizare ca
+    BM25) sunt proiectate prin hash într-un vector de `dimension` componente, cu
+    semn și pondere 1 + log(tf). Textele cu cuvinte comune au vectori apropiați,
+    deci regăsirea funcționează (lexical) și în teste.
+    """
+
+    name = "hashing"
+    default_model = "cuvinte-v1"
+    default_batch_size = 256
+    max_workers = 1
+    cpu_bound = True
+
+    def __init__(self, model: str | None = None, dimension: int | None = None, batch_size: int | None = None):
+        super().__init__(model, dimension or HASHING_DIM, batch_size)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Trimis proceselor de ingestie fara lock si fara hash-urile memorate
+        return {**self.__dict__, "_buckets": {}, "_lock": None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _bucket(self, token: str) -> tuple[int, float]:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            bucket = (value % self.dimension, 1.0 if (value >> 63) & 1 else -1.0)
+            with self._lock:
+                self._buckets[token] = bucket
+        return bucket
+
+    def embed(self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token, count in Counter(tokenize(text)).items():
+                index, sign = self._bucket(token)
+                matrix[row, index] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1)
+        # Un text fara cuvinte primeste un vector fix (nu unul nul, fara directie)
+        matrix[norms == 0, 0] = 1.0
+        norms[norms == 0] = 1.0
+        return (matrix / norms[:, None]).tolist()
+
+
+_PROVIDERS = {
+    "gemini": GeminiEmbeddingProvider,
+    "ollama": OllamaEmbeddingProvider,
+    "hashing": HashingEmbeddingProvider,
+}
+
+
+def create_provider(name: str | None = None, model: str | None = None, dimension: int | None = None,
+                    batch_size: int | None = None) -> EmbeddingProvider:
+    """Furnizorul cerut; parametrii nespecificați vin din configurație (RAG_EMBEDDING_*)."""
+    name = (name or EMBEDDING_PROVIDER).lower()
+    provider_class = _PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"Furnizor de embedding necunoscut: '{name}' (folosiți unul din {sorted(_PROVIDERS)}).")
+    return provider_class(model=model or EMBEDDING_MODEL_OVERRIDE, dimension=dimension or EMBEDDING_DIM,
+                          batch_size=batch_size or EMBEDDING_BATCH_SIZE)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Furnizorul folosit de proces (creat la primul apel din configurație)."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider()
+        return _provider
+
+
+def set_embedding_provider(provider: EmbeddingProvider | None):
+    """Forțează furnizorul (ex: HashingEmbeddingProvider în teste). None revine la configurație."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+# --- Clientul Gemini ---
+# Clientii Gemini sunt reutilizati in tot procesul (un client per cheie API),
+# ca sa nu platim constructia clientului si conexiunile HTTP la fiecare intrebare
+_clients = {}
+_clients_lock = threading.Lock()
+_client_override = None
+
+
+def set_gemini_client(client):
+    """
+    Forțează clientul folosit pentru embedding-uri (ex: FakeEmbeddingClient din
+    src.fakes, pentru rulări fără cheie API). None revine la clientul Gemini real.
+    """
+    global _client_override
+    _client_override = client
+
+
+def get_gemini_client():
+    """Initializeaza clientul Gemini si verifica existenta API Key."""
+    if _client_override is not None:
+        return _client_override
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY nu este setată. Setați variabila de mediu.")
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # Importat doar la primul apel real: SDK-ul Gemini adauga ~1s la pornire
+            from google import genai
+            client = genai.Client(api_key=api_key)
+            _clients[api_key] = client
+    return client
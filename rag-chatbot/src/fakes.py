@@ -0,0 +1,196 @@
+"""
+Backend-uri locale (false) pentru rularea pipeline-ului fără cheie Gemini și fără Ollama:
+imită interfața clientului `google.genai` (vector_db_manager) și `ollama.chat`
+(rag_service), cu latență, viteză de generare și erori injectabile.
+"""
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+FAKE_EMBEDDING_DIM = 768
+
+
+class FakeRateLimitError(Exception):
+    """Imită APIError-ul Gemini pentru cota depășită."""
+
+    code = 429
+
+    def __init__(self):
+        super().__init__("429 RESOURCE_EXHAUSTED (simulat)")
+
+
+def fake_embedding(text: str, dim: int = FAKE_EMBEDDING_DIM) -> list[float]:
+    """Vector determinist, normalizat, derivat din hash-ul textului."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+class _FakeModels:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def embed_content(self, model, contents, config=None):
+        return self._owner._embed(contents)
+
+
+class FakeEmbeddingClient:
+    """
+    Înlocuitor pentru `genai.Client`: `client.models.embed_content(...)`.
+
+    latency                 - secunde fixe per apel
+    latency_per_item        - secunde suplimentare per text din lot
+    rate_limit_probability  - probabilitatea ca un apel să arunce 429
+    """
+
+    def __init__(self, latency: float = 0.05, latency_per_item: float = 0.0,
+                 rate_limit_probability: float = 0.0, dim: int = FAKE_EMBEDDING_DIM, seed: int = 0):
+        self.latency = latency
+        self.latency_per_item = latency_per_item
+        self.rate_limit_probability = rate_limit_probability
+        self.dim = dim
+        self.calls = 0
+        self.models = _FakeModels(self)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _embed(self, contents):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.rate_limit_probability
+        time.sleep(self.latency + self.latency_per_item * len(contents))
+        if fail:
+            raise FakeRateLimitError()
+        return SimpleNamespace(embeddings=[
+            SimpleNamespace(values=fake_embedding(text, self.dim)) for text in contents
+        ])
+
+
+class FakeChatBackend:
+    """
+    Înlocuitor pentru `ollama.chat(model, messages, stream=False)`.
+
+    latency            - secunde până la primul token (încărcare model, rețea)
+    tokens_per_second  - viteza de generare simulată
+    prompt_tokens_per_second - viteza de procesare a promptului (0 = instantaneu);
+                         cu ea, timpul până la primul token crește cu lungimea contextului
+    answer_tokens      - lungimea răspunsului generat
+    error_probability  - probabilitatea ca apelul să eșueze
+    parallel           - câte cereri sunt procesate simultan (ca OLLAMA_NUM_PARALLEL);
+                         celelalte așteaptă la coadă (0 = nelimitat)
+    """
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 50.0, answer_tokens: int = 40,
+                 error_probability: float = 0.0, seed: int = 0, prompt_tokens_per_second: float = 0.0,
+                 parallel: int = 0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.error_probability = error_probability
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(parallel) if parallel else None
+
+    @contextmanager
+    def _slot(self):
+        if self._slots is None:
+            yield
+            return
+        with self._slots:
+            yield
+
+    def _answer_words(self, messages) -> list[str]:
+        question = messages[-1]["content"]
+        words = question.split() or ["răspuns"]
+        return [words[i % len(words)] for i in range(self.answer_tokens)]
+
+    def _prompt_delay(self, messages) -> float:
+        if not self.prompt_tokens_per_second:
+            return self.latency
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        return self.latency + prompt_tokens / self.prompt_tokens_per_second
+
+    def __call__(self, model, messages, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_probability
+        if stream:
+            return self._stream(messages, fail)
+        with self._slot():
+            time.sleep(self._prompt_delay(messages))
+            if fail:
+                raise ConnectionError("Ollama indisponibil (simulat)")
+            words = self._answer_words(messages)
+            time.sleep(len(words) / self.tokens_per_second)
+        return {
+            "message": {"role": "assistant", "content": " ".join(words)},
+            "done": True,
+            "prompt_eval_count": sum(len(m["content"].split()) for m in messages),
+            "eval_count": len(words),
+        }
+
+    def _stream(self, messages, fail):
+        # Locul este ocupat pana la ultimul token (sau pana cand apelantul inchide fluxul)
+        with self._slot():
+            time.sleep(self._prompt_delay(messages))
+            if fail:
+                raise ConnectionError("Ollama indisponibil (simulat)")
+            words = self._answer_words(messages)
+            for word in words:
+                time.sleep(1.0 / self.tokens_per_second)
+                yield {"message": {"role": "assistant", "content": word + " "}, "done": False}
+        yield {
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "prompt_eval_count": sum(len(m["content"].split()) for m in messages),
+            "eval_count": len(words),
+            "eval_duration": int(len(words) / self.tokens_per_second * 1e9),
+        }
+
+
+class FakeEmbeddingProvider:
+    """
+    Învelește un furnizor de embedding (de obicei `hashing`, local) și adaugă
+    latența și erorile unui serviciu de rețea: vectorii și identitatea rămân ale
+    furnizorului învelit, deci indexul construit cu el poate fi interogat.
+
+    latency            - secunde fixe per apel
+    latency_per_item   - secunde suplimentare per text
+    error_probability  - probabilitatea ca un apel să arunce 429
+    cache_dir          - directorul cache-ului de vectori (implicit al furnizorului învelit)
+    """
+
+    # Simuleaza un serviciu de retea: la ingestie ramane pe thread-uri, nu in procese
+    cpu_bound = False
+
+    def __init__(self, provider, latency: float = 0.05, latency_per_item: float = 0.0,
+                 error_probability: float = 0.0, seed: int = 0, cache_dir: str | None = None):
+        self.provider = provider
+        if cache_dir is not None:
+            self.cache_dir = cache_dir
+        self.latency = latency
+        self.latency_per_item = latency_per_item
+        self.error_probability = error_probability
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    def embed(self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_probability
+        time.sleep(self.latency + self.latency_per_item * len(texts))
+        if fail:
+            raise FakeRateLimitError()
+        return self.provider.embed(texts, task_type)
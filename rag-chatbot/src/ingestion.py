@@ -0,0 +1,266 @@
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from src import telemetry
+
+# --- Configuratii Ingestie ---
+# Cate loturi sunt trimise simultan catre API
+MAX_WORKERS = 4
+# Token bucket: cereri pe secunda si rafala maxima permisa
+RATE_LIMIT_PER_SECOND = 2.0
+RATE_LIMIT_BURST = 4
+# Reincercari cu backoff exponential pentru un lot esuat (ex: 429)
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# Procese pentru furnizorii care calculeaza vectorii pe CPU, in Python (ex: hashing);
+# furnizorii de retea raman pe thread-uri, unde procesele ar consuma doar mai repede cota API
+INGEST_PROCESSES = int(os.getenv("RAG_INGEST_PROCESSES", "0")) or min(4, os.cpu_count() or 1)
+# Sub atatea texte de vectorizat, pornirea proceselor (~0.5s fiecare) costa mai mult decat castigul
+PROCESS_POOL_MIN_TEXTS = 10_000
+
+
+class EmbeddingBatchError(Exception):
+    """Un lot a eșuat definitiv, după epuizarea reîncercărilor."""
+
+    def __init__(self, batch_index: int, attempts: int, cause: Exception):
+        super().__init__(f"Lotul {batch_index + 1} a eșuat după {attempts} încercări: {cause}")
+        self.batch_index = batch_index
+        self.attempts = attempts
+        self.cause = cause
+
+
+class TokenBucket:
+    """Limitator de rată thread-safe: `rate` jetoane/secundă, rafală de `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Blochează până când sunt disponibile `tokens` jetoane."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Recunoaște erorile de tip 429 / RESOURCE_EXHAUSTED (Gemini sau clienți locali)."""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+def backoff_delay(attempt: int, rate_limited: bool = False,
+                  base: float = BACKOFF_BASE_SECONDS, maximum: float = BACKOFF_MAX_SECONDS) -> float:
+    """Backoff exponențial cu jitter; erorile 429 așteaptă dublu."""
+    delay = base * (2 ** (attempt - 1))
+    if rate_limited:
+        delay *= 2
+    return min(maximum, delay) * random.uniform(0.5, 1.0)
+
+
+def embed_batches(batches: list[list[str]], embed_fn, max_workers: int = MAX_WORKERS,
+                  bucket: TokenBucket | None = None, max_retries: int = MAX_RETRIES,
+                  backoff_base: float = BACKOFF_BASE_SECONDS):
+    """
+    Trimite loturile concurent printr-un thread pool și le returnează pe măsură
+    ce se termină (generator de `(index_lot, vectori)`), nu în ordinea trimiterii.
+
+    `embed_fn(texte) -> vectori` este apelată din thread-urile pool-ului; fiecare
+    apel consumă un jeton din `bucket`. Un lot eșuat este reîncercat cu backoff
+    exponențial; după `max_retries` reîncercări se aruncă EmbeddingBatchError,
+    iar loturile deja returnate rămân valide. Celelalte loturi se opresc atunci
+    (nu mai încep încercări și ies din așteptarea backoff-ului), deci eroarea
+    ajunge imediat la apelant.
+    """
+    if bucket is None:
+        bucket = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+    # Setat cand generatorul se inchide (lot esuat definitiv sau apelantul a renuntat)
+    stop = threading.Event()
+
+    def run_batch(batch_index: int):
+        batch = batches[batch_index]
+        attempt = 0
+        while True:
+            if stop.is_set():
+                return None
+            attempt += 1
+            bucket.acquire()
+            start = time.perf_counter()
+            try:
+                vectors = embed_fn(batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(f"API-ul a returnat {len(vectors)} vectori pentru {len(batch)} texte.")
+                return batch_index, vectors, time.perf_counter() - start, attempt
+            except Exception as e:
+                if attempt > max_retries:
+                    raise EmbeddingBatchError(batch_index, attempt, e) from e
+                rate_limited = is_rate_limit_error(e)
+                delay = backoff_delay(attempt, rate_limited, base=backoff_base)
+                reason = "limită de rată (429)" if rate_limited else str(e)
+                print(f"  > [WARN] Lotul {batch_index + 1}: {reason}; reîncerc în {delay:.1f}s (încercarea {attempt}/{max_retries})")
+                if stop.wait(delay):
+                    return None
+
+    total_items = sum(len(b) for b in batches)
+    done_items = 0
+    wall_start = time.perf_counter()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = [pool.submit(run_batch, i) for i in range(len(batches))]
+        for future in as_completed(futures):
+            batch_index, vectors, elapsed, attempts = future.result()
+            done_items += len(vectors)
+            telemetry.observe("ingestie.lot", elapsed)
+            telemetry.increment("ingestie.segmente", len(vectors))
+            telemetry.increment("ingestie.reincercari", attempts - 1)
+            rate = len(vectors) / elapsed if elapsed > 0 else float("inf")
+            print(f"  > Lot {batch_index + 1}/{len(batches)}: {len(vectors)} segmente în {elapsed:.2f}s "
+                  f"({rate:.1f} seg/s, încercări: {attempts}) - progres {done_items}/{total_items}")
+            yield batch_index, vectors
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    wall = time.perf_counter() - wall_start
+    if batches:
+        print(f"  > Ingestie finalizată: {total_items} segmente în {wall:.2f}s ({total_items / wall:.1f} seg/s).")
+
+
+# Furnizorul din procesul de ingestie (setat o singura data, la pornirea procesului)
+_worker_provider = None
+
+
+def _init_embedding_worker(provider):
+    global _worker_provider
+    _worker_provider = provider
+
+
+def _embed_in_worker(texts: list[str], task_type: str) -> list[list[float]]:
+    return _worker_provider.embed(texts, task_type)
+
+
+class ProcessPoolEmbedder:
+    """
+    `embed_fn` pentru embed_batches care calculează vectorii într-un pool de
+    procese: furnizorii care lucrează pe CPU, în Python, nu se pot paraleliza
+    pe thread-uri (GIL). Furnizorul este trimis (pickle) fiecărui proces o
+    singură dată; procesele sunt pornite cu "spawn", fără starea procesului
+    părinte (thread-uri, conexiuni).
+    """
+
+    def __init__(self, provider, task_type: str, processes: int):
+        self.task_type = task_type
+        self._pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_embedding_worker, initargs=(provider,))
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        return self._pool.submit(_embed_in_worker, texts, self.task_type).result()
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class MicroBatcher:
+    """
+    Grupează cererile individuale venite concurent din mai multe thread-uri într-un
+    singur apel `batch_fn(texte) -> rezultate`. Un thread de fundal așteaptă prima
+    cerere, mai strânge altele timp de `window_seconds` (sau până la `max_batch`),
+    apoi trimite lotul; fiecare apelant primește doar rezultatul său.
+    """
+
+    def __init__(self, batch_fn, window_seconds: float = 0.01, max_batch: int = 32):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def __call__(self, text: str, timeout: float | None = None):
+        """Blochează până când lotul care conține `text` a fost procesat."""
+        return self.submit(text).result(timeout)
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.window_seconds
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(pending)
+
+    def _flush(self, pending):
+        # Acelasi text cerut de mai multi clienti este trimis o singura data
+        unique_texts = list(dict.fromkeys(text for text, _ in pending))
+        # Orice eroare (inclusiv un numar gresit de rezultate) ajunge la apelanti:
+        # thread-ul de fundal nu trebuie sa moara, altfel cererile urmatoare asteapta la nesfarsit
+        try:
+            results = list(self.batch_fn(unique_texts))
+            if len(results) != len(unique_texts):
+                raise ValueError(f"Lotul a întors {len(results)} rezultate pentru {len(unique_texts)} texte.")
+            by_text = dict(zip(unique_texts, results))
+            self.batches += 1
+            self.items += len(pending)
+            for text, future in pending:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+if __name__ == '__main__':
+    # Demonstratie locala: client fals cu latenta si erori 429 injectate
+    from src.fakes import FakeEmbeddingClient
+
+    client = FakeEmbeddingClient(latency=0.2, rate_limit_probability=0.2)
+    texts = [f"Segment de test {i}" for i in range(1000)]
+    batches = [texts[i:i + 100] for i in range(0, len(texts), 100)]
+
+    def embed(batch):
+        response = client.models.embed_content(model="fake", contents=batch, config={})
+        return [e.values for e in response.embeddings]
+
+    results = dict(embed_batches(batches, embed, bucket=TokenBucket(rate=10, capacity=4), backoff_base=0.1))
+    print(f"Loturi finalizate: {len(results)}/{len(batches)}; apeluri către client: {client.calls}")
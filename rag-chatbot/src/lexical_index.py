@@ -0,0 +1,221 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+# --- Configuratii Cautare Lexicala (BM25) ---
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Constanta din Reciprocal Rank Fusion (valoarea standard din literatura)
+RRF_K = 60
+
+# Sedila (forma veche) -> virgula (forma corecta), ca "ş" si "ș" sa fie acelasi caracter
+_CEDILLA_TO_COMMA = str.maketrans({"ş": "ș", "Ş": "Ș", "ţ": "ț", "Ţ": "Ț"})
+
+_STOPWORDS = {
+    "a", "ai", "al", "ale", "am", "ar", "are", "as", "au", "ca", "care", "ce", "cu", "da", "dar",
+    "daca", "de", "din", "e", "este", "fi", "fie", "i", "il", "in", "la", "le", "lui", "mai",
+    "ma", "nu", "o", "ori", "pe", "pentru", "prin", "sa", "se", "si", "sau", "sunt", "un", "una",
+    "unei", "unui", "cel", "cea", "cei", "cele", "fara", "dupa", "catre", "sub",
+}
+
+# Sufixe flexionare frecvente (aplicate dupa eliminarea diacriticelor)
+_SUFFIXES = ("urilor", "ilor", "elor", "ului", "iile", "ile", "ele", "ul", "ii", "ei", "le", "a", "e", "i", "u")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_ARTICLE_REF_RE = re.compile(r"\b(?:articolul|articol|art)\b\.?\s*(\d+(?:\.\d+)?)")
+_POINT_REF_RE = re.compile(r"\b(?:punctul|pct)\b\.?\s*(\d+)")
+# Numerele actelor conteaza doar in forma completa ("195/2002"): singure sunt de obicei
+# viteze, sume sau ani ("prins cu 195 km/h")
+_SOURCE_HINTS = (
+    (re.compile(r"\b(?:hg|1391\s*/\s*2006|regulament\w*)\b"), "HG 1391/2006"),
+    (re.compile(r"\b(?:cod\w*\s+penal|286\s*/\s*2009)\b"), "Codul Penal"),
+    (re.compile(r"\b(?:oug|195\s*/\s*2002|ordonant\w*)\b"), "OUG 195/2002"),
+)
+
+
+class _StripDiacritics(dict):
+    """
+    Tabel pentru str.translate, completat la prima apariție a fiecărui caracter:
+    forma NFKD fără semnele diacritice. Rezultatul este identic cu normalizarea
+    întregului text, dar fără a parcurge textul caracter cu caracter în Python.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        decomposed = unicodedata.normalize("NFKD", chr(codepoint).translate(_CEDILLA_TO_COMMA))
+        value = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+        self[codepoint] = value
+        return value
+
+
+_STRIP_DIACRITICS = _StripDiacritics()
+# Radacinile deja calculate (vocabularul corpusului este mic; limita protejeaza serverul)
+_stems = {}
+_STEM_CACHE_MAX = 100_000
+
+
+def normalize_text(text: str) -> str:
+    """Unifică sedila/virgula (ş/ș, ţ/ț), elimină diacriticele și trece la litere mici."""
+    return text.translate(_STRIP_DIACRITICS).lower()
+
+
+def _stem(token: str) -> str:
+    stem = _stems.get(token)
+    if stem is not None:
+        return stem
+    stem = token
+    if not token[0].isdigit() and len(token) > 4:
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+                stem = token[:-len(suffix)]
+                break
+    if len(_stems) < _STEM_CACHE_MAX:
+        _stems[token] = stem
+    return stem
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(tok) for tok in _TOKEN_RE.findall(normalize_text(text)) if tok not in _STOPWORDS]
+
+
+def parse_article_reference(query: str):
+    """
+    Detectează o referință explicită la un articol ("art. 102", "articolul 80.1 din HG").
+    Returnează (articol, sursa sau None, punct sau None) ori None.
+    """
+    normalized = normalize_text(query)
+    match = _ARTICLE_REF_RE.search(normalized)
+    if not match:
+        return None
+    sources = mentioned_sources(query)
+    source = sources[0] if sources else None
+    point_match = _POINT_REF_RE.search(normalized)
+    return match.group(1), source, point_match.group(1) if point_match else None
+
+
+def mentioned_sources(query: str) -> list[str]:
+    """Sursele numite explicit în întrebare ("din HG", "codul penal"), în ordinea de prioritate."""
+    normalized = normalize_text(query)
+    return [source_name for pattern, source_name in _SOURCE_HINTS if pattern.search(normalized)]
+
+
+def base_article(article: str) -> str:
+    """'102 (pct 1.)' -> '102'"""
+    return article.split(" ", 1)[0]
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = RRF_K) -> list[tuple[str, float]]:
+    """Combină mai multe clasamente de ID-uri: scor = Σ 1 / (k + rang)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """
+    Index inversat în memorie (BM25) peste segmentele din load_and_chunk_data,
+    plus un index direct pe metadatele `sursa`/`articol` pentru referințe explicite.
+    """
+
+    def __init__(self, chunks_list: list[str], metadata_list: list[dict], document_ids: list[str],
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.texts = chunks_list
+        self.metadatas = metadata_list
+        self.ids = document_ids
+        self.k1 = k1
+        self.b = b
+        self._position = {doc_id: i for i, doc_id in enumerate(document_ids)}
+
+        self._postings = {}
+        self._doc_len = []
+        for doc_index, text in enumerate(chunks_list):
+            counts = Counter(tokenize(text))
+            self._doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc_index, tf))
+
+        n_docs = len(chunks_list)
+        self._avg_len = (sum(self._doc_len) / n_docs) if n_docs else 0.0
+        self._idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        # Normalizarea de lungime a fiecarui document (constanta intre cautari)
+        self._norms = [self.k1 * (1 - self.b + self.b * length / self._avg_len) for length in self._doc_len]
+        # Listele inversate ale fiecarei surse (construite la prima cautare limitata la ea);
+        # IDF-ul si lungimea medie raman cele globale, deci scorurile sunt aceleasi
+        self._source_postings = {}
+
+        # Sursele corpusului, in ordinea aparitiei (shard-urile colectiei segmentate pe surse)
+        self.sources = list(dict.fromkeys(meta.get("sursa") for meta in metadata_list))
+
+        self._articles = {}
+        for doc_index, meta in enumerate(metadata_list):
+            article = base_article(meta.get("articol", "N/A"))
+            self._articles.setdefault((meta.get("sursa"), article), []).append(doc_index)
+            self._articles.setdefault((None, article), []).append(doc_index)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 10, sources=None) -> list[tuple[str, float]]:
+        """Top-k (id, scor BM25) pentru întrebare; cu `sources`, doar segmentele din acele surse."""
+        indexes = [self._postings] if sources is None else [self._postings_for(source) for source in sources]
+        norms = self._norms
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for postings_index in indexes:
+                for doc_index, tf in postings_index.get(term, ()):
+                    scores[doc_index] = scores.get(doc_index, 0.0) + idf * tf * (self.k1 + 1) / (tf + norms[doc_index])
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.ids[doc_index], score) for doc_index, score in best]
+
+    def _postings_for(self, source: str) -> dict:
+        """Listele inversate restrânse la segmentele sursei (calculate o singură dată)."""
+        postings_index = self._source_postings.get(source)
+        if postings_index is None:
+            in_source = [meta.get("sursa") == source for meta in self.metadatas]
+            postings_index = {}
+            for term, postings in self._postings.items():
+                kept = [posting for posting in postings if in_source[posting[0]]]
+                if kept:
+                    postings_index[term] = kept
+            self._source_postings[source] = postings_index
+        return postings_index
+
+    def lookup_article(self, article: str, source: str | None = None, point: str | None = None,
+                       limit: int = 10) -> list[str]:
+        """ID-urile segmentelor unui articol, în ordinea din corpus (fără embedding)."""
+        positions = self._articles.get((source, article), [])
+        if point is not None:
+            marker = f"(pct {point}.)"
+            with_point = [i for i in positions if self.metadatas[i].get("articol", "").endswith(marker)]
+            positions = with_point or positions
+        return [self.ids[i] for i in positions[:limit]]
+
+    def get_chunk(self, doc_id: str) -> dict | None:
+        position = self._position.get(doc_id)
+        if position is None:
+            return None
+        return {"id": doc_id, "text": self.texts[position], "metadata": self.metadatas[position]}
+
+
+# Indexurile lexicale, asociate colectiilor ChromaDB dupa nume
+_indexes = {}
+
+
+def register_index(collection_name: str, index: LexicalIndex):
+    _indexes[collection_name] = index
+
+
+def unregister_index(collection_name: str):
+    _indexes.pop(collection_name, None)
+
+
+def get_index(collection_name: str) -> LexicalIndex | None:
+    return _indexes.get(collection_name)
@@ -0,0 +1,381 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from src.quantization import QUANTIZATION_MODES, approximate_scores, memory_bytes, quantize
+
+# --- Configuratii Stocare NumPy ---
+NUMPY_DB_PATH = "numpy_db"
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+# Cu vectori cuantizati: cati candidati (k * factor) sunt re-scorati cu vectorii compleți
+RESCORE_FACTOR = 4
+
+_INCLUDE_DEFAULT = ("documents", "metadatas", "distances")
+
+
+def _normalize_rows(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _condition_matches(value, condition) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == "$eq" and value != operand:
+            return False
+        if operator == "$ne" and value == operand:
+            return False
+        if operator == "$in" and value not in operand:
+            return False
+        if operator == "$nin" and value in operand:
+            return False
+    return True
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """Filtrul `where` în sintaxa ChromaDB ($eq, $ne, $in, $nin, $and, $or)."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif not _condition_matches(metadata.get(key), condition):
+            return False
+    return True
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Pozițiile celor mai mari `k` scoruri, descrescător (argpartition + sortarea doar a lor)."""
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+    return np.argsort(-scores, kind="stable")[:k]
+
+
+class NumpyCollection:
+    """
+    Colecție vectorială în memorie, cu căutare exactă (forță brută), compatibilă
+    cu subsetul din API-ul ChromaDB folosit de vector_db_manager: count, get, add,
+    upsert, delete și query (inclusiv mai multe întrebări într-un singur apel și
+    filtrare pe metadate cu `where`).
+
+    Vectorii sunt normalizați (float32), deci produsul scalar este similaritatea
+    cosinus; distanțele returnate sunt L2 la pătrat (2 - 2*cos), ca în ChromaDB.
+    Pe disc: vectors.npy (încărcat memory-mapped, pornire aproape instantanee) și
+    metadata.json cu ID-urile, textele și metadatele. upsert și delete modifică
+    doar memoria; flush() scrie colecția o singură dată, la finalul ingestiei.
+
+    Cu `quantization` "int8" sau "binary", în memorie stau doar codurile cuantizate
+    (src.quantization); ele aleg `k * rescore_factor` candidați, re-scorați apoi
+    exact cu vectorii compleți, citiți din fișierul memory-mapped. Până la flush(),
+    modificările nesalvate sunt căutate exact, fără coduri.
+    """
+
+    def __init__(self, name: str, path: str = NUMPY_DB_PATH, quantization: str = "none",
+                 rescore_factor: int = RESCORE_FACTOR):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Mod de cuantizare necunoscut: '{quantization}' (folosiți unul din {QUANTIZATION_MODES}).")
+        self.name = name
+        self.path = os.path.join(path, name)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        # Metadatele colectiei (ca `collection.metadata` din ChromaDB)
+        self.metadata = None
+        # Starea este inlocuita in bloc la fiecare modificare, ca interogarile
+        # concurente sa vada mereu ID-uri, texte, vectori si coduri consistente
+        self._state = ([], [], [], None, None)
+        self._positions = {}
+        self._mask_cache = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Persistenta ---
+
+    def _load(self):
+        metadata_path = os.path.join(self.path, METADATA_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if not os.path.exists(metadata_path):
+            return
+        try:
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            vectors = np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+        except (OSError, ValueError) as e:
+            print(f"[NumPy Store] Nu am putut încărca colecția '{self.name}', pornesc goală: {e}")
+            return
+
+        ids, documents, metadatas = data["ids"], data["documents"], data["metadatas"]
+        self.metadata = data.get("collection_metadata")
+        if not ids:
+            return
+        if vectors is None or len(vectors) != len(ids):
+            print(f"[NumPy Store] Colecția '{self.name}' este incompletă pe disc, pornesc goală.")
+            return
+        self._set_state(ids, documents, metadatas, vectors, self._load_quantized(vectors))
+
+    def _quantized_path(self, part: str) -> str:
+        return os.path.join(self.path, f"{part}_{self.quantization}.npy")
+
+    def _load_quantized(self, vectors) -> dict | None:
+        """Codurile salvate pentru modul curent; dacă lipsesc, sunt calculate o dată și salvate."""
+        if self.quantization == "none" or not len(vectors):
+            return None
+        parts = ("codes", "scales") if self.quantization == "int8" else ("codes",)
+        try:
+            quantized = {part: np.load(self._quantized_path(part)) for part in parts}
+            if all(len(array) == len(vectors) for array in quantized.values()):
+                return quantized
+        except (OSError, ValueError):
+            pass
+        quantized = quantize(vectors, self.quantization)
+        self._save_quantized(quantized)
+        return quantized
+
+    def _save_quantized(self, quantized: dict | None):
+        for part, array in (quantized or {}).items():
+            part_path = self._quantized_path(part)
+            with open(part_path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(part_path + ".tmp", part_path)
+
+    def _save(self, ids, documents, metadatas, vectors):
+        """Salvează colecția și returnează (vectori memory-mapped, coduri cuantizate)."""
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        quantized = quantize(vectors, self.quantization) if vectors is not None else None
+        # Scriere atomica: vectorii si codurile intai, apoi metadatele care ii descriu
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32))
+        os.replace(vectors_path + ".tmp", vectors_path)
+        self._save_quantized(quantized)
+        # Codurile altor moduri nu mai corespund vectorilor; vor fi recalculate la nevoie
+        for filename in os.listdir(self.path):
+            if filename.startswith(("codes_", "scales_")) and not filename.endswith(f"_{self.quantization}.npy"):
+                os.remove(os.path.join(self.path, filename))
+        self._write_metadata(ids, documents, metadatas)
+        # Vectorii compleți raman pe disc; in memorie pastram doar maparea fisierului
+        return (np.load(vectors_path, mmap_mode="r") if vectors is not None else None), quantized
+
+    def flush(self):
+        """Scrie pe disc modificările făcute de upsert/delete (o rescriere, oricâte loturi)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            ids, documents, metadatas, vectors, _ = self._state
+            vectors, quantized = self._save(ids, documents, metadatas, vectors)
+            self._set_state(ids, documents, metadatas, vectors, quantized)
+            self._dirty = False
+
+    def _write_metadata(self, ids, documents, metadatas):
+        os.makedirs(self.path, exist_ok=True)
+        metadata_path = os.path.join(self.path, METADATA_FILE)
+        with open(metadata_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "documents": documents, "metadatas": metadatas,
+                       "collection_metadata": self.metadata}, f, ensure_ascii=False)
+        os.replace(metadata_path + ".tmp", metadata_path)
+
+    def _set_state(self, ids, documents, metadatas, vectors, quantized=None):
+        self._state = (ids, documents, metadatas, vectors, quantized)
+        self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+        self._mask_cache = {}
+
+    # --- Scriere ---
+
+    def upsert(self, ids: list[str], embeddings, documents: list[str] | None = None,
+               metadatas: list[dict] | None = None):
+        new_vectors = _normalize_rows(embeddings)
+        documents = documents if documents is not None else [""] * len(ids)
+        metadatas = metadatas if metadatas is not None else [{}] * len(ids)
+        with self._lock:
+            old_ids, old_documents, old_metadatas, old_vectors, _ = self._state
+            ids_out, documents_out, metadatas_out = list(old_ids), list(old_documents), list(old_metadatas)
+            vectors = np.array(old_vectors, dtype=np.float32) if old_vectors is not None and len(old_vectors) else None
+
+            appended = []
+            for row, doc_id in enumerate(ids):
+                position = self._positions.get(doc_id)
+                if position is None:
+                    appended.append(row)
+                    continue
+                documents_out[position] = documents[row]
+                metadatas_out[position] = metadatas[row]
+                vectors[position] = new_vectors[row]
+            if appended:
+                ids_out.extend(ids[row] for row in appended)
+                documents_out.extend(documents[row] for row in appended)
+                metadatas_out.extend(metadatas[row] for row in appended)
+                added = new_vectors[appended]
+                vectors = added if vectors is None else np.vstack([vectors, added])
+
+            # Fara rescrierea fisierelor la fiecare lot: ingestia ar deveni patratica in I/O
+            self._set_state(ids_out, documents_out, metadatas_out, vectors)
+            self._dirty = True
+
+    add = upsert
+
+    def modify(self, metadata: dict | None = None):
+        """Înlocuiește metadatele colecției (ca în ChromaDB)."""
+        with self._lock:
+            self.metadata = metadata
+            # Cu modificari nesalvate, metadatele sunt scrise de flush(), impreuna cu vectorii
+            if not self._dirty:
+                ids, documents, metadatas, _, _ = self._state
+                self._write_metadata(ids, documents, metadatas)
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None):
+        with self._lock:
+            old_ids, old_documents, old_metadatas, old_vectors, _ = self._state
+            removed = set(ids or [])
+            keep = [i for i, doc_id in enumerate(old_ids)
+                    if doc_id not in removed and not (where and matches_where(old_metadatas[i], where))]
+            if len(keep) == len(old_ids):
+                return
+            vectors = np.array(old_vectors[keep], dtype=np.float32) if keep else None
+            ids_out = [old_ids[i] for i in keep]
+            documents_out = [old_documents[i] for i in keep]
+            metadatas_out = [old_metadatas[i] for i in keep]
+            self._set_state(ids_out, documents_out, metadatas_out, vectors)
+            self._dirty = True
+
+    # --- Citire ---
+
+    def count(self) -> int:
+        return len(self._state[0])
+
+    def memory_stats(self) -> dict:
+        """Octeții ținuți în memorie pentru căutare față de vectorii compleți (de pe disc)."""
+        vectors, quantized = self._state[3], self._state[4]
+        full_bytes = vectors.nbytes if vectors is not None else 0
+        return {
+            "quantization": self.quantization,
+            "search_bytes": memory_bytes(quantized) if self.quantization != "none" else full_bytes,
+            "full_precision_bytes": full_bytes,
+        }
+
+    def get(self, ids: list[str] | None = None, where: dict | None = None, include=_INCLUDE_DEFAULT[:2]) -> dict:
+        all_ids, documents, metadatas, vectors, _ = self._state
+        if ids is not None:
+            positions = [self._positions[doc_id] for doc_id in ids if doc_id in self._positions]
+        else:
+            positions = range(len(all_ids))
+        if where:
+            positions = [i for i in positions if matches_where(metadatas[i], where)]
+        positions = list(positions)
+        return {
+            "ids": [all_ids[i] for i in positions],
+            "documents": [documents[i] for i in positions] if "documents" in include else None,
+            "metadatas": [metadatas[i] for i in positions] if "metadatas" in include else None,
+            "embeddings": np.asarray(vectors[positions]) if "embeddings" in include and vectors is not None else None,
+        }
+
+    def _where_mask(self, where: dict, metadatas: list[dict]) -> np.ndarray:
+        key = json.dumps(where, sort_keys=True)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter((matches_where(meta, where) for meta in metadatas), dtype=bool, count=len(metadatas))
+            self._mask_cache[key] = mask
+        return mask
+
+    def query(self, query_embeddings, n_results: int = 10, where: dict | None = None,
+              include=_INCLUDE_DEFAULT) -> dict:
+        """
+        Top-k pentru una sau mai multe întrebări (o singură înmulțire de matrice
+        pentru tot lotul); rezultatul are forma celui din ChromaDB. Fără cuantizare
+        căutarea este exactă; cu cuantizare, candidații aproximativi sunt re-scorați
+        cu vectorii compleți, deci scorurile (distanțele) returnate sunt tot exacte.
+        """
+        ids, documents, metadatas, vectors, quantized = self._state
+        queries = _normalize_rows(query_embeddings)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if vectors is None or not len(ids):
+            for key in result:
+                result[key] = [[] for _ in range(len(queries))]
+            return result
+
+        if quantized is not None:
+            scores = approximate_scores(queries, quantized, self.quantization)
+        else:
+            scores = queries @ vectors.T
+        candidates = scores.shape[1]
+        if where:
+            mask = self._where_mask(where, metadatas)
+            scores[:, ~mask] = -np.inf
+            candidates = int(mask.sum())
+        k = min(n_results, candidates)
+        n_candidates = min(candidates, k * self.rescore_factor) if quantized is not None else k
+
+        for query, row in zip(queries, scores):
+            top = _top_k(row, n_candidates)
+            if quantized is not None and len(top):
+                # Re-scorare exacta: doar randurile candidatilor sunt citite de pe disc
+                top = np.sort(top)
+                row = np.full(len(ids), -np.inf, dtype=np.float32)
+                row[top] = np.asarray(vectors[top]) @ query
+                top = _top_k(row, k)
+            result["ids"].append([ids[i] for i in top])
+            result["documents"].append([documents[i] for i in top] if "documents" in include else None)
+            result["metadatas"].append([metadatas[i] for i in top] if "metadatas" in include else None)
+            result["distances"].append((2.0 - 2.0 * row[top]).clip(min=0.0).tolist() if "distances" in include else None)
+        return result
+
+
+class NumpyClient:
+    """Înlocuitor pentru chromadb.PersistentClient (doar metodele folosite aici)."""
+
+    def __init__(self, path: str = NUMPY_DB_PATH, quantization: str = "none"):
+        self.path = path
+        self.quantization = quantization
+
+    def get_or_create_collection(self, name: str) -> NumpyCollection:
+        return get_collection(name, self.path, self.quantization)
+
+    def delete_collection(self, name: str):
+        with _collections_lock:
+            for key in [key for key in _collections if key[:2] == (self.path, name)]:
+                del _collections[key]
+        directory = os.path.join(self.path, name)
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                if filename.endswith((".npy", ".json")):
+                    os.remove(os.path.join(directory, filename))
+
+
+# Colectiile sunt incarcate o singura data per proces
+_collections = {}
+_collections_lock = threading.Lock()
+
+
+def get_collection(name: str, path: str = NUMPY_DB_PATH, quantization: str = "none") -> NumpyCollection:
+    with _collections_lock:
+        collection = _collections.get((path, name, quantization))
+        if collection is None:
+            collection = _collections[(path, name, quantization)] = NumpyCollection(name, path, quantization)
+        return collection
+
+
+def flush_collection(collection):
+    """Persistă modificările amânate ale colecției (NumpyCollection); ChromaDB scrie imediat."""
+    flush = getattr(collection, "flush", None)
+    if flush is not None:
+        flush()
+
+
+def clear_collections():
+    """Uită colecțiile încărcate (după ștergerea directorului de pe disc)."""
+    with _collections_lock:
+        _collections.clear()
@@ -0,0 +1,65 @@
+"""
+Cuantizarea vectorilor de embedding pentru căutarea de candidați:
+
+  - int8   - fiecare vector scalat la [-127, 127] cu propriul factor (4x mai mic decât float32);
+  - binary - doar semnul fiecărei componente, împachetat pe biți (32x mai mic);
+             scorul aproximativ este minus distanța Hamming.
+
+Scorurile aproximative aleg candidații; ordinea finală vine din re-scorarea cu
+vectorii compleți (vezi NumpyCollection.query).
+"""
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+# Cate randuri sunt convertite simultan la float32 la scorarea int8: blocuri mici raman in
+# cache-ul procesorului (blocurile mari fac conversia mai lenta decat produsul insusi)
+INT8_BLOCK_ROWS = 512
+# Numarul de biti setati pentru fiecare valoare de octet (np.bitwise_count cere NumPy >= 2)
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors) -> tuple[np.ndarray, np.ndarray]:
+    """(coduri int8, factor de scală per rând) - vector ≈ cod * scală."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors) -> np.ndarray:
+    """Semnul fiecărei componente, 8 componente pe octet."""
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def quantize(vectors, mode: str) -> dict | None:
+    """Codurile pentru modul cerut, ca dict de matrici (salvate ca .npy separate)."""
+    if mode == "int8":
+        codes, scales = quantize_int8(vectors)
+        return {"codes": codes, "scales": scales}
+    if mode == "binary":
+        return {"codes": quantize_binary(vectors)}
+    return None
+
+
+def approximate_scores(queries: np.ndarray, quantized: dict, mode: str) -> np.ndarray:
+    """Scoruri aproximative (n_intrebari, n_documente); mai mare = mai apropiat."""
+    codes = quantized["codes"]
+    if mode == "int8":
+        scales = quantized["scales"]
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), INT8_BLOCK_ROWS):
+            block = codes[start:start + INT8_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = (queries @ block.T) * scales[start:start + len(block)]
+        return scores
+    if mode == "binary":
+        query_bits = quantize_binary(queries)
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for row, bits in enumerate(query_bits):
+            scores[row] = -_POPCOUNT[codes ^ bits].sum(axis=1, dtype=np.int32)
+        return scores
+    raise ValueError(f"Mod de cuantizare necunoscut: '{mode}' (folosiți unul din {QUANTIZATION_MODES}).")
+
+
+def memory_bytes(quantized: dict | None) -> int:
+    return sum(array.nbytes for array in quantized.values()) if quantized else 0
@@ -0,0 +1,68 @@
+"""
+Rutarea întrebărilor către sursele (shard-urile) relevante.
+
+O întrebare merge doar la o parte din surse când ruterul este sigur:
+  - întrebarea numește explicit sursa ("din HG 1391", "codul penal");
+  - altfel, votul BM25: dacă aproape tot scorul primelor articole găsite
+    lexical vine dintr-o singură sursă, întrebarea merge doar acolo.
+În rest (cazul obișnuit pentru OUG 195/2002 și HG 1391/2006, care tratează
+aceleași subiecte) întrebarea merge la toate sursele, iar rezultatele sunt
+combinate. O rutare greșită pierde articole, deci pragul este conservator.
+"""
+from collections import Counter
+
+from src.lexical_index import LexicalIndex, base_article, mentioned_sources
+
+# --- Configuratii Rutare ---
+# Cate articole distincte (primele dupa scorul BM25) voteaza sursa
+ROUTER_VOTES = 10
+# Sub atatea articole distincte votul nu este concludent (intrebari scurte / vagi)
+ROUTER_MIN_HITS = 5
+# Fractiunea din scorul BM25 pe care trebuie sa o stranga o singura sursa
+ROUTER_CONFIDENCE = 0.95
+# Rezultate BM25 cerute pentru vot (refolosite apoi la fuziunea cu cautarea vectoriala)
+ROUTER_CANDIDATES = 20
+
+
+def route_query(query: str, lexical_index: LexicalIndex | None, n_candidates: int = ROUTER_CANDIDATES):
+    """
+    Returnează (surse, rezultate_bm25): sursele în care trebuie căutată întrebarea
+    (None dacă ruterul nu este sigur și căutarea merge în toate) și primele
+    `n_candidates` rezultate BM25 din tot corpusul, dacă votul a fost necesar
+    (altfel None), ca apelantul să nu repete căutarea lexicală.
+    """
+    if lexical_index is None or len(lexical_index.sources) < 2:
+        return None, None
+
+    # 1. Sursa numita explicit
+    named = [source for source in mentioned_sources(query) if source in lexical_index.sources]
+    if named:
+        return (named if len(named) < len(lexical_index.sources) else None), None
+
+    # 2. Votul articolelor gasite lexical (fiecare articol o data, cu cel mai bun scor),
+    # ca punctele aceluiasi articol sa nu para un consens
+    hits = lexical_index.search(query, k=n_candidates)
+    best = {}
+    for doc_id, score in hits:
+        meta = lexical_index.get_chunk(doc_id)["metadata"]
+        article = (meta.get("sursa"), base_article(meta.get("articol", "")))
+        best.setdefault(article, score)
+    if len(best) < ROUTER_MIN_HITS:
+        return None, hits
+    mass = Counter()
+    for (source, _), score in list(best.items())[:ROUTER_VOTES]:
+        mass[source] += score
+    source, score = mass.most_common(1)[0]
+    total = sum(mass.values())
+    if total > 0 and score / total >= ROUTER_CONFIDENCE:
+        return [source], hits
+    return None, hits
+
+
+def source_filter(sources: list[str] | None) -> dict | None:
+    """Filtrul `where` (sintaxa ChromaDB) care limitează căutarea la sursele date."""
+    if not sources:
+        return None
+    if len(sources) == 1:
+        return {"sursa": sources[0]}
+    return {"sursa": {"$in": list(sources)}}
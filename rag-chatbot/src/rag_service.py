@@ -1,18 +1,113 @@
+import contextvars
+import os
 import sys
-from google import genai
-from src.data_processor import load_and_chunk_data
-from src.vector_db_manager import create_or_update_db, retrieve_chunks, clear_db
-import ollama
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from src import telemetry
+from src.data_processor import corpus_fingerprint, load_and_chunk_data
+from src.vector_db_manager import create_or_update_db, open_current_db, retrieve_chunks, clear_db, embed_query, get_index_fingerprint
+from src.answer_cache import get_answer_cache
+from src.context_builder import build_context, estimate_tokens, naive_context
+from src.conversation import ConversationSession
+from src.embedding_cache import normalize_query
+from src.embedding_providers import get_embedding_provider
+from src.lexical_index import get_index as get_lexical_index, parse_article_reference, reciprocal_rank_fusion
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # --- Configuratii LLM Local ---
 GENERATION_MODEL = 'gemma2:9b' # Modelul de chat
+GENERATION_ERROR_PREFIX = "Eroare generare locală"
+# Cat timp ramane modelul incarcat in Ollama dupa ultima cerere
+OLLAMA_KEEP_ALIVE = os.getenv("RAG_OLLAMA_KEEP_ALIVE", "30m")
+# Incarca modelul in Ollama in fundal la pornire, ca prima intrebare sa nu astepte dupa el
+PREWARM_LLM = os.getenv("RAG_PREWARM", "1").lower() not in ("0", "nu", "no", "false")
+# Backend-ul de chat (implicit ollama.chat) si limita de apeluri simultane catre el
+_chat_backend = None
+_llm_semaphore = None
 
-def optimize_query_with_llm(user_query: str) -> str:
+# --- Asamblarea contextului ---
+# Comaseaza punctele aceluiasi articol, elimina duplicatele si respecta bugetul de tokeni
+# (src.context_builder); False = toate segmentele regasite, integral
+CONTEXT_PACKING = True
+
+# --- Cautare speculativa ---
+# Porneste cautarea pe intrebarea bruta in paralel cu reformularea LLM
+SPECULATIVE_RETRIEVAL = True
+# Peste acest scor (similaritate cosinus) al primului rezultat brut, reformularea este omisa
+SKIP_REWRITE_SCORE = 0.80
+_rewrite_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rewrite")
+_rewrite_stats = {"count": 0, "total": 0.0}
+# Istoricul masuratorilor de generare (timp pana la primul token, tokeni/s)
+_generation_stats = deque(maxlen=1000)
+_rewrite_stats_lock = threading.Lock()
+
+def set_chat_backend(chat_fn):
+    """
+    Înlocuiește `ollama.chat` (aceeași semnătură: model, messages, stream) - de
+    exemplu cu un backend local simulat din src.fakes. None revine la Ollama.
+    """
+    global _chat_backend
+    _chat_backend = chat_fn
+
+def set_llm_concurrency(max_calls: int | None):
+    """Limitează numărul de apeluri simultane către LLM (None = nelimitat)."""
+    global _llm_semaphore
+    _llm_semaphore = threading.BoundedSemaphore(max_calls) if max_calls else None
+
+@contextmanager
+def llm_slot():
+    """
+    Ocupă un loc din limita de concurență către LLM pe durata blocului;
+    produce cât s-a așteptat locul (secunde - coada la LLM sub încărcare).
+    """
+    semaphore = _llm_semaphore
+    if semaphore is None:
+        yield 0.0
+        return
+    start = time.perf_counter()
+    with semaphore:
+        waited = time.perf_counter() - start
+        telemetry.observe("llm.asteptare", waited)
+        yield waited
+
+def _llm_chat(**kwargs):
+    if _chat_backend is not None:
+        return _chat_backend(**kwargs)
+    # Importat la primul apel: pornirea (si backend-urile simulate) nu platesc importul
+    import ollama
+    return ollama.chat(keep_alive=OLLAMA_KEEP_ALIVE, **kwargs)
+
+def prewarm_llm() -> threading.Thread | None:
+    """
+    Încarcă modelul de generare în Ollama pe un fir de fundal (o cerere fără
+    mesaje doar încarcă modelul și îl ține în memorie OLLAMA_KEEP_ALIVE).
+    Nu face nimic dacă backend-ul de chat a fost înlocuit (set_chat_backend).
+    """
+    if _chat_backend is not None:
+        return None
+
+    def warm_up():
+        start = time.perf_counter()
+        try:
+            _llm_chat(model=GENERATION_MODEL, messages=[])
+            telemetry.observe("llm.preincarcare", time.perf_counter() - start)
+        except Exception as e:
+            print(f"[WARN] Preîncărcarea modelului '{GENERATION_MODEL}' a eșuat: {e}")
+
+    thread = threading.Thread(target=warm_up, name="llm-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+def optimize_query_with_llm(user_query: str, cancel_event: threading.Event | None = None) -> str:
     """
     Reformulează întrebarea folosind LLM local.
+    Cu `cancel_event`, răspunsul este citit în flux și cererea este abandonată
+    (Ollama oprește generarea) imediat ce evenimentul este setat.
     """
     optimization_prompt = (
         "Ești un asistent specializat în legislația rutieră din România. "
@@ -26,20 +121,58 @@ def optimize_query_with_llm(user_query: str) -> str:
     )
     
     try:
-        response = ollama.chat(model=GENERATION_MODEL, messages=[
-            {'role': 'user', 'content': optimization_prompt}
-        ])
-        return response['message']['content'].strip()
+        with telemetry.span("rescriere") as rewrite_span:
+            if cancel_event is None:
+                with llm_slot():
+                    response = _llm_chat(model=GENERATION_MODEL, messages=[
+                        {'role': 'user', 'content': optimization_prompt}
+                    ])
+                _record_token_usage(response, rewrite_span)
+                return response['message']['content'].strip()
+
+            parts = []
+            with llm_slot():
+                if cancel_event.is_set():
+                    return user_query
+                stream = _llm_chat(model=GENERATION_MODEL, messages=[
+                    {'role': 'user', 'content': optimization_prompt}
+                ], stream=True)
+                try:
+                    for part in stream:
+                        if cancel_event.is_set():
+                            rewrite_span.set(anulata=True)
+                            return user_query
+                        parts.append(part['message']['content'])
+                        if _field(part, 'done'):
+                            _record_token_usage(part, rewrite_span)
+                finally:
+                    # Inchiderea fluxului inchide conexiunea HTTP, deci si generarea din Ollama
+                    close = getattr(stream, 'close', None)
+                    if close:
+                        close()
+            return "".join(parts).strip() or user_query
     except Exception as e:
         print(f"[WARN] Ollama error: {e}")
         return user_query
 
-def generate_response_with_llm(retrieved_chunks: list[dict], user_query: str) -> str:
+def _build_generation_messages(retrieved_chunks: list[dict], user_query: str,
+                               context_stats: dict | None = None,
+                               history: list[dict] | None = None) -> tuple[list[dict], str]:
     """
-    Generează răspunsul final folosind Llama 3.2 local.
+    Mesajele pentru LLM și lista de surse citate (pentru subsolul răspunsului).
+    Statisticile asamblării contextului (tokeni estimați etc.) sunt puse în `context_stats`.
+    `history` (ConversationSession.history_messages) este pus între instrucțiuni și întrebare.
     """
-    context_text = "\n".join([f"[{chunk['articol']}]: {chunk['text']}" for chunk in retrieved_chunks])
-    citations = sorted(list(set([chunk['articol'] for chunk in retrieved_chunks])))
+    if CONTEXT_PACKING:
+        context_text, used_chunks, packing_stats = build_context(retrieved_chunks)
+        telemetry.increment("context.tokeni_economisiti", packing_stats["tokeni_economisiti"])
+    else:
+        context_text, used_chunks = naive_context(retrieved_chunks), retrieved_chunks
+        packing_stats = {"segmente": len(retrieved_chunks), "segmente_folosite": len(retrieved_chunks)}
+    if context_stats is not None:
+        context_stats.update(packing_stats)
+        context_stats["tokeni_istoric"] = sum(estimate_tokens(m['content']) for m in history or [])
+    citations = sorted(list(set([chunk['articol'] for chunk in used_chunks])))
     citations_str = ", ".join(citations[:5]) 
 
     system_prompt = (
@@ -52,63 +185,435 @@ def generate_response_with_llm(retrieved_chunks: list[dict], user_query: str) ->
     )
     
     user_message = f"CONTEXT LEGISLATIV:\n---\n{context_text}\n---\n\nÎNTREBARE UTILIZATOR: {user_query}\n\nRĂSPUNS:"
-    
+    messages = [
+        {'role': 'system', 'content': system_prompt},
+        *(history or []),
+        {'role': 'user', 'content': user_message}
+    ]
+    return messages, citations_str
+
+def _field(part, key):
+    """Citește un câmp din răspunsul Ollama (dict sau obiect ChatResponse)."""
+    return part[key] if key in part else None
+
+def _record_token_usage(part, span=None):
+    """Contoarele de tokeni din ultimul mesaj Ollama (cel cu done=True)."""
+    prompt_tokens = _field(part, 'prompt_eval_count') or 0
+    completion_tokens = _field(part, 'eval_count') or 0
+    telemetry.increment("tokens.prompt", prompt_tokens)
+    telemetry.increment("tokens.completion", completion_tokens)
+    if span is not None:
+        span.set(tokens_prompt=prompt_tokens, tokens_completie=completion_tokens)
+
+def generate_response_stream(retrieved_chunks: list[dict], user_query: str, stats: dict | None = None,
+                             history: list[dict] | None = None, cancel_event: threading.Event | None = None):
+    """
+    Varianta în flux a lui generate_response_with_llm: produce bucățile de text pe
+    măsură ce sosesc de la Ollama, apoi subsolul cu sursele "(Surse: ...)".
+    Măsoară timpul până la primul token și viteza de generare (tokeni/s); valorile
+    sunt puse în `stats` (dacă e dat) și în istoricul din get_generation_stats().
+    Dacă generarea eșuează (chiar după primii tokeni), ultima bucată este mesajul
+    de eroare, iar `stats["eroare"]` este setat: răspunsul parțial nu trebuie
+    păstrat (cache, istoricul conversației).
+    `history` sunt mesajele anterioare ale conversației (deja încadrate în buget).
+    Cu `cancel_event` setat (ex: timeout în server), generarea se oprește înainte
+    de apelul către LLM sau la următorul token, ca o eroare de generare.
+    """
+    with telemetry.span("asamblare_context", segmente=len(retrieved_chunks)) as context_span:
+        context_stats = {}
+        messages, citations_str = _build_generation_messages(retrieved_chunks, user_query, context_stats, history)
+        context_span.set(caractere=sum(len(m['content']) for m in messages),
+                         segmente_folosite=context_stats["segmente_folosite"],
+                         tokeni_context=context_stats.get("tokeni_context"),
+                         tokeni_istoric=context_stats["tokeni_istoric"])
+    stats = {} if stats is None else stats
+    start = time.perf_counter()
+    first_token_at = None
+    pieces = 0
+    eval_count = eval_duration = prompt_tokens = None
+
+    generation_span = telemetry.span("generare")
     try:
-        response = ollama.chat(model=GENERATION_MODEL, messages=[
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': user_message}
-        ])
-        
-        final_answer = response['message']['content']
-        if final_answer:
-             final_answer += f"\n\n(Surse: {citations_str})"
-        return final_answer
+        with generation_span, llm_slot() as slot_wait:
+            stats["asteptare_llm"] = slot_wait
+            generation_span.set(asteptare_llm=slot_wait)
+            _raise_if_cancelled(cancel_event, generation_span)
+            stream = _llm_chat(model=GENERATION_MODEL, messages=messages, stream=True)
+            try:
+                for part in stream:
+                    _raise_if_cancelled(cancel_event, generation_span)
+                    content = part['message']['content']
+                    if content:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                            generation_span.set(ttft=first_token_at - start)
+                        pieces += 1
+                        yield content
+                    if _field(part, 'done'):
+                        eval_count = _field(part, 'eval_count')
+                        eval_duration = _field(part, 'eval_duration')
+                        prompt_tokens = _field(part, 'prompt_eval_count')
+                        _record_token_usage(part, generation_span)
+            finally:
+                # Inchiderea fluxului inchide conexiunea HTTP, deci si generarea din Ollama
+                close = getattr(stream, 'close', None)
+                if close:
+                    close()
     except Exception as e:
-        return f"Eroare generare locală: {e}"
+        stats["eroare"] = str(e)
+        telemetry.increment("generare.erori")
+        yield f"{GENERATION_ERROR_PREFIX}: {e}"
+        return
+
+    end = time.perf_counter()
+    if first_token_at is None:
+        return
+    telemetry.observe("generare.ttft", first_token_at - start)
+    yield f"\n\n(Surse: {citations_str})"
+
+    # Ollama raporteaza numarul exact de tokeni si durata (ns); altfel estimam din bucati
+    tokens = eval_count or pieces
+    if eval_count and eval_duration:
+        tokens_per_second = eval_count / (eval_duration / 1e9)
+    else:
+        tokens_per_second = tokens / (end - first_token_at) if end > first_token_at else 0.0
+    stats.update({
+        "ttft": first_token_at - start,
+        "tokens": tokens,
+        "tokens_per_second": tokens_per_second,
+        "durata": end - start,
+        "prompt_tokens": prompt_tokens,
+        "segmente_context": context_stats["segmente_folosite"],
+        "tokeni_istoric": context_stats["tokeni_istoric"],
+    })
+    _generation_stats.append(dict(stats))
+
+def generate_response_with_llm(retrieved_chunks: list[dict], user_query: str, stats: dict | None = None,
+                               history: list[dict] | None = None, cancel_event: threading.Event | None = None) -> str:
+    """
+    Generează răspunsul final folosind Llama 3.2 local.
+    """
+    return "".join(generate_response_stream(retrieved_chunks, user_query, stats, history, cancel_event))
+
+def _raise_if_cancelled(cancel_event: threading.Event | None, span=None):
+    if cancel_event is not None and cancel_event.is_set():
+        if span is not None:
+            span.set(anulata=True)
+        raise TimeoutError("cererea a fost anulată")
+
+def get_generation_stats() -> list[dict]:
+    """Ultimele măsurători de generare (ttft, tokens, tokens_per_second, durata, prompt_tokens, segmente_context, tokeni_istoric)."""
+    return list(_generation_stats)
+
+def retrieve_speculatively(collection, user_input: str, k_results: int, timings: dict) -> list[dict]:
+    """
+    Pornește căutarea pe întrebarea brută în același timp cu reformularea LLM.
+    Dacă rezultatele brute sunt suficient de sigure (scor >= SKIP_REWRITE_SCORE),
+    reformularea este anulată; altfel, rezultatele celor două căutări sunt
+    combinate (RRF) și deduplicate.
+    """
+    print(" 🦙🔍 (Gândesc și caut în paralel...)")
+    cancel_event = threading.Event()
+    start = time.perf_counter()
+
+    def timed_rewrite():
+        rewrite_start = time.perf_counter()
+        result = optimize_query_with_llm(user_input, cancel_event=cancel_event)
+        elapsed = time.perf_counter() - rewrite_start
+        if not cancel_event.is_set():
+            _record_rewrite_duration(elapsed)
+        return result, elapsed
+
+    # Span-urile reformularii apartin aceluiasi trace, desi ruleaza in alt thread
+    rewrite_future = _rewrite_executor.submit(contextvars.copy_context().run, timed_rewrite)
+
+    raw_start = time.perf_counter()
+    try:
+        raw_chunks = retrieve_chunks(collection, user_input, k=k_results)
+    except Exception:
+        cancel_event.set()
+        raise
+    timings["cautare_bruta"] = time.perf_counter() - raw_start
+
+    top_score = max((c["score"] for c in raw_chunks if c.get("score") is not None), default=0.0)
+    if raw_chunks and top_score >= SKIP_REWRITE_SCORE:
+        cancel_event.set()
+        timings["rescriere_omisa"] = True
+        # Reformularea anulata ar fi durat, in medie, cat reformularile complete de pana acum
+        timings["economisit"] = _average_rewrite_duration()
+        print(f" ⚡ Rezultate sigure pe întrebarea brută (scor {top_score:.3f}) - sar peste reformulare.")
+        return raw_chunks
+
+    enhanced_query, rewrite_time = rewrite_future.result()
+    timings["rescriere"] = rewrite_time
+    if normalize_query(enhanced_query) == normalize_query(user_input):
+        # Reformularea nu a schimbat nimic: secvential am fi cautat aceeasi intrebare dupa rescriere
+        timings["economisit"] = max(0.0, rewrite_time + timings["cautare_bruta"] - (time.perf_counter() - start))
+        return raw_chunks
+
+    rewritten_start = time.perf_counter()
+    rewritten_chunks = retrieve_chunks(collection, enhanced_query, k=k_results)
+    timings["cautare_rescrisa"] = time.perf_counter() - rewritten_start
+
+    retrieved_chunks = merge_retrieved_chunks([rewritten_chunks, raw_chunks], k_results)
+    # Varianta secventiala ar fi costat rescriere + cautarea rescrisa (fara cautarea bruta,
+    # care exista doar in varianta speculativa); am platit timpul de perete
+    sequential = rewrite_time + timings["cautare_rescrisa"]
+    timings["economisit"] = max(0.0, sequential - (time.perf_counter() - start))
+    return retrieved_chunks
+
+def _record_rewrite_duration(seconds: float):
+    with _rewrite_stats_lock:
+        _rewrite_stats["count"] += 1
+        _rewrite_stats["total"] += seconds
+
+def _average_rewrite_duration() -> float:
+    with _rewrite_stats_lock:
+        return _rewrite_stats["total"] / _rewrite_stats["count"] if _rewrite_stats["count"] else 0.0
+
+def merge_retrieved_chunks(result_sets: list[list[dict]], k: int) -> list[dict]:
+    """Combină mai multe liste de segmente prin RRF, fără duplicate (după ID)."""
+    by_id = {}
+    for chunks in result_sets:
+        for chunk in chunks:
+            best = by_id.get(chunk["id"])
+            if best is None or (chunk.get("score") or 0.0) > (best.get("score") or 0.0):
+                by_id[chunk["id"]] = chunk
+    rankings = [[chunk["id"] for chunk in chunks] for chunks in result_sets]
+    return [by_id[doc_id] for doc_id, _ in reciprocal_rank_fusion(rankings)[:k]]
+
+def format_timings(timings: dict) -> str:
+    labels = [
+        ("rescriere", "rescriere"), ("cautare_bruta", "căutare brută"), ("cautare", "căutare"),
+        ("cautare_rescrisa", "căutare rescrisă"), ("generare", "generare"), ("total", "total"),
+    ]
+    parts = [f"{label} {timings[key]:.2f}s" for key, label in labels if isinstance(timings.get(key), float)]
+    if timings.get("rescriere_omisa"):
+        parts.insert(0, "rescriere omisă")
+    if timings.get("context_refolosit"):
+        parts.insert(0, "context refolosit")
+    if timings.get("economisit"):
+        parts.append(f"economisit ~{timings['economisit']:.2f}s")
+    if "primul_token" in timings:
+        parts.append(f"primul token {timings['primul_token']:.2f}s")
+        parts.append(f"{timings['tokeni_pe_secunda']:.1f} tok/s")
+    return " | ".join(parts)
 
 # --- FUNCTII MODUL INTERACTIV ---
 
-def initialize_rag_system():
+def _reindex_requested() -> bool:
+    """
+    Decizia de re-indexare când apelantul nu a dat-o explicit: variabila
+    RAG_REINDEX (da/nu), altfel întrebarea interactivă - doar dacă există un
+    terminal; fără terminal (servicii, scripturi) nu se re-indexează.
+    """
+    setting = os.getenv("RAG_REINDEX")
+    if setting is not None:
+        return setting.lower().strip() in ['da', 'y', 'yes', '1', 'true']
+    if not sys.stdin.isatty():
+        return False
+    answer = input("Dorești re-indexarea completă a bazei de date? (da/nu) [nu]: ").lower().strip()
+    return answer in ['da', 'y', 'yes']
+
+def initialize_rag_system(reindex: bool | None = None, prewarm: bool | None = None):
+    """
+    Încarcă corpusul și pregătește colecția. Cu `reindex=None` decizia vine din
+    RAG_REINDEX sau, într-un terminal, de la utilizator. Dacă manifestul arată
+    că indexul corespunde corpusului, segmentarea este omisă. Modelul Ollama este
+    preîncărcat în fundal (`prewarm`, implicit PREWARM_LLM).
+    """
     print("\n" + "="*60)
     print(" 🦙  INITIALIZARE AGENT RUTIER (LOCAL - OLLAMA)... ")
     print("="*60)
     
-    reindex = input("Dorești re-indexarea completă a bazei de date? (da/nu) [nu]: ").lower().strip()
+    if reindex is None:
+        reindex = _reindex_requested()
     
-    if reindex in ['da', 'y', 'yes']:
+    if reindex:
         print("... Ștergerea bazei de date vechi ...")
-        try:
-            from vector_db_manager import clear_db
-            clear_db()
-        except ImportError:
-            pass
+        clear_db()
 
-    print("... Încărcare date ...")
-    chunks_list, metadata_list, document_ids = load_and_chunk_data()
-    
-    if not chunks_list:
-        print("[EROARE] Nu s-au putut încărca datele.")
-        sys.exit(1)
+    if prewarm is None:
+        prewarm = PREWARM_LLM
+    if prewarm:
+        prewarm_llm()
+
+    corpus_hash = corpus_fingerprint()
+    collection = None if reindex else open_current_db(corpus_hash)
+    if collection is None:
+        print("... Încărcare date ...")
+        chunks_list, metadata_list, document_ids = load_and_chunk_data()
+
+        if not chunks_list:
+            print("[EROARE] Nu s-au putut încărca datele.")
+            sys.exit(1)
 
-    print(f"... Conectare la ChromaDB si Vectorizare Locală...")
-    collection = create_or_update_db(chunks_list, metadata_list, document_ids)
+        print(f"... Conectare la ChromaDB si Vectorizare Locală...")
+        collection = create_or_update_db(chunks_list, metadata_list, document_ids, corpus_hash=corpus_hash)
     
     print("\n✅ Sistem local pregătit!")
     return collection
 
-def process_query(collection, user_input, k_results=10): # K=10 e suficient pt Llama
-    print(" 🦙 (Gândesc...) Reformulez întrebarea...")
-    enhanced_query = optimize_query_with_llm(user_input)
-    
-    print(" 🔍 (Caut...) Analizez legislația...")
-    retrieved_chunks = retrieve_chunks(collection, enhanced_query, k=k_results)
-    
-    if not retrieved_chunks:
-        return "Nu am găsit articole relevante."
+def _prepare_answer(collection, user_input, k_results, use_cache, timings):
+    """
+    Etapele de dinaintea generării: cache de răspunsuri, reformulare și căutare.
+    Returnează (raspuns_din_cache, segmente, vectorul_intrebarii); exact unul dintre
+    primele două este completat (sau niciunul, dacă nu s-a găsit nimic).
+    """
+    answer_cache = get_answer_cache() if use_cache else None
+    question_vector = None
+    article_reference = parse_article_reference(user_input)
+    if answer_cache is not None:
+        answer_cache.ensure_fingerprint(get_index_fingerprint(collection))
+
+        # 1. Cache exact (intrebare normalizata)
+        cached_answer = answer_cache.lookup_exact(user_input)
+        if cached_answer is not None:
+            telemetry.increment("cache.raspunsuri.exact")
+            print(" ⚡ (Cache) Răspuns găsit pentru aceeași întrebare.")
+            return cached_answer, None, None
 
-    print(" ✍️  (Scriu...) Generez răspunsul...")
-    answer = generate_response_with_llm(retrieved_chunks, user_input)
-    return answer
+        # 2. Cache semantic (intrebare foarte apropiata ca sens); referintele
+        #    explicite la articole nu au nevoie de embedding
+        semantic_hit = None
+        if not article_reference:
+            try:
+                question_vector = embed_query(user_input)
+                semantic_hit = answer_cache.lookup_semantic(question_vector)
+            except Exception as e:
+                print(f"[WARN] Cache semantic indisponibil: {e}")
+        if semantic_hit is not None:
+            cached_answer, similarity = semantic_hit
+            telemetry.increment("cache.raspunsuri.semantic")
+            print(f" ⚡ (Cache) Răspuns refolosit pentru o întrebare similară ({similarity:.3f}).")
+            return cached_answer, None, None
+        telemetry.increment("cache.raspunsuri.miss")
+
+    if article_reference:
+        # Referinta explicita ("art. 102"): cautam direct, fara reformulare si embedding
+        print(" ⚡ (Caut...) Referință explicită la articol...")
+        retrieved_chunks = retrieve_chunks(collection, user_input, k=k_results)
+    elif SPECULATIVE_RETRIEVAL:
+        retrieved_chunks = retrieve_speculatively(collection, user_input, k_results, timings)
+    else:
+        print(" 🦙 (Gândesc...) Reformulez întrebarea...")
+        start = time.perf_counter()
+        enhanced_query = optimize_query_with_llm(user_input)
+        timings["rescriere"] = time.perf_counter() - start
+        
+        print(" 🔍 (Caut...) Analizez legislația...")
+        start = time.perf_counter()
+        retrieved_chunks = retrieve_chunks(collection, enhanced_query, k=k_results)
+        timings["cautare"] = time.perf_counter() - start
+
+    return None, retrieved_chunks, question_vector
+
+def _prepare_turn(collection, user_input, k_results, use_cache, timings, session):
+    """
+    Ca _prepare_answer, în contextul unei conversații (`session`, poate fi None):
+    continuările despre aceleași articole refolosesc segmentele întrebării
+    anterioară. Continuările nu trec prin cache-ul de răspunsuri (răspunsul
+    depinde de conversație). Returnează și `use_cache` efectiv și istoricul
+    pentru prompt: doar continuările îl primesc, deci răspunsurile întrebărilor
+    de sine stătătoare (singurele puse în cache) nu conțin nimic din conversație.
+    """
+    if session is None:
+        return (*_prepare_answer(collection, user_input, k_results, use_cache, timings), use_cache, None)
+
+    plan = session.plan(user_input, get_lexical_index(collection.name))
+    use_cache = use_cache and not plan["follow_up"]
+    history = session.history_messages() if plan["follow_up"] else None
+    if plan["chunks"] is not None:
+        timings["context_refolosit"] = True
+        telemetry.increment("conversatie.context_refolosit")
+        print(" ⚡ (Conversație) Continuare despre aceleași articole - refolosesc contextul.")
+        return None, plan["chunks"], None, use_cache, history
+    if plan["follow_up"]:
+        telemetry.increment("conversatie.continuare")
+    return (*_prepare_answer(collection, plan["query"], k_results, use_cache, timings), use_cache, history)
+
+def _finish_answer(user_input, answer, question_vector, use_cache, timings, query_start, generation_stats,
+                   history=None):
+    timings["generare"] = generation_stats.get("durata", 0.0)
+    timings["total"] = time.perf_counter() - query_start
+    if "asteptare_llm" in generation_stats:
+        timings["asteptare_llm"] = generation_stats["asteptare_llm"]
+    if "ttft" in generation_stats:
+        timings["primul_token"] = generation_stats["ttft"]
+        timings["tokeni_pe_secunda"] = generation_stats["tokens_per_second"]
+    if "eroare" in generation_stats:
+        timings["eroare_generare"] = True
+    # Un raspuns esuat (eventual partial, urmat de mesajul de eroare) nu ajunge in cache, nici
+    # unul generat cu istoricul unei conversatii (cache-ul este partajat intre sesiuni)
+    if use_cache and not history and answer and "eroare" not in generation_stats:
+        get_answer_cache().put(user_input, answer, question_vector)
+
+def _remember_turn(session, user_input, answer, retrieved_chunks, generation_stats=None):
+    if session is not None and answer and "eroare" not in (generation_stats or {}):
+        session.add_turn(user_input, answer, retrieved_chunks)
+
+def process_query(collection, user_input, k_results=10, use_cache=True, timings=None,
+                  session: ConversationSession | None = None,
+                  cancel_event: threading.Event | None = None): # K=10 e suficient pt Llama
+    """
+    Pipeline-ul complet pentru o întrebare. Dacă primește un dict `timings`,
+    îl completează cu durata (secunde) fiecărei etape. Cu `session`, întrebarea
+    face parte dintr-o conversație (src.conversation): istoricul intră în promptul
+    continuărilor, în limita bugetului de tokeni, iar schimbul este adăugat sesiunii.
+    `cancel_event` oprește generarea (apelantul a renunțat, ex: timeout).
+    """
+    timings = {} if timings is None else timings
+    with telemetry.trace("process_query", k=k_results, sesiune=session is not None) as query_span:
+        query_start = time.perf_counter()
+        cached_answer, retrieved_chunks, question_vector, use_cache, history = _prepare_turn(
+            collection, user_input, k_results, use_cache, timings, session)
+        query_span.set(din_cache=cached_answer is not None)
+        if cached_answer is not None:
+            _remember_turn(session, user_input, cached_answer, None)
+            return cached_answer
+
+        if not retrieved_chunks:
+            return "Nu am găsit articole relevante."
+
+        print(" ✍️  (Scriu...) Generez răspunsul...")
+        generation_stats = {}
+        answer = generate_response_with_llm(retrieved_chunks, user_input, generation_stats, history, cancel_event)
+        _finish_answer(user_input, answer, question_vector, use_cache, timings, query_start, generation_stats, history)
+        _remember_turn(session, user_input, answer, retrieved_chunks, generation_stats)
+        print(" ⏱  " + format_timings(timings))
+        return answer
+
+def process_query_stream(collection, user_input, k_results=10, use_cache=True, timings=None,
+                         session: ConversationSession | None = None):
+    """
+    Ca process_query, dar produce răspunsul bucată cu bucată (generator), pe
+    măsură ce LLM-ul generează tokenii. Răspunsurile din cache vin într-o singură bucată.
+    Duratele etapelor ajung în `timings` după ce generatorul a fost consumat.
+    """
+    timings = {} if timings is None else timings
+    with telemetry.trace("process_query", k=k_results, flux=True, sesiune=session is not None) as query_span:
+        query_start = time.perf_counter()
+        cached_answer, retrieved_chunks, question_vector, use_cache, history = _prepare_turn(
+            collection, user_input, k_results, use_cache, timings, session)
+        query_span.set(din_cache=cached_answer is not None)
+        if cached_answer is not None:
+            _remember_turn(session, user_input, cached_answer, None)
+            yield cached_answer
+            return
+
+        if not retrieved_chunks:
+            yield "Nu am găsit articole relevante."
+            return
+
+        print(" ✍️  (Scriu...) Generez răspunsul...")
+        generation_stats = {}
+        pieces = []
+        for piece in generate_response_stream(retrieved_chunks, user_input, generation_stats, history):
+            pieces.append(piece)
+            yield piece
+        answer = "".join(pieces)
+        _finish_answer(user_input, answer, question_vector, use_cache, timings, query_start, generation_stats, history)
+        _remember_turn(session, user_input, answer, retrieved_chunks, generation_stats)
 
 def start_interactive_chat():
     try:
@@ -118,14 +623,29 @@ def start_interactive_chat():
         return
 
     print("\n" + "!" * 60)
-    print(" MOD LOCAL ACTIVAT (Llama 3.2 + Nomic Embed)")
+    print(f" MOD LOCAL ACTIVAT ({GENERATION_MODEL} + embedding {get_embedding_provider().identity})")
+    print(" Comenzi: 'nou' - conversație nouă, 'exit' / 'q' - ieșire")
     print("!" * 60)
-    
+
+    session = ConversationSession("terminal")
     while True:
         try:
             user_input = input("\nTu: ").strip()
             if user_input.lower() in ['exit', 'q']: break
-            print("\nAgent:", process_query(collection, user_input))
+            if user_input.lower() in ['nou', 'reset']:
+                session.reset()
+                print(" (Conversație nouă.)")
+                continue
+            timings = {}
+            started = False
+            for piece in process_query_stream(collection, user_input, timings=timings, session=session):
+                if not started:
+                    print("\nAgent: ", end="", flush=True)
+                    started = True
+                print(piece, end="", flush=True)
+            print()
+            if "total" in timings:
+                print(" ⏱  " + format_timings(timings))
             print("-" * 60)
         except KeyboardInterrupt: break
 
@@ -0,0 +1,273 @@
+"""
+Serviciu HTTP asyncio, de lungă durată, în jurul pipeline-ului RAG.
+
+Corpusul și colecția sunt încărcate o singură dată la pornire; întrebările sunt
+servite concurent (process_query rulează într-un thread pool), cu limită de
+apeluri simultane către Ollama, timeout per cerere și micro-batching pentru
+vectorizarea întrebărilor. Cu `session_id`, întrebările aceluiași client formează
+o conversație (src.conversation), păstrată în memorie cu evacuare LRU/TTL.
+
+    python -m src.server --port 8000
+    python -m src.server --fake-backends      # fără Gemini/Ollama (backend-uri simulate)
+
+    curl -X POST localhost:8000/query -d '{"question": "Care este viteza maximă pe autostradă?"}'
+    curl -X POST localhost:8000/query -d '{"question": "Și pe drumurile naționale?", "session_id": "abc"}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src import rag_service, telemetry, vector_db_manager
+from src.answer_cache import get_answer_cache
+from src.conversation import get_session_store
+
+# --- Configuratii Server ---
+HOST = "127.0.0.1"
+PORT = 8000
+# Cate intrebari sunt procesate simultan (thread-uri pentru pipeline)
+MAX_WORKERS = 16
+# Cate cereri pot astepta / rula in acelasi timp; peste, serverul raspunde 503
+MAX_IN_FLIGHT = 64
+# Cate apeluri simultane catre Ollama (pe CPU, mai multe doar se incetinesc reciproc)
+MAX_CONCURRENT_LLM_CALLS = 2
+REQUEST_TIMEOUT_SECONDS = 120.0
+# Indexul si cache-urile construite cu backend-urile simulate (separate de cele reale)
+FAKE_DATA_DIR = "fake_backends"
+MAX_BODY_BYTES = 64 * 1024
+MAX_SESSION_ID_LENGTH = 128
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+            504: "Gateway Timeout"}
+
+
+class RagServer:
+    """Ține colecția încărcată și servește cereri HTTP/1.1 (JSON) concurent."""
+
+    def __init__(self, collection, max_workers: int = MAX_WORKERS, max_in_flight: int = MAX_IN_FLIGHT,
+                 request_timeout: float = REQUEST_TIMEOUT_SECONDS):
+        self.collection = collection
+        self.request_timeout = request_timeout
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.served = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-query")
+
+    # --- HTTP ---
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self.dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            await self._write_response(writer, 400, {"error": str(e)}, keep_alive=False)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise ValueError("Antet HTTP prea mare.")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise ValueError("Linie de cerere HTTP invalidă.")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Corpul cererii este prea mare.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    # --- Rute ---
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        if path == "/health":
+            return 200, {"status": "ok", "documents": self.collection.count()}
+        if path == "/stats":
+            return 200, self.stats()
+        if path == "/metrics":
+            return 200, telemetry.get_metrics()
+        if path == "/query":
+            if method != "POST":
+                return 405, {"error": "Folosiți POST."}
+            return await self.handle_query(body)
+        return 404, {"error": f"Ruta {path} nu există."}
+
+    async def handle_query(self, body: bytes) -> tuple[int, dict]:
+        try:
+            request = json.loads(body or b"{}")
+            question = str(request["question"]).strip()
+            k_results = int(request.get("k", 10))
+            session_id = request.get("session_id")
+            session_id = None if session_id is None else str(session_id).strip()
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": 'Corpul trebuie să fie JSON: {"question": "...", "k": 10, "session_id": "..."}.'}
+        if not question:
+            return 400, {"error": "Întrebarea este goală."}
+        if session_id is not None and not 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+            return 400, {"error": f"session_id trebuie să aibă între 1 și {MAX_SESSION_ID_LENGTH} caractere."}
+
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            return 503, {"error": "Serverul este ocupat, reîncercați."}
+
+        start = time.perf_counter()
+        timings = {}
+        session = get_session_store().get(session_id) if session_id is not None else None
+        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        work = loop.run_in_executor(self._executor, partial(
+            rag_service.process_query, self.collection, question, k_results, timings=timings,
+            session=session, cancel_event=cancel_event))
+        # Cererea ramane "in lucru" pana se termina thread-ul, nu doar pana la timeout:
+        # altfel MAX_IN_FLIGHT nu ar mai limita munca reala
+        self.in_flight += 1
+        work.add_done_callback(self._request_finished)
+        try:
+            answer = await asyncio.wait_for(asyncio.shield(work), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            # Generarea se opreste la urmatorul token si elibereaza locul la LLM
+            cancel_event.set()
+            self.timed_out += 1
+            return 504, {"error": f"Timpul de răspuns ({self.request_timeout:.0f}s) a fost depășit."}
+        except Exception as e:
+            self.failed += 1
+            return 500, {"error": str(e)}
+
+        self.served += 1
+        response = {
+            "answer": answer,
+            "timings": {k: v for k, v in timings.items() if isinstance(v, (int, float))},
+            "latency": time.perf_counter() - start,
+        }
+        if session_id is not None:
+            response["session_id"] = session_id
+        return 200, response
+
+    def _request_finished(self, _future):
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "uptime": time.time() - self.started_at,
+            "in_flight": self.in_flight,
+            "served": self.served,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "query_embedding_cache": vector_db_manager.get_query_cache_stats(),
+            "query_batching": vector_db_manager.get_query_batching_stats(),
+            "answer_cache": get_answer_cache().stats(),
+            "sessions": get_session_store().stats(),
+        }
+
+
+def use_fake_backends(embedding_latency: float = 0.05, llm_latency: float = 0.2, tokens_per_second: float = 50.0,
+                      prompt_tokens_per_second: float = 0.0, data_dir: str = FAKE_DATA_DIR):
+    """
+    Înlocuiește Gemini și Ollama cu backend-urile locale simulate din src.fakes.
+    Vectorii vin de la furnizorul `hashing` (cu latența unui serviciu de rețea),
+    cu identitatea lui, iar indexul, cache-ul de vectori și cel de răspunsuri
+    sunt mutate în `data_dir`: indexul și cache-urile reale nu sunt atinse.
+    """
+    from src.answer_cache import AnswerCache, set_answer_cache
+    from src.embedding_providers import HashingEmbeddingProvider, set_embedding_provider
+    from src.fakes import FakeChatBackend, FakeEmbeddingProvider
+
+    vector_db_manager.CHROMA_PATH = os.path.join(data_dir, "chroma_db")
+    vector_db_manager.NUMPY_DB_PATH = os.path.join(data_dir, "numpy_db")
+    set_answer_cache(AnswerCache(cache_dir=os.path.join(data_dir, "answer_cache")))
+    set_embedding_provider(FakeEmbeddingProvider(HashingEmbeddingProvider(model="simulat"), latency=embedding_latency,
+                                                 cache_dir=os.path.join(data_dir, "embedding_cache")))
+    rag_service.set_chat_backend(FakeChatBackend(
+        latency=llm_latency, tokens_per_second=tokens_per_second, prompt_tokens_per_second=prompt_tokens_per_second))
+
+
+async def serve(collection, host: str = HOST, port: int = PORT, **server_options):
+    server = RagServer(collection, **server_options)
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"[Server] Ascult pe http://{host}:{port} (POST /query, GET /health, GET /stats, GET /metrics)")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviciu HTTP pentru agentul RAG rutier.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--llm-concurrency", type=int, default=MAX_CONCURRENT_LLM_CALLS)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT_SECONDS)
+    parser.add_argument("--reindex", action="store_true", help="Re-indexare completă la pornire.")
+    parser.add_argument("--fake-backends", action="store_true",
+                        help="Folosește backend-uri simulate în locul Gemini/Ollama.")
+    parser.add_argument("--trace", action="store_true",
+                        help=f"Activează span-urile și metricile (scrise în {telemetry.TRACE_FILE}).")
+    args = parser.parse_args()
+
+    if args.trace:
+        telemetry.set_enabled(True)
+
+    if args.fake_backends:
+        use_fake_backends()
+    rag_service.set_llm_concurrency(args.llm_concurrency)
+    vector_db_manager.enable_query_batching()
+
+    collection = rag_service.initialize_rag_system(reindex=args.reindex)
+    try:
+        asyncio.run(serve(collection, args.host, args.port, max_workers=args.workers,
+                          max_in_flight=args.max_in_flight, request_timeout=args.timeout))
+    except KeyboardInterrupt:
+        print("\n[Server] Oprit.")
+
+
+if __name__ == '__main__':
+    main()
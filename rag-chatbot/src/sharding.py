@@ -0,0 +1,154 @@
+"""
+Colecția segmentată pe surse: câte o colecție (shard) pentru fiecare valoare
+a metadatei `sursa`, în același client (ChromaDB sau NumPy).
+
+ShardedCollection expune subsetul din API-ul ChromaDB folosit de
+vector_db_manager (count, get, upsert, delete, flush, query), deci sincronizarea și
+căutarea nu știu de shard-uri:
+  - upsert trimite fiecare segment în shard-ul sursei lui, delete după
+    prefixul ID-ului (ID-urile încep cu sursa, vezi make_chunk_id);
+  - query cu `where={"sursa": ...}` (filtrul produs de query_router) caută
+    doar în shard-urile cerute, fără filtru; fără `where` caută în toate și
+    combină rezultatele după distanță (vectorii sunt în același spațiu).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data_processor import source_slug
+from src.numpy_store import flush_collection
+
+# --- Configuratii Shard-uri ---
+# Cate shard-uri sunt interogate simultan cand o intrebare merge la mai multe surse
+FAN_OUT_WORKERS = 4
+
+_fan_out_pool = None
+_fan_out_lock = threading.Lock()
+
+
+def shard_name(collection_name: str, source: str) -> str:
+    """Numele colecției unei surse: 'CodRutier_RAG-OUG_195_2002'."""
+    return f"{collection_name}-{source_slug(source)}"
+
+
+def _get_fan_out_pool() -> ThreadPoolExecutor:
+    global _fan_out_pool
+    with _fan_out_lock:
+        if _fan_out_pool is None:
+            _fan_out_pool = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix="shard-query")
+        return _fan_out_pool
+
+
+def _sources_in_filter(where: dict | None) -> list[str] | None:
+    """Sursele cerute de un filtru care privește doar `sursa`; None pentru orice alt filtru."""
+    if not where or list(where) != ["sursa"]:
+        return None
+    condition = where["sursa"]
+    if not isinstance(condition, dict):
+        return [condition]
+    if list(condition) == ["$eq"]:
+        return [condition["$eq"]]
+    if list(condition) == ["$in"]:
+        return list(condition["$in"])
+    return None
+
+
+class ShardedCollection:
+    """O colecție logică peste shard-urile `{sursa: colecție}`, cu API-ul unei colecții ChromaDB."""
+
+    def __init__(self, name: str, shards: dict):
+        self.name = name
+        self.shards = shards
+        self._by_slug = {source_slug(source): source for source in shards}
+
+    def counts(self) -> dict[str, int]:
+        """Numărul de segmente din fiecare shard."""
+        return {source: shard.count() for source, shard in self.shards.items()}
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards.values())
+
+    def _select(self, where: dict | None):
+        """(shard-urile de interogat, filtrul rămas pentru ele)."""
+        sources = _sources_in_filter(where)
+        if sources is None:
+            return list(self.shards.values()), where
+        return [self.shards[source] for source in sources if source in self.shards], None
+
+    def get(self, ids: list[str] | None = None, where: dict | None = None, include=("metadatas", "documents")) -> dict:
+        shards, where = self._select(where)
+        merged = {"ids": [], **{key: [] for key in include}}
+        for shard in shards:
+            part = shard.get(ids=ids, where=where, include=list(include))
+            for key, values in merged.items():
+                values.extend(part.get(key) or [])
+        return merged
+
+    def upsert(self, ids: list[str], embeddings, documents: list[str] | None = None,
+               metadatas: list[dict] | None = None):
+        """Fiecare segment ajunge în shard-ul sursei din metadatele lui."""
+        groups = {}
+        for position, meta in enumerate(metadatas or []):
+            groups.setdefault(meta.get("sursa"), []).append(position)
+        for source, positions in groups.items():
+            shard = self.shards.get(source)
+            if shard is None:
+                raise ValueError(f"Sursa '{source}' nu are shard în colecția '{self.name}'.")
+            shard.upsert(
+                ids=[ids[i] for i in positions],
+                embeddings=[embeddings[i] for i in positions],
+                documents=[documents[i] for i in positions] if documents is not None else None,
+                metadatas=[metadatas[i] for i in positions],
+            )
+
+    def delete(self, ids: list[str]):
+        """Șterge după ID; prefixul ID-ului indică sursa (ID-urile fără shard nu există)."""
+        groups = {}
+        for doc_id in ids:
+            source = self._by_slug.get(doc_id.split("/", 1)[0])
+            if source is not None:
+                groups.setdefault(source, []).append(doc_id)
+        for source, source_ids in groups.items():
+            self.shards[source].delete(ids=source_ids)
+
+    def flush(self):
+        for shard in self.shards.values():
+            flush_collection(shard)
+
+    def query(self, query_embeddings, n_results: int = 10, where: dict | None = None,
+              include=("metadatas", "documents", "distances")) -> dict:
+        """
+        Top-k din shard-urile selectate de `where`. Cu mai multe shard-uri, fiecare
+        întoarce propriul top-k (interogate în paralel), iar rezultatele sunt
+        combinate după distanță - același top-k ca al unei singure colecții.
+        """
+        shards, where = self._select(where)
+        include = list(include)
+        if len(shards) == 1:
+            return shards[0].query(query_embeddings=query_embeddings, n_results=n_results, where=where,
+                                   include=include)
+
+        # Distantele sunt necesare pentru combinare, chiar daca apelantul nu le cere
+        shard_include = include if "distances" in include else include + ["distances"]
+        keys = ["ids"] + include
+        if not shards:
+            return {key: [[] for _ in query_embeddings] for key in keys}
+
+        def query_shard(shard):
+            return shard.query(query_embeddings=query_embeddings, n_results=n_results, where=where,
+                               include=shard_include)
+
+        if FAN_OUT_WORKERS > 1:
+            parts = list(_get_fan_out_pool().map(query_shard, shards))
+        else:
+            parts = [query_shard(shard) for shard in shards]
+        merged = {key: [] for key in keys}
+        for row in range(len(query_embeddings)):
+            candidates = []
+            for part in parts:
+                for position, distance in enumerate(part["distances"][row]):
+                    candidates.append((distance, part, position))
+            candidates.sort(key=lambda candidate: candidate[0])
+            top = candidates[:n_results]
+            for key in keys:
+                merged[key].append([part[key][row][position] for _, part, position in top])
+        return merged
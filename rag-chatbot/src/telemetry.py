@@ -0,0 +1,192 @@
+"""
+Instrumentare structurată pentru pipeline: span-uri de timp, contoare și histograme.
+
+Activare cu variabila de mediu RAG_TRACING=1 (sau set_enabled(True)). Când este
+activă, fiecare span este scris ca o linie JSON în logs/traces.jsonl și agregat în
+histograme în memorie (get_metrics(), expuse de server pe GET /metrics). Când este
+dezactivată, span() întoarce un obiect no-op partajat și contoarele nu fac nimic.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+# --- Configuratii Telemetrie ---
+TRACE_FILE = os.path.join("logs", "traces.jsonl")
+# Cate valori recente pastreaza fiecare histograma pentru percentile
+HISTOGRAM_WINDOW = 2048
+
+_enabled = None
+_trace_id = contextvars.ContextVar("rag_trace_id", default=None)
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_trace_file = None
+_trace_file_failed = False
+
+
+def is_enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        _enabled = os.getenv("RAG_TRACING", "").lower() in ("1", "true", "yes", "da")
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Măsoară durata unui bloc; la ieșire îl înregistrează în histogramă și în JSONL."""
+
+    __slots__ = ("name", "attrs", "start", "duration", "_token", "_root")
+
+    def __init__(self, name: str, attrs: dict, root: bool = False):
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = 0.0
+        self._token = None
+        self._root = root
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        if self._root or _trace_id.get() is None:
+            self._token = _trace_id.set(uuid.uuid4().hex[:16])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        observe(f"span.{self.name}", self.duration)
+        _emit({
+            "trace_id": _trace_id.get(),
+            "span": self.name,
+            "ts": time.time() - self.duration,
+            "duration_ms": round(self.duration * 1000, 3),
+            **self.attrs,
+        })
+        if self._token is not None:
+            try:
+                _trace_id.reset(self._token)
+            except ValueError:
+                # Generator inchis din alt context (ex: flux abandonat de client)
+                pass
+        return False
+
+
+def span(name: str, **attrs):
+    """Span de timp pentru o etapă (rescriere, embedding, cautare_vectoriala, ...)."""
+    if not is_enabled():
+        return _NOOP_SPAN
+    return Span(name, attrs)
+
+
+def trace(name: str, **attrs):
+    """Span rădăcină: începe un trace nou (un ID comun pentru toate span-urile din el)."""
+    if not is_enabled():
+        return _NOOP_SPAN
+    return Span(name, attrs, root=True)
+
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+def increment(name: str, value: float = 1):
+    """Contor (ex: cache.raspunsuri.hit, tokens.prompt)."""
+    if not is_enabled():
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float):
+    """Adaugă o valoare într-o histogramă (durate în secunde, dimensiuni de lot etc.)."""
+    if not is_enabled():
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"count": 0, "sum": 0.0, "max": 0.0,
+                                             "recent": deque(maxlen=HISTOGRAM_WINDOW)}
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["max"] = max(histogram["max"], value)
+        histogram["recent"].append(value)
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100.0)))
+    return ordered[index]
+
+
+def get_metrics() -> dict:
+    """Instantaneu al contoarelor și histogramelor (p50/p95/p99 pe fereastra recentă)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: (h["count"], h["sum"], h["max"], sorted(h["recent"]))
+                      for name, h in _histograms.items()}
+    return {
+        "enabled": is_enabled(),
+        "counters": counters,
+        "histograms": {
+            name: {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                "max": maximum,
+                "p50": _percentile(recent, 50),
+                "p95": _percentile(recent, 95),
+                "p99": _percentile(recent, 99),
+            }
+            for name, (count, total, maximum, recent) in histograms.items()
+        },
+    }
+
+
+def reset_metrics():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _emit(record: dict):
+    global _trace_file, _trace_file_failed
+    if _trace_file_failed:
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        try:
+            if _trace_file is None:
+                os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+                _trace_file = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+            _trace_file.write(line + "\n")
+        except OSError as e:
+            _trace_file_failed = True
+            print(f"[Telemetrie] Nu pot scrie în {TRACE_FILE}, continui doar cu metricile în memorie: {e}")
@@ -1,132 +1,631 @@
-import chromadb
-from google import genai
-from google.genai.errors import APIError
+import hashlib
+import json
 import os
-import time 
+import time
 import shutil # NOU: Necesara pentru stergerea directorului ChromaDB
+from src import telemetry
+from src.answer_cache import clear_answer_cache
+from src.embedding_cache import QueryEmbeddingLRU, get_embedding_cache, make_cache_key, normalize_query
+# set_gemini_client / get_gemini_client raman importabile si de aici (server, benchmark-uri)
+from src.embedding_providers import (GEMINI_EMBEDDING_MODEL, get_embedding_provider, get_gemini_client,
+                                     set_embedding_provider, set_gemini_client)
+from src.ingestion import INGEST_PROCESSES, PROCESS_POOL_MIN_TEXTS, EmbeddingBatchError, MicroBatcher, ProcessPoolEmbedder, embed_batches
+from src.numpy_store import NUMPY_DB_PATH, NumpyClient, clear_collections, flush_collection
+from src.lexical_index import LexicalIndex, get_index as get_lexical_index, parse_article_reference, reciprocal_rank_fusion, register_index
+from src.query_router import route_query, source_filter
+from src.sharding import ShardedCollection, shard_name
 
 # --- Configuratii ChromaDB si API ---
 CHROMA_PATH = "chroma_db"
+# Backend-ul vectorial: "chroma" (implicit) sau "numpy" (cautare exacta in memorie, src.numpy_store)
+VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma").lower()
+# Doar pentru backend-ul "numpy": "none", "int8" sau "binary" (candidati cuantizati, re-scorati exact)
+VECTOR_QUANTIZATION = os.getenv("RAG_VECTOR_QUANTIZATION", "none").lower()
 COLLECTION_NAME = "CodRutier_RAG"
-EMBEDDING_MODEL = 'text-embedding-004' 
-# Limita maxima de articole pe lot (impusa de API)
-BATCH_SIZE = 100 
+# Colectia segmentata pe surse (RAG_SHARDING=1): un shard per `sursa`, vezi src.sharding
+SHARDING = os.getenv("RAG_SHARDING", "0").lower() in ("1", "true", "yes", "da")
+# Rutarea intrebarilor catre surse (src.query_router); implicit activa doar cu shard-uri
+QUERY_ROUTING = os.getenv("RAG_QUERY_ROUTING", "1" if SHARDING else "0").lower() in ("1", "true", "yes", "da")
+# Manifestul indexului (in directorul bazei vectoriale): hash-ul corpusului si ID-urile
+# segmentelor indexate, ca pornirea sa poata sari peste segmentarea corpusului
+MANIFEST_FILE = "rag_manifest.json"
+# Cheia din metadatele colectiei care retine furnizorul de embedding-uri folosit la construire
+PROVIDER_METADATA_KEY = "embedding_provider"
+# Colectiile create inainte de furnizorii configurabili au fost construite cu Gemini
+LEGACY_PROVIDER = GEMINI_EMBEDDING_MODEL
+# Micro-batching pentru vectorizarea intrebarilor concurente (folosit de server)
+QUERY_BATCH_WINDOW_MS = 10
+QUERY_BATCH_MAX = 32
+# Candidati ceruti fiecarei cautari (vectoriala si BM25) inainte de fuziune
+HYBRID_CANDIDATES = 20
+# Cati vectori de intrebare sunt trimisi intr-o singura interogare a colectiei (mod bulk)
+QUERY_SEARCH_BATCH = 64
 
-def get_gemini_client():
-    """Initializeaza clientul Gemini si verifica existenta API Key."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY nu este setată. Setați variabila de mediu.")
-    return genai.Client(api_key=api_key)
+_query_batcher = None
+_query_cache = QueryEmbeddingLRU()
+# Amprenta continutului fiecarei colectii (folosita la invalidarea cache-urilor de raspunsuri)
+_fingerprints = {}
 
-def generate_embeddings(texts: list[str]) -> list[list[float]]:
+def _embed_queries(texts: list[str]) -> list[list[float]]:
+    """Un singur apel către furnizor pentru mai multe întrebări (task RETRIEVAL_QUERY)."""
+    return get_embedding_provider().embed(texts, "RETRIEVAL_QUERY")
+
+def embed_query(user_query: str) -> list[float]:
     """
-    Generează vectori de embedding reali folosind Gemini API, 
-    împărțind lista de texte în loturi (batches) de maximum 100 de elemente.
+    Vectorul întrebării, din cache-ul LRU dacă aceeași întrebare a fost pusă recent.
+    Cu micro-batching activ, întrebările concurente sunt vectorizate într-un singur apel.
     """
-    client = get_gemini_client()
-    all_embeddings = []
-    
-    # Impartirea in loturi de 100
-    for i in range(0, len(texts), BATCH_SIZE):
-        batch = texts[i:i + BATCH_SIZE]
-        print(f"  > Procesează lotul {i // BATCH_SIZE + 1} de {len(batch)} articole...")
-        
-        try:
-            response = client.models.embed_content(
-                model=EMBEDDING_MODEL,
-                contents=batch, 
-                config={'task_type': "RETRIEVAL_DOCUMENT"} 
-            )
-            
-            # CORECȚIE CRITICĂ: Extragem lista de valori (float) din fiecare obiect ContentEmbedding
-            for embedding_obj in response.embeddings:
-                all_embeddings.append(embedding_obj.values)
-            
-            # Pauza de 1 secunda intre loturi pentru a preveni throttling (optimizare)
-            time.sleep(1) 
-            
-        except APIError as e:
-            print(f"Eroare API la generarea embedding-urilor (Lotul {i // BATCH_SIZE + 1}): {e}")
-            return []
-        except Exception as e:
-            # Tipareste eroarea completa pentru debugging
-            import traceback
-            print(f"Eroare neașteptată la embedding: {e}")
-            print(traceback.format_exc())
-            return []
+    key = (get_embedding_provider().identity, normalize_query(user_query))
+    query_vector = _query_cache.get(key)
+    if query_vector is not None:
+        telemetry.increment("cache.embedding_intrebare.hit")
+        return query_vector
+    telemetry.increment("cache.embedding_intrebare.miss")
+
+    batcher = _query_batcher
+    with telemetry.span("embedding_api", micro_batching=batcher is not None):
+        if batcher is not None:
+            query_vector = batcher(user_query)
+        else:
+            query_vector = _embed_queries([user_query])[0]
+    _query_cache.put(key, query_vector)
+    return query_vector
+
+def embed_queries(user_queries: list[str]) -> list[list[float]]:
+    """
+    Vectorii mai multor întrebări deodată (mod bulk): cele din cache-ul LRU sunt
+    refolosite, iar restul (fără duplicate) pleacă în loturi de mărimea
+    acceptată de furnizor, nu câte un apel per întrebare.
+    """
+    provider = get_embedding_provider()
+    keys = [(provider.identity, normalize_query(query)) for query in user_queries]
+    vectors = {}
+    missing = {}
+    for key, query in zip(keys, user_queries):
+        if key in vectors or key in missing:
+            continue
+        vector = _query_cache.get(key)
+        if vector is None:
+            missing[key] = query
+        else:
+            vectors[key] = vector
+    telemetry.increment("cache.embedding_intrebare.hit", len(vectors))
+    telemetry.increment("cache.embedding_intrebare.miss", len(missing))
+
+    pending = list(missing.items())
+    for start in range(0, len(pending), provider.batch_size):
+        batch = pending[start:start + provider.batch_size]
+        with telemetry.span("embedding_api", intrebari=len(batch)):
+            batch_vectors = _embed_queries([query for _, query in batch])
+        for (key, _), vector in zip(batch, batch_vectors):
+            _query_cache.put(key, vector)
+            vectors[key] = vector
+    return [vectors[key] for key in keys]
+
+def enable_query_batching(window_ms: float = QUERY_BATCH_WINDOW_MS, max_batch: int = QUERY_BATCH_MAX):
+    """
+    Activează micro-batching-ul vectorizării întrebărilor (pentru servicii cu
+    mulți clienți concurenți): cererile sosite în `window_ms` pleacă împreună.
+    """
+    global _query_batcher
+    if _query_batcher is None:
+        _query_batcher = MicroBatcher(_embed_queries, window_seconds=window_ms / 1000.0, max_batch=max_batch)
+    return _query_batcher
+
+def get_query_batching_stats() -> dict | None:
+    return _query_batcher.stats() if _query_batcher is not None else None
+
+def set_query_cache_size(max_size: int):
+    """Înlocuiește cache-ul vectorilor de întrebare cu unul de `max_size` intrări (0 = dezactivat)."""
+    global _query_cache
+    _query_cache = QueryEmbeddingLRU(max_size=max_size)
+
+def get_query_cache_stats() -> dict:
+    """Contoarele cache-ului de vectori pentru întrebări (hit/miss/evictions)."""
+    return _query_cache.stats()
+
+def stream_embeddings(texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT"):
+    """
+    Generator de `(pozitii, vectori)`: întâi segmentele găsite în cache, apoi
+    loturile noi pe măsură ce se termină (trimise concurent, limitate de un
+    token bucket și reîncercate cu backoff). Fiecare lot finalizat este salvat
+    imediat în cache (jurnal), deci o rulare întreruptă se reia de la ultimul lot;
+    indexul complet al cache-ului este rescris o singură dată, la final.
+    """
+    provider = get_embedding_provider()
+    cache = get_embedding_cache(provider.cache_dir)
+    keys = [make_cache_key(provider.identity, task_type, text) for text in texts]
+    cached = cache.get_many(keys)
+
+    positions_by_key = {}
+    for position, key in enumerate(keys):
+        positions_by_key.setdefault(key, []).append(position)
+
+    cached_positions = [i for i, key in enumerate(keys) if key in cached]
+    missing_keys = [key for key in positions_by_key if key not in cached]
+    print(f"  > Cache embedding-uri: {len(cached_positions)} din {len(texts)} segmente reutilizate.")
+
+    if cached_positions:
+        yield cached_positions, [cached[keys[i]] for i in cached_positions]
+    if not missing_keys:
+        return
+
+    # Impartirea in loturi (100 pentru Gemini, limita impusa de API)
+    size = provider.batch_size
+    batch_keys = [missing_keys[i:i + size] for i in range(0, len(missing_keys), size)]
+    batches = [[texts[positions_by_key[key][0]] for key in keys_in_batch] for keys_in_batch in batch_keys]
+
+    # Furnizorii care calculeaza pe CPU, in Python, lucreaza in procese separate;
+    # cache-ul si colectia sunt scrise tot din acest proces
+    processes = 1
+    if provider.cpu_bound and len(missing_keys) >= PROCESS_POOL_MIN_TEXTS:
+        processes = min(INGEST_PROCESSES, len(batches))
+    if processes > 1:
+        embed_batch = ProcessPoolEmbedder(provider, task_type, processes)
+    else:
+        def embed_batch(batch: list[str]) -> list[list[float]]:
+            return provider.embed(batch, task_type)
+
+    try:
+        for batch_index, vectors in embed_batches(batches, embed_batch, max_workers=max(processes, provider.max_workers),
+                                                  bucket=provider.rate_limiter()):
+            cache.put_many(batch_keys[batch_index], vectors)
+            positions, batch_vectors = [], []
+            for key, vector in zip(batch_keys[batch_index], vectors):
+                for position in positions_by_key[key]:
+                    positions.append(position)
+                    batch_vectors.append(vector)
+            yield positions, batch_vectors
+    finally:
+        cache.flush()
+        if processes > 1:
+            embed_batch.close()
+
+def generate_embeddings(texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+    """
+    Generează vectori de embedding cu furnizorul configurat (Gemini API implicit),
+    împărțind lista de texte în loturi (batches) de mărimea cerută de furnizor.
+    Segmentele deja vectorizate (acelasi model, task_type si text) sunt luate din
+    cache-ul de pe disc; doar textele noi sau modificate ajung la API.
+    """
+    all_embeddings = [None] * len(texts)
+    try:
+        for positions, vectors in stream_embeddings(texts, task_type):
+            for position, vector in zip(positions, vectors):
+                all_embeddings[position] = vector
+    except EmbeddingBatchError as e:
+        print(f"Eroare API la generarea embedding-urilor: {e}")
+        print("  > Loturile finalizate sunt salvate în cache; relansați pentru a relua.")
+        return []
+    except Exception as e:
+        # Tipareste eroarea completa pentru debugging
+        import traceback
+        print(f"Eroare neașteptată la embedding: {e}")
+        print(traceback.format_exc())
+        return []
 
     return all_embeddings
 
-def create_or_update_db(chunks_list: list[str], metadata_list: list[dict], document_ids: list[str]):
-    """Creează clientul ChromaDB și adaugă documentele."""
+def ingest_chunks(collection, chunks_list: list[str], metadata_list: list[dict], document_ids: list[str]):
+    """
+    Vectorizează segmentele și le inserează în colecție în flux, lot cu lot,
+    pe măsură ce embedding-urile sunt gata (nu după ce s-a terminat tot corpusul).
+    Colecția este persistată o singură dată, la final (și după o eroare).
+    """
+    try:
+        for positions, vectors in stream_embeddings(chunks_list):
+            collection.upsert(
+                embeddings=vectors,
+                documents=[chunks_list[i] for i in positions],
+                metadatas=[metadata_list[i] for i in positions],
+                ids=[document_ids[i] for i in positions]
+            )
+    except EmbeddingBatchError as e:
+        print(f"Eroare API la generarea embedding-urilor: {e}")
+        print("  > Loturile finalizate sunt deja în baza de date și în cache; relansați pentru a relua.")
+        raise Exception("Nu s-au putut genera vectorii din cauza erorii API.") from e
+    finally:
+        flush_collection(collection)
+
+def get_vector_client(backend: str | None = None):
+    """
+    Clientul pentru backend-ul vectorial configurat (RAG_VECTOR_BACKEND).
+    ChromaDB este importat doar când este folosit, pentru că importul lui
+    domină timpul de pornire al variantei NumPy.
+    """
+    backend = backend or VECTOR_BACKEND
+    if backend == "numpy":
+        return NumpyClient(path=NUMPY_DB_PATH, quantization=VECTOR_QUANTIZATION)
+    if backend != "chroma":
+        raise ValueError(f"Backend vectorial necunoscut: '{backend}' (folosiți 'chroma' sau 'numpy').")
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+def manifest_path() -> str:
+    return os.path.join(NUMPY_DB_PATH if VECTOR_BACKEND == "numpy" else CHROMA_PATH, MANIFEST_FILE)
+
+def _manifest_signature(corpus_hash: str) -> dict:
+    """Tot ce trebuie să coincidă pentru ca indexul salvat să corespundă corpusului."""
+    signature = {"corpus": corpus_hash, "model_embedding": get_embedding_provider().identity,
+                 "colectie": COLLECTION_NAME, "backend": VECTOR_BACKEND}
+    if SHARDING:
+        signature["shards"] = "sursa"
+    return signature
+
+def _remove_manifest():
+    try:
+        os.remove(manifest_path())
+    except FileNotFoundError:
+        pass
+
+def write_manifest(corpus_hash: str, chunks_list: list[str], metadata_list: list[dict], document_ids: list[str]):
+    """
+    Marchează indexul ca fiind la zi pentru corpusul cu hash-ul dat. Segmentele
+    sunt salvate alături, ca indexul lexical să fie refăcut fără re-segmentare.
+    """
+    path = manifest_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({**_manifest_signature(corpus_hash), "ids": document_ids,
+                   "documents": chunks_list, "metadatas": metadata_list}, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+def open_current_db(corpus_hash: str | None):
+    """
+    Deschide colecția fără a segmenta corpusul, dacă manifestul arată că indexul
+    corespunde exact corpusului (același hash, model de embedding și backend).
+    Returnează None dacă indexul trebuie verificat/actualizat pe calea completă.
+    """
+    if corpus_hash is None:
+        return None
+    try:
+        with open(manifest_path(), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    document_ids = manifest.pop("ids", None)
+    chunks_list = manifest.pop("documents", None)
+    metadata_list = manifest.pop("metadatas", None)
+    if manifest != _manifest_signature(corpus_hash) or not document_ids \
+            or len(chunks_list or []) != len(document_ids) or len(metadata_list or []) != len(document_ids):
+        return None
+
+    collection = open_collection(get_vector_client(), metadata_list)
+    if collection.count() != len(set(document_ids)):
+        return None
+
+    register_index(collection.name, LexicalIndex(chunks_list, metadata_list, document_ids))
+    _fingerprints.pop(collection.name, None)
+    print(f"[DB Manager] Indexul corespunde corpusului (manifest) - {len(document_ids)} segmente, fără re-segmentare.")
+    return collection
+
+def open_collection(client, metadata_list: list[dict], ensure_provider: bool = False):
+    """
+    Colecția COLLECTION_NAME sau, cu SHARDING, colecția segmentată: câte un
+    shard pentru fiecare sursă din `metadata_list`. Cu `ensure_provider`,
+    fiecare colecție este verificată față de furnizorul de embedding-uri.
+    """
+    def open_one(name: str):
+        collection = client.get_or_create_collection(name=name)
+        return _ensure_provider(client, collection) if ensure_provider else collection
+
+    if not SHARDING:
+        return open_one(COLLECTION_NAME)
+    sources = dict.fromkeys(meta["sursa"] for meta in metadata_list)
+    return ShardedCollection(COLLECTION_NAME, {source: open_one(shard_name(COLLECTION_NAME, source))
+                                               for source in sources})
+
+def _ensure_provider(client, collection):
+    """
+    Vectorii din colecție trebuie să provină de la furnizorul de embedding-uri
+    configurat (altfel întrebările ar fi comparate cu vectori din alt spațiu).
+    La nepotrivire colecția este ștearsă și reconstruită; furnizorul este
+    înregistrat în metadatele colecției.
+    """
+    identity = get_embedding_provider().identity
+    metadata = collection.metadata or {}
+    built_with = metadata.get(PROVIDER_METADATA_KEY, LEGACY_PROVIDER)
+    if collection.count() > 0 and built_with != identity:
+        print(f"[DB Manager] Indexul a fost construit cu '{built_with}', dar furnizorul configurat este "
+              f"'{identity}' - reconstruire completă.")
+        client.delete_collection(name=collection.name)
+        collection = client.get_or_create_collection(name=collection.name)
+        metadata = collection.metadata or {}
+    if metadata.get(PROVIDER_METADATA_KEY) != identity:
+        collection.modify(metadata={**metadata, PROVIDER_METADATA_KEY: identity})
+    return collection
+
+def create_or_update_db(chunks_list: list[str], metadata_list: list[dict], document_ids: list[str],
+                        incremental: bool = True, corpus_hash: str | None = None):
+    """
+    Creează clientul ChromaDB și adaugă documentele.
+    Dacă baza este deja populată și `incremental` este activ, sincronizează doar
+    diferențele (ID-urile segmentelor sunt deterministe, derivate din conținut).
+    Cu `corpus_hash`, la final scrie manifestul folosit de open_current_db.
+    """
     
-    # 1. Client ChromaDB in modul local/persistenta
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    collection = client.get_or_create_collection(name=COLLECTION_NAME)
+    # 1. Client ChromaDB in modul local/persistenta (sau stocarea NumPy echivalenta)
+    client = get_vector_client()
+    # Manifestul vechi nu mai garanteaza nimic cat timp colectia este modificata
+    _remove_manifest()
+    collection = open_collection(client, metadata_list, ensure_provider=True)
+
+    # Indexul lexical (BM25 + articole) se construieste in memorie din aceleasi segmente
+    register_index(collection.name, LexicalIndex(chunks_list, metadata_list, document_ids))
 
     # 2. Populare DB
+    synced = True
     if collection.count() < 1:
         print("[DB Manager] Generare embedding-uri reale... Așteptați...")
-        vectors = generate_embeddings(chunks_list)
-        
-        if not vectors:
-             # Eroarea critica este acum aruncata in generate_embeddings
-             raise Exception("Nu s-au putut genera vectorii din cauza erorii API.")
-        
-        # Inserare in ChromaDB
-        collection.add(
-            embeddings=vectors,
-            documents=chunks_list,
-            metadatas=metadata_list,
-            ids=document_ids
-        )
+        # Inserare in ChromaDB, in flux, pe masura ce loturile sunt vectorizate
+        ingest_chunks(collection, chunks_list, metadata_list, document_ids)
         print(f"[DB Manager] Baza de date ChromaDB '{COLLECTION_NAME}' populată cu {collection.count()} articole.")
+    elif incremental:
+        sync_db(collection, chunks_list, metadata_list, document_ids)
     else:
+        synced = False
         print(f"[DB Manager] Baza de date ChromaDB a fost deja populată ({collection.count()} articole).")
-        
+
+    if isinstance(collection, ShardedCollection):
+        print("[DB Manager] Shard-uri pe surse: " +
+              ", ".join(f"{source} ({count})" for source, count in collection.counts().items()))
+
+    _fingerprints.pop(collection.name, None)
+    if corpus_hash is not None and synced and collection.count() == len(set(document_ids)):
+        write_manifest(corpus_hash, chunks_list, metadata_list, document_ids)
     return collection
 
-def retrieve_chunks(collection, user_query: str, k: int = 2) -> list[dict]:
-    """Interogheaza ChromaDB pentru a gasi cele mai relevante articole."""
-    client = get_gemini_client()
-    
-    # 1. Vectorizeaza Intrebarea (Query Vector)
-    query_vector_response = client.models.embed_content(
-        model=EMBEDDING_MODEL,
-        contents=[user_query], 
-        config={'task_type': "RETRIEVAL_QUERY"} 
-    )
-    # Accesarea vectorului se face cu .embeddings[0].values
-    query_vector = query_vector_response.embeddings[0].values
-    
-    # 2. Cauta cei mai apropiati k vectori
-    results = collection.query(
-        query_embeddings=[query_vector],
-        n_results=k,
-        include=['documents', 'metadatas']
-    )
-    
+def get_index_fingerprint(collection) -> str:
+    """
+    Amprenta conținutului indexului: hash peste furnizorul de embedding și ID-urile
+    (derivate din conținut) ale segmentelor. Se schimbă la orice re-indexare
+    care modifică segmentele.
+    """
+    fingerprint = _fingerprints.get(collection.name)
+    if fingerprint is None:
+        digest = hashlib.sha256(get_embedding_provider().identity.encode("utf-8"))
+        for doc_id in sorted(collection.get(include=[])['ids']):
+            digest.update(b"\x1f" + doc_id.encode("utf-8"))
+        fingerprint = digest.hexdigest()
+        _fingerprints[collection.name] = fingerprint
+    return fingerprint
+
+def sync_db(collection, chunks_list: list[str], metadata_list: list[dict], document_ids: list[str]):
+    """
+    Sincronizare incrementală: compară corpusul segmentat proaspăt cu ID-urile
+    stocate în ChromaDB, inserează doar segmentele noi/modificate și le șterge
+    pe cele care nu mai există.
+    """
+    stored_ids = set(collection.get(include=[])['ids'])
+    wanted_ids = set(document_ids)
+
+    removed_ids = sorted(stored_ids - wanted_ids)
+    new_positions = [i for i, doc_id in enumerate(document_ids) if doc_id not in stored_ids]
+
+    if not removed_ids and not new_positions:
+        print(f"[DB Manager] Baza de date ChromaDB este la zi ({collection.count()} articole).")
+        return collection
+
+    print(f"[DB Manager] Sincronizare incrementală: {len(new_positions)} segmente noi/modificate, {len(removed_ids)} eliminate.")
+
+    if new_positions:
+        ingest_chunks(
+            collection,
+            [chunks_list[i] for i in new_positions],
+            [metadata_list[i] for i in new_positions],
+            [document_ids[i] for i in new_positions]
+        )
+
+    # Stergem abia dupa ce segmentele noi au fost inserate, ca o eroare de API
+    # sa nu lase baza de date fara articolele modificate
+    if removed_ids:
+        collection.delete(ids=removed_ids)
+        flush_collection(collection)
+
+    print(f"[DB Manager] Sincronizare finalizată ({collection.count()} articole).")
+    return collection
+
+def _lookup_reference(lexical_index, user_query: str, k: int, timings: dict) -> list[dict] | None:
+    """Scurtătura pentru referințe explicite ("art. 102"): segmentele articolului, fără embedding."""
+    if lexical_index is None:
+        return None
+    reference = parse_article_reference(user_query)
+    if not reference:
+        return None
+    start = time.perf_counter()
+    article, source, point = reference
+    with telemetry.span("cautare_articol", articol=article) as article_span:
+        article_ids = lexical_index.lookup_article(article, source, point, limit=k)
+        article_span.set(rezultate=len(article_ids))
+    timings["cautare_articol"] = time.perf_counter() - start
+    if not article_ids:
+        return None
+    return [_format_chunk(lexical_index.get_chunk(doc_id), score=1.0) for doc_id in article_ids]
+
+def _route_query(lexical_index, user_query: str, n_candidates: int, timings: dict):
+    """
+    (surse, rezultate_bm25) de la query_router: sursele în care se caută (None =
+    toate) și căutarea lexicală făcută pentru vot, refolosită la fuziune.
+    """
+    if not QUERY_ROUTING:
+        return None, None
+    start = time.perf_counter()
+    with telemetry.span("rutare") as route_span:
+        sources, lexical_hits = route_query(user_query, lexical_index, n_candidates)
+        route_span.set(surse=sources or "toate")
+    telemetry.increment("rutare.directa" if sources else "rutare.toate")
+    timings["rutare"] = timings.get("rutare", 0.0) + time.perf_counter() - start
+    return sources, lexical_hits
+
+def _dense_chunks(results: dict, row: int) -> list[dict]:
+    """Rezultatele vectoriale ale întrebării de pe rândul `row` din răspunsul colecției."""
+    if not results['documents'] or not results['metadatas']:
+        return []
+    return [
+        {"id": doc_id, "text": doc, "metadata": meta, "score": distance_to_similarity(distance)}
+        for doc_id, doc, meta, distance in zip(results['ids'][row], results['documents'][row],
+                                               results['metadatas'][row], results['distances'][row])
+    ]
+
+def _fuse_with_lexical(lexical_index, user_query: str, dense_chunks: list[dict], k: int,
+                       n_candidates: int, timings: dict, sources: list[str] | None = None,
+                       lexical_hits: list | None = None) -> list[dict]:
+    """
+    Fuziunea (RRF) rezultatelor vectoriale cu cele lexicale (BM25), limitate la
+    `sources`. Rezultatele BM25 deja calculate de ruter (`lexical_hits`) sunt refolosite.
+    """
+    if lexical_index is None:
+        return [_format_chunk(chunk, chunk["score"]) for chunk in dense_chunks[:k]]
+
+    start = time.perf_counter()
+    with telemetry.span("cautare_lexicala"):
+        if lexical_hits is None:
+            lexical_hits = lexical_index.search(user_query, k=n_candidates, sources=sources)
+        elif sources is not None:
+            lexical_hits = [hit for hit in lexical_hits
+                            if lexical_index.get_chunk(hit[0])["metadata"].get("sursa") in sources]
+        lexical_ids = [doc_id for doc_id, _ in lexical_hits]
+    by_id = {chunk["id"]: chunk for chunk in dense_chunks}
     retrieved_chunks = []
-    if results['documents'] and results['metadatas']:
-        for doc, meta in zip(results['documents'][0], results['metadatas'][0]):
-            retrieved_chunks.append({
-                "text": doc,
-                "articol": f"{meta['sursa']} - Articolul {meta['articol']}"
-            })
-            
+    for doc_id, _ in reciprocal_rank_fusion([[c["id"] for c in dense_chunks], lexical_ids])[:k]:
+        chunk = by_id.get(doc_id) or lexical_index.get_chunk(doc_id)
+        if chunk is not None:
+            retrieved_chunks.append(_format_chunk(chunk, chunk.get("score")))
+    timings["cautare_lexicala"] = timings.get("cautare_lexicala", 0.0) + time.perf_counter() - start
     return retrieved_chunks
 
+def retrieve_chunks(collection, user_query: str, k: int = 2, timings: dict | None = None) -> list[dict]:
+    """
+    Interogheaza ChromaDB pentru a gasi cele mai relevante articole.
+    Daca exista un index lexical pentru colectie: referintele explicite la articole
+    ("art. 102") sunt rezolvate direct din metadate, fara embedding, iar restul
+    intrebarilor combina cautarea vectoriala cu BM25 prin Reciprocal Rank Fusion.
+    Cu QUERY_ROUTING, cautarea se limiteaza la sursele alese de query_router.
+    Daca primeste `timings`, adauga durata (secunde) fiecarei etape a cautarii.
+    """
+    timings = {} if timings is None else timings
+    lexical_index = get_lexical_index(collection.name)
+
+    # 0. Scurtatura: referinta explicita la un articol
+    article_chunks = _lookup_reference(lexical_index, user_query, k, timings)
+    if article_chunks is not None:
+        return article_chunks
+
+    # 1. Sursele relevante (None = toate); mai multi candidati daca urmeaza fuziunea
+    n_candidates = max(k * 2, HYBRID_CANDIDATES) if lexical_index is not None else k
+    sources, lexical_hits = _route_query(lexical_index, user_query, n_candidates, timings)
+
+    # 2. Vectorizeaza Intrebarea (Query Vector)
+    start = time.perf_counter()
+    with telemetry.span("embedding"):
+        query_vector = embed_query(user_query)
+    timings["embedding"] = time.perf_counter() - start
+    
+    # 3. Cauta cei mai apropiati k vectori
+    start = time.perf_counter()
+    with telemetry.span("cautare_vectoriala", n_results=n_candidates):
+        results = collection.query(
+            query_embeddings=[query_vector],
+            n_results=n_candidates,
+            where=source_filter(sources),
+            include=['documents', 'metadatas', 'distances']
+        )
+    timings["cautare_vectoriala"] = time.perf_counter() - start
+
+    # 4. Fuziune cu rezultatele lexicale (BM25)
+    return _fuse_with_lexical(lexical_index, user_query, _dense_chunks(results, 0), k, n_candidates, timings,
+                              sources, lexical_hits)
+
+def retrieve_chunks_batch(collection, user_queries: list[str], k: int = 2, timings: dict | None = None,
+                          query_batch: int = QUERY_SEARCH_BATCH) -> list[list[dict]]:
+    """
+    Ca retrieve_chunks, pentru multe întrebări deodată: vectorii lor sunt
+    calculați în bloc (embed_queries), iar colecția este interogată cu
+    `query_batch` vectori per apel. Rezultatele sunt în ordinea întrebărilor;
+    `timings` primește duratele totale ale etapelor pentru tot lotul.
+    """
+    timings = {} if timings is None else timings
+    lexical_index = get_lexical_index(collection.name)
+    results = [None] * len(user_queries)
+
+    # 0. Referintele explicite la articole nu au nevoie de embedding
+    dense_positions = []
+    for position, user_query in enumerate(user_queries):
+        results[position] = _lookup_reference(lexical_index, user_query, k, timings)
+        if results[position] is None:
+            dense_positions.append(position)
+    if not dense_positions:
+        return results
+
+    # 1. Toate intrebarile ramase, vectorizate in loturi
+    start = time.perf_counter()
+    with telemetry.span("embedding", intrebari=len(dense_positions)):
+        query_vectors = embed_queries([user_queries[i] for i in dense_positions])
+    timings["embedding"] = time.perf_counter() - start
+
+    # 2. Intrebarile cu aceleasi surse (rutare) sunt interogate impreuna
+    n_candidates = max(k * 2, HYBRID_CANDIDATES) if lexical_index is not None else k
+    vectors_by_position = dict(zip(dense_positions, query_vectors))
+    routes, lexical_hits = {}, {}
+    for position in dense_positions:
+        sources, lexical_hits[position] = _route_query(lexical_index, user_queries[position], n_candidates, timings)
+        routes.setdefault(tuple(sources) if sources else None, []).append(position)
+
+    # 3. Mai multi vectori per interogare a colectiei, apoi fuziunea per intrebare
+    timings["cautare_vectoriala"] = 0.0
+    for sources, route_positions in routes.items():
+        for offset in range(0, len(route_positions), query_batch):
+            positions = route_positions[offset:offset + query_batch]
+            start = time.perf_counter()
+            with telemetry.span("cautare_vectoriala", n_results=n_candidates, intrebari=len(positions)):
+                response = collection.query(
+                    query_embeddings=[vectors_by_position[position] for position in positions],
+                    n_results=n_candidates,
+                    where=source_filter(sources),
+                    include=['documents', 'metadatas', 'distances']
+                )
+            timings["cautare_vectoriala"] += time.perf_counter() - start
+            for row, position in enumerate(positions):
+                results[position] = _fuse_with_lexical(lexical_index, user_queries[position],
+                                                       _dense_chunks(response, row), k, n_candidates, timings,
+                                                       sources, lexical_hits[position])
+    return results
+
+def distance_to_similarity(distance: float) -> float:
+    """
+    ChromaDB foloseste implicit distanta L2 la patrat; pentru vectori normalizati
+    (cazul Gemini) d = 2 - 2*cos, deci similaritatea cosinus este 1 - d/2.
+    """
+    return 1.0 - distance / 2.0
+
+def _format_chunk(chunk: dict, score: float | None = None) -> dict:
+    """`score` = similaritatea vectoriala (None pentru rezultatele doar lexicale)."""
+    meta = chunk["metadata"]
+    return {
+        "id": chunk["id"],
+        "text": chunk["text"],
+        "articol": f"{meta['sursa']} - Articolul {meta['articol']}",
+        "metadata": meta,
+        "score": score
+    }
+
 def clear_db():
-    """Șterge directorul ChromaDB pentru a forța o nouă indexare completă."""
-    if os.path.exists(CHROMA_PATH):
+    """Șterge directorul bazei vectoriale pentru a forța o nouă indexare completă."""
+    clear_answer_cache()
+    _fingerprints.clear()
+    if VECTOR_BACKEND == "numpy":
+        clear_collections()
+        db_path, label = NUMPY_DB_PATH, "NumPy"
+    else:
+        db_path, label = CHROMA_PATH, "ChromaDB"
+    if os.path.exists(db_path):
         try:
-            shutil.rmtree(CHROMA_PATH)
-            print(f"[DB Manager] Directorul ChromaDB '{CHROMA_PATH}' a fost șters cu succes.")
+            shutil.rmtree(db_path)
+            print(f"[DB Manager] Directorul {label} '{db_path}' a fost șters cu succes.")
         except OSError as e:
-            print(f"Eroare la ștergerea directorului ChromaDB: {e}")
+            print(f"Eroare la ștergerea directorului {label}: {e}")
     else:
-        print(f"[DB Manager] Directorul ChromaDB '{CHROMA_PATH}' nu există.")
+        print(f"[DB Manager] Directorul {label} '{db_path}' nu există.")
 
 if __name__ == '__main__':
     # Acest test necesita ca data_processor sa fie importabil
@@ -0,0 +1,36 @@
+from src.conversation import ConversationSession, is_follow_up
+
+PREVIOUS = "Care este viteza maximă pe autostradă pentru categoria B?"
+
+
+def test_connectives_and_references_are_follow_ups():
+    assert is_follow_up("Și dacă e a doua oară?", PREVIOUS)
+    assert is_follow_up("Dar pe drumurile naționale?", PREVIOUS)
+    assert is_follow_up("Care este amenda pentru asta?", PREVIOUS)
+
+
+def test_standalone_questions_are_not_follow_ups():
+    assert not is_follow_up("Ce se întâmplă dacă refuz recoltarea probelor biologice?", PREVIOUS)
+    assert not is_follow_up("Dacă nu am RCA ce amendă primesc?", PREVIOUS)
+    assert not is_follow_up("ITP expirat", PREVIOUS)
+
+
+def test_short_question_sharing_a_term_is_a_follow_up():
+    assert is_follow_up("categoria C?", PREVIOUS)
+    assert not is_follow_up("categoria C?")
+
+
+def test_plan_keeps_standalone_question_unchanged():
+    session = ConversationSession("test")
+    session.add_turn(PREVIOUS, "Viteza maximă este 130 km/h.", [])
+    question = "Ce se întâmplă dacă refuz recoltarea probelor biologice?"
+    plan = session.plan(question, None)
+    assert plan == {"follow_up": False, "chunks": None, "query": question}
+
+
+def test_plan_searches_follow_up_with_previous_question():
+    session = ConversationSession("test")
+    session.add_turn(PREVIOUS, "Viteza maximă este 130 km/h.", [])
+    plan = session.plan("Dar pe drumurile naționale?", None)
+    assert plan["follow_up"]
+    assert plan["query"] == f"{PREVIOUS} Dar pe drumurile naționale?"
@@ -0,0 +1,79 @@
+import os
+import re
+
+import pytest
+
+from src.data_processor import iter_chunks, load_and_chunk_data, load_and_chunk_data_legacy
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "data", "codul_rutier.txt")
+
+# Ce elimina segmentarea din textul original: titlurile si marcajele de sursa
+_HEADING_RE = re.compile(r"^#+.*$|^\s*CAPITOLUL\s*[^A-Z]*[^\n]*|^SECTIUNEA\s*[^A-Z]*[^\n]*", re.MULTILINE)
+_SOURCE_RE = re.compile(r"----- START (?:OUG 195/2002|HG 1391/2006|CODUL PENAL)")
+
+SAMPLE = """# Titlu
+----- START OUG 195/2002
+CAPITOLUL I: Dispoziţii generale
+Art. 1 Circulaţia pe drumurile publice se desfăşoară conform prezentei ordonanţe.
+Art. 2 Scopul reglementării este siguranţa participanţilor la trafic.
+----- START HG 1391/2006
+Articolul 3
+Constituie contravenţii următoarele fapte săvârşite de conducătorii de vehicule, care se sancţionează cu amendă din clasa I de sancţiuni, într-o formulare suficient de lungă pentru a depăşi pragul de sub-segmentare al articolelor cu liste numerotate, cum sunt cele din corpus, unde asemenea articole au adesea zeci de puncte. Textul continuă cu o enumerare:
+1. nerespectarea semnificaţiei indicatoarelor rutiere de către pietoni, cu excepţia situaţiilor prevăzute expres;
+2. oprirea neregulamentară în intersecţii şi în zona trecerilor pentru pietoni;
+3. staţionarea pe trotuar acolo unde nu este permisă.
+----- START CODUL PENAL
+Art. 336 Conducerea unui vehicul sub influenţa alcoolului se pedepseşte.
+"""
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def assert_offsets_match(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    previous_start = 0
+    for chunk in iter_chunks(path):
+        # Un segment gol (doar marcajul de sursa, ca in varianta initiala) are start == end
+        assert previous_start <= chunk["start"] <= chunk["end"] <= len(data)
+        previous_start = chunk["start"]
+        original = _collapse(_SOURCE_RE.sub("", _HEADING_RE.sub("", data[chunk["start"]:chunk["end"]].decode("utf-8"))))
+        if chunk["punct"]:
+            # Sub-segmentele sunt "sursa - Art. N (punct) antet... : continut"; pozitiile acopera punctul
+            assert original.startswith(chunk["punct"])
+            assert _collapse(chunk["text"]).endswith(original[len(chunk["punct"]):].strip())
+        else:
+            assert original == _collapse(chunk["text"])
+
+
+@pytest.fixture
+def sample_corpus(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_text(SAMPLE, encoding="utf-8")
+    return str(path)
+
+
+def test_sample_matches_legacy_segmentation(sample_corpus):
+    chunks, metadatas, ids = load_and_chunk_data(sample_corpus)
+    assert (chunks, metadatas, ids) == load_and_chunk_data_legacy(sample_corpus)
+    assert [meta["articol"] for meta in metadatas if "pct" in meta["articol"]] == ["3 (pct 1.)", "3 (pct 2.)", "3 (pct 3.)"]
+    assert {meta["sursa"] for meta in metadatas} == {"OUG 195/2002", "HG 1391/2006", "Codul Penal"}
+
+
+def test_sample_offsets_point_into_the_file(sample_corpus):
+    assert_offsets_match(sample_corpus)
+
+
+@pytest.mark.skipif(not os.path.exists(CORPUS), reason="corpusul lipseste")
+def test_corpus_matches_legacy_segmentation():
+    # ID-urile segmentelor conduc sincronizarea incrementala: orice schimbare a segmentarii trebuie sa fie intentionata
+    current = load_and_chunk_data(CORPUS)
+    assert current == load_and_chunk_data_legacy(CORPUS)
+    assert len(set(current[2])) == len(current[2])
+
+
+@pytest.mark.skipif(not os.path.exists(CORPUS), reason="corpusul lipseste")
+def test_corpus_offsets_point_into_the_file():
+    assert_offsets_match(CORPUS)
@@ -0,0 +1,51 @@
+import json
+import os
+
+import numpy as np
+
+from src.embedding_cache import INDEX_FILE, INDEX_LOG_FILE, VECTORS_FILE, EmbeddingCache
+
+
+def _batch(start: int, count: int, dim: int = 4):
+    keys = [f"cheie-{i}" for i in range(start, start + count)]
+    vectors = [[float(i)] * dim for i in range(start, start + count)]
+    return keys, vectors
+
+
+def _index_rows(cache_dir) -> int:
+    with open(os.path.join(cache_dir, INDEX_FILE), encoding="utf-8") as f:
+        return len(json.load(f)["rows"])
+
+
+def test_batches_are_journaled_and_indexed_once(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    for start in range(0, 30, 10):
+        cache.put_many(*_batch(start, 10))
+    # Indexul complet este scris doar la primul lot; restul loturilor ajung in jurnal
+    assert _index_rows(tmp_path) == 10
+    reopened = EmbeddingCache(str(tmp_path))
+    assert len(reopened) == 30
+    assert reopened.get_many(["cheie-25"]) == {"cheie-25": [25.0] * 4}
+
+    cache.flush()
+    assert _index_rows(tmp_path) == 30
+    assert not os.path.exists(tmp_path / INDEX_LOG_FILE)
+    assert len(EmbeddingCache(str(tmp_path))) == 30
+
+
+def test_interrupted_batch_is_dropped_on_reload(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many(*_batch(0, 10))
+    cache.put_many(*_batch(10, 10))
+    # Crash la lotul urmator: vectorii scrisi, jurnalul doar partial
+    with open(tmp_path / VECTORS_FILE, "ab") as f:
+        f.write(np.ones((5, 4), dtype=np.float32).tobytes())
+    with open(tmp_path / INDEX_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write("cheie-20\ncheie-2")
+
+    # Vectorii sunt scrisi inaintea jurnalului: cheile cu linie completa au vector valid,
+    # linia partiala si randurile fara cheie sunt eliminate
+    reopened = EmbeddingCache(str(tmp_path))
+    assert len(reopened) == 21
+    assert os.path.getsize(tmp_path / VECTORS_FILE) == 21 * 4 * 4
+    assert reopened.get_many(["cheie-19", "cheie-20", "cheie-21"]) == {"cheie-19": [19.0] * 4, "cheie-20": [1.0] * 4}
@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from src import ingestion
+from src.fakes import FakeEmbeddingClient
+from src.ingestion import EmbeddingBatchError, TokenBucket, embed_batches
+
+NO_RATE_LIMIT = TokenBucket(rate=0)
+
+
+def _embed_with(client):
+    def embed(batch):
+        response = client.models.embed_content(model="fake", contents=batch)
+        return [embedding.values for embedding in response.embeddings]
+    return embed
+
+
+def test_batches_survive_rate_limit_errors():
+    client = FakeEmbeddingClient(latency=0, rate_limit_probability=0.3, dim=8, seed=1)
+    batches = [[f"segment {i}-{j}" for j in range(5)] for i in range(12)]
+    results = dict(embed_batches(batches, _embed_with(client), bucket=NO_RATE_LIMIT, max_retries=20,
+                                 backoff_base=0.001))
+    assert sorted(results) == list(range(len(batches)))
+    assert all(len(vectors) == 5 and len(vectors[0]) == 8 for vectors in results.values())
+    assert client.calls > len(batches)
+
+
+def test_failed_batch_stops_the_others_backing_off(monkeypatch):
+    # Loturile bune primesc mereu 429 si asteapta 30s; lotul "rau" esueaza definitiv imediat
+    monkeypatch.setattr(ingestion, "backoff_delay", lambda attempt, rate_limited, base: 30.0 if rate_limited else 0.0)
+    client = FakeEmbeddingClient(latency=0, rate_limit_probability=1.0, dim=8)
+    good = _embed_with(client)
+
+    def embed(batch):
+        if batch[0] == "rau":
+            time.sleep(0.1)  # celelalte loturi au timp sa intre in backoff
+            raise ValueError("lot invalid")
+        return good(batch)
+
+    start = time.monotonic()
+    with pytest.raises(EmbeddingBatchError) as error:
+        list(embed_batches([["rau"], ["a"], ["b"], ["c"]], embed, max_workers=4, bucket=NO_RATE_LIMIT, max_retries=2))
+    assert error.value.batch_index == 0
+    assert time.monotonic() - start < 5.0
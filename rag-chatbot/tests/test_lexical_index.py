@@ -0,0 +1,15 @@
+from src.lexical_index import mentioned_sources, parse_article_reference
+
+
+def test_named_sources_are_detected():
+    assert mentioned_sources("Ce spune art. 5 din HG?") == ["HG 1391/2006"]
+    assert mentioned_sources("Ce prevede Codul Penal la art. 336?") == ["Codul Penal"]
+    assert mentioned_sources("Conform OUG nr. 195/2002, art. 102") == ["OUG 195/2002"]
+    assert mentioned_sources("regulamentul 1391/2006") == ["HG 1391/2006"]
+
+
+def test_bare_numbers_and_words_are_not_sources():
+    assert mentioned_sources("Am fost prins cu 195 km/h pe autostradă") == []
+    assert mentioned_sources("Amendă de 1391 lei?") == []
+    assert mentioned_sources("Este o faptă penală dacă nu opresc?") == []
+    assert parse_article_reference("art. 102 la 195 km/h") == ("102", None, None)
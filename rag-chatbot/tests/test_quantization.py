@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.numpy_store import NumpyCollection
+from src.quantization import approximate_scores, quantize, quantize_binary, quantize_int8
+
+
+def _random_unit_vectors(rng, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_binary_scores_are_negative_hamming_distances():
+    rng = np.random.default_rng(0)
+    vectors = _random_unit_vectors(rng, 200, 100)  # 100 biti: ultimul octet este incomplet
+    queries = _random_unit_vectors(rng, 5, 100)
+    codes = quantize_binary(vectors)
+    expected = np.stack([np.unpackbits(codes ^ bits, axis=1).sum(axis=1, dtype=np.int64)
+                         for bits in quantize_binary(queries)])
+    assert np.array_equal(approximate_scores(queries, {"codes": codes}, "binary"), -expected)
+
+
+def test_int8_codes_approximate_the_vectors():
+    rng = np.random.default_rng(1)
+    vectors = _random_unit_vectors(rng, 50, 64)
+    codes, scales = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and np.abs(codes).max() <= 127
+    assert np.abs(codes * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-6
+    scores = approximate_scores(vectors[:3], quantize(vectors, "int8"), "int8")
+    assert np.allclose(scores, vectors[:3] @ vectors.T, atol=0.02)
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_rescored_top_k_matches_exact_search(tmp_path, mode):
+    rng = np.random.default_rng(2)
+    dim, k = 128, 5
+    # Grupuri de documente apropiate: top-k-ul exact este bine separat de restul colectiei,
+    # deci candidatii aproximativi (k * rescore_factor) trebuie sa-l contina integral
+    centers = _random_unit_vectors(rng, 30, dim)
+    vectors = np.repeat(centers, 10, axis=0) + 0.3 * _random_unit_vectors(rng, 300, dim)
+    queries = centers[:10] + 0.1 * _random_unit_vectors(rng, 10, dim)
+    ids = [f"doc-{i}" for i in range(len(vectors))]
+
+    exact = NumpyCollection("exact", path=str(tmp_path))
+    exact.upsert(ids=ids, embeddings=vectors)
+    quantized = NumpyCollection(f"quant_{mode}", path=str(tmp_path), quantization=mode, rescore_factor=8)
+    quantized.upsert(ids=ids, embeddings=vectors)
+    quantized.flush()
+    assert quantized.memory_stats()["search_bytes"] < quantized.memory_stats()["full_precision_bytes"]
+
+    expected = exact.query(query_embeddings=queries, n_results=k)
+    result = quantized.query(query_embeddings=queries, n_results=k)
+    assert result["ids"] == expected["ids"]
+    assert np.allclose(result["distances"], expected["distances"], atol=1e-5)